@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+جدول التقويم الأكاديمي (هجري ↔ ميلادي) وتحويل التواريخ مرة واحدة إلى أعداد صحيحة
+
+التواريخ في ملفات الفصول نصوص ميلادية (YYYY-MM-DD أو رقم تاريخ Excel). تُحوَّل هنا
+مرة واحدة لكل قيمة مختلفة (مع ذاكرة مؤقتة، فتواريخ القبول تتكرر لآلاف الطلاب) إلى:
+  - رقم اليوم: عدد الأيام منذ 1970-01-01 (مثل parseDaySerial في js/app.js)
+  - رقم الفصل: (السنة الميلادية لبداية العام الأكاديمي - 1970) × 3 + (الفصل - 1)
+فتصبح مدة الدراسة والمقارنة بموعد التخرج المتوقع طرحًا بين أعداد صحيحة، ومدة
+الدراسة بالفصول فرقًا بين رقمي فصلين.
+
+العام الأكاديمي يُرمز له كما في ملفات الفصول برقمين هجريين (39 = 1439هـ) ويبدأ في
+الخريف الميلادي. لكل عام ثلاث خانات فصول: الأول والثاني ثم الصيفي، أو الفصل الثالث
+في أعوام الفصول الثلاثة (42–45). البدايات أدناه تقريبية وتكفي للتصنيف؛ ويمكن
+استبدالها بالتواريخ الرسمية في data/academic_calendar.csv (year;term;start).
+
+مثال:
+    python academic_calendar.py --date 2019-05-05
+    python academic_calendar.py --table
+"""
+
+import sys
+import os
+import csv
+import argparse
+from bisect import bisect_right
+from datetime import date, timedelta
+
+sys.stdout.reconfigure(encoding='utf-8')
+
+# ============================================================
+# الإعدادات
+# ============================================================
+CALENDAR_OVERRIDES = os.path.join("data", "academic_calendar.csv")
+EPOCH = date(1970, 1, 1)
+EPOCH_YEAR = 1970
+EXCEL_EPOCH_OFFSET = 25569   # رقم Excel لتاريخ 1970-01-01
+TERMS_PER_YEAR = 3
+
+# رمز العام (هجري) → بدايات خاناته الثلاث (ميلادي)
+# 43 اندمجت مع 42 (كما في YEAR_SEQUENCE)، فالرمز يقفز من 42 إلى 44
+ACADEMIC_CALENDAR = {
+    38: ('2017-09-17', '2018-01-28', '2018-06-17'),
+    39: ('2018-09-02', '2019-01-20', '2019-06-02'),
+    40: ('2019-09-01', '2020-01-19', '2020-06-14'),
+    41: ('2020-08-30', '2021-01-17', '2021-06-13'),
+    42: ('2021-08-29', '2021-11-28', '2022-03-13'),
+    44: ('2022-08-28', '2022-11-27', '2023-03-05'),
+    45: ('2023-08-20', '2023-11-26', '2024-03-03'),
+    46: ('2024-08-18', '2025-01-05', '2025-06-29'),
+    47: ('2025-08-24', '2026-01-11', '2026-06-28'),
+}
+
+# خارج الجدول (قبول قديم أو أعوام قادمة): بدايات تقديرية (شهر، يوم) للخانات
+# والخانتان الثانية والثالثة في السنة الميلادية التالية
+DEFAULT_TERM_STARTS = ((9, 1), (1, 20), (6, 15))
+
+
+def _iso(value):
+    return date.fromisoformat(value)
+
+
+# ============================================================
+# التقويم
+# ============================================================
+class AcademicCalendar:
+    """جدول الأعوام الأكاديمية مع تحويل مخزَّن مؤقتًا للتواريخ والأيام"""
+
+    def __init__(self, table=None):
+        table = ACADEMIC_CALENDAR if table is None else table
+        self.years = {}      # السنة الميلادية للبداية → (رمز العام، بدايات الخانات كأرقام أيام)
+        self.labels = {}     # رمز العام → السنة الميلادية للبداية
+        for label, starts in table.items():
+            days = tuple((_iso(s) - EPOCH).days for s in starts)
+            start_year = _iso(starts[0]).year
+            self.years[start_year] = (label, days)
+            self.labels[label] = start_year
+        # الفرق بين الرمز الهجري والسنة الميلادية قبل الجدول وبعده (للأعوام خارج الجدول)
+        self._first, last = min(self.years), max(self.years)
+        self._offsets = (self.years[self._first][0] - self._first, self.years[last][0] - last)
+        self._first_label = self.years[self._first][0]
+        self._serials = {}
+        self._terms = {}
+
+    @classmethod
+    def load(cls, path=CALENDAR_OVERRIDES):
+        """الجدول الافتراضي مع استبدال البدايات الموجودة في ملف التواريخ الرسمية"""
+        table = {label: list(starts) for label, starts in ACADEMIC_CALENDAR.items()}
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+                for row in csv.DictReader(f, delimiter=';'):
+                    label, term = int(row['year']), int(row['term'])
+                    starts = table.setdefault(label, [''] * TERMS_PER_YEAR)
+                    starts[term - 1] = row['start'].strip()
+            for label, starts in table.items():
+                if not all(starts):
+                    raise ValueError(f"{path}: العام {label} ينقصه تاريخ بداية فصل")
+        return cls(table)
+
+    # --------------------------------------------------------
+    # هجري ↔ ميلادي
+    # --------------------------------------------------------
+    def _year_entry(self, start_year):
+        entry = self.years.get(start_year)
+        if entry is None:
+            offset = self._offsets[0] if start_year < self._first else self._offsets[1]
+            days = tuple(
+                (date(start_year + (i > 0), m, d) - EPOCH).days
+                for i, (m, d) in enumerate(DEFAULT_TERM_STARTS)
+            )
+            entry = self.years[start_year] = (start_year + offset, days)
+        return entry
+
+    def start_year(self, label):
+        """رمز العام الهجري (مثل 39) → السنة الميلادية لبدايته"""
+        if label in self.labels:
+            return self.labels[label]
+        return label - (self._offsets[0] if label < self._first_label else self._offsets[1])
+
+    def label(self, start_year):
+        """السنة الميلادية لبداية العام → رمزه الهجري"""
+        return self._year_entry(start_year)[0]
+
+    # --------------------------------------------------------
+    # التحويل
+    # --------------------------------------------------------
+    def day_serial(self, value):
+        """نص تاريخ (YYYY-MM-DD أو رقم Excel) → رقم اليوم منذ 1970-01-01، أو None"""
+        try:
+            return self._serials[value]
+        except KeyError:
+            pass
+        serial = None
+        raw = str(value or '').strip()
+        if len(raw) >= 10 and raw[4] == '-' and raw[7] == '-':
+            try:
+                serial = (_iso(raw[:10]) - EPOCH).days
+            except ValueError:
+                serial = None
+        elif raw:
+            try:
+                number = float(raw)
+            except ValueError:
+                number = None
+            if number is not None and 20000 <= number <= 70000:
+                serial = int(number) - EXCEL_EPOCH_OFFSET
+        self._serials[value] = serial
+        return serial
+
+    def term_index(self, serial):
+        """رقم اليوم → رقم الفصل (أو None)"""
+        if serial is None:
+            return None
+        try:
+            return self._terms[serial]
+        except KeyError:
+            pass
+        year = (EPOCH + timedelta(days=serial)).year
+        starts = self._year_entry(year)[1]
+        if serial < starts[0]:
+            year -= 1
+            starts = self._year_entry(year)[1]
+        term = bisect_right(starts, serial)
+        index = self._terms[serial] = (year - EPOCH_YEAR) * TERMS_PER_YEAR + term - 1
+        return index
+
+    def term_of(self, index):
+        """رقم الفصل → (رمز العام الهجري، الفصل 1..3)"""
+        year, term = divmod(index, TERMS_PER_YEAR)
+        return self.label(EPOCH_YEAR + year), term + 1
+
+    def term_label(self, index):
+        """رقم الفصل → نص مثل 1439/2"""
+        label, term = self.term_of(index)
+        return f"14{label:02d}/{term}"
+
+    def bucket(self, records, fields):
+        """إضافة <field>_day و<field>_term لكل حقل تاريخ في السجلات (تحويل كل قيمة مختلفة مرة واحدة)"""
+        for field in fields:
+            day_key, term_key = f"{field}_day", f"{field}_term"
+            for r in records:
+                serial = self.day_serial(r.get(field, ''))
+                r[day_key] = serial
+                r[term_key] = self.term_index(serial)
+        return records
+
+
+# ============================================================
+# المعالجة الرئيسية
+# ============================================================
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='جدول التقويم الأكاديمي وتحويل التواريخ')
+    parser.add_argument('--date', nargs='+', help='تواريخ للتحويل (YYYY-MM-DD أو رقم Excel)')
+    parser.add_argument('--table', action='store_true', help='عرض جدول الأعوام وبدايات الفصول')
+    parser.add_argument('--calendar', default=CALENDAR_OVERRIDES, help='ملف التواريخ الرسمية')
+    args = parser.parse_args(argv)
+
+    calendar = AcademicCalendar.load(args.calendar)
+    if args.table:
+        for label, start_year in sorted(calendar.labels.items()):
+            starts = calendar.years[start_year][1]
+            text = ' | '.join(str(EPOCH + timedelta(days=d)) for d in starts)
+            print(f"  14{label:02d} ({start_year}/{start_year + 1}): {text}")
+    for value in args.date or []:
+        serial = calendar.day_serial(value)
+        if serial is None:
+            print(f"  {value}: تاريخ غير معروف")
+            continue
+        index = calendar.term_index(serial)
+        print(f"  {value}: اليوم {serial} | الفصل {index} ({calendar.term_label(index)})")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,293 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+قياس أداء بناء ملف Excel (create_excel.py) عند أحجام بيانات أكبر
+
+يولّد data.csv وgraduates_detail.csv وnon_completers.csv اصطناعية في مجلد مؤقت بعدد
+برامج وسنوات ومضاعف خريجين/غير مكملين قابل للضبط، ثم يبني الملف بنفس دوال
+create_excel ويقيس زمن كل ورقة، وauto_width، وإنشاء الرسوم، وwb.save، مع ذروة
+الذاكرة وحجم الملف الناتج.
+
+مثال:
+    python bench_workbook.py
+    python bench_workbook.py --programs 60 --years 20 --grad-scale 10 --repeat 3
+"""
+
+import sys
+import os
+import csv
+import time
+import random
+import shutil
+import tempfile
+import argparse
+import tracemalloc
+import contextlib
+from collections import defaultdict
+
+try:
+    import resource
+except ImportError:  # غير متوفرة على Windows
+    resource = None
+
+import create_excel
+
+sys.stdout.reconfigure(encoding='utf-8')
+
+# ============================================================
+# الإعدادات
+# ============================================================
+DEFAULT_PROGRAMS = 15
+DEFAULT_DEPTS = 5
+GRADUATES_PER_PROGRAM_YEAR = 25
+NON_COMPLETERS_PER_PROGRAM_YEAR = 8
+DEGREES = ('بكالوريوس', 'ماجستير', 'دكتوراه')
+STATUSES = ('منسحب', 'مؤجل', 'معتذر', 'منقطع عن الدراسة', 'مفصول اكاديميا', 'مطوي قيده')
+
+DATA_COLUMNS = [
+    'Dept_aName', 'Major_aName', 'Degree_aName', 'Semester',
+    'students_total', 'students_male', 'students_female',
+    'students_saudi', 'students_international',
+    'students_new', 'students_retained',
+    'graduates_total', 'graduates_ontime',
+    'prev_new_count', 'new_4_ago_count',
+]
+GRAD_COLUMNS = [
+    'السنة', 'الرقم_الجامعي', 'الاسم', 'التخصص', 'الدرجة', 'القسم', 'الجنس', 'الجنسية',
+    'تاريخ_القبول', 'تاريخ_التخرج', 'تاريخ_التخرج_المتوقع', 'المعدل',
+]
+NC_COLUMNS = [
+    'آخر_سنة', 'الرقم_الجامعي', 'الاسم', 'التخصص', 'الدرجة', 'القسم', 'الحالة',
+    'الجنس', 'الجنسية', 'تاريخ_القبول', 'المعدل', 'نوع_الدراسة',
+]
+
+# دوال create_excel التي تُقاس كل منها مرحلةً مستقلة
+SHEET_BUILDERS = (
+    'build_raw_sheet', 'aggregate_by_year', 'build_year_sheet', 'group_programs',
+    'build_program_sheet', 'build_dashboard_sheet', 'build_trends_sheet',
+    'build_calc_sheet', 'build_graduates_sheet', 'build_noncompleters_sheet',
+)
+CHART_CLASSES = ('BarChart', 'LineChart')
+
+
+# ============================================================
+# توليد البيانات
+# ============================================================
+def year_order(n_years):
+    """سنوات YEAR_ORDER الحالية ثم سنوات لاحقة حتى يصل العدد إلى n_years"""
+    years = list(create_excel.YEAR_ORDER)[:n_years]
+    while len(years) < n_years:
+        years.append(years[-1] + 1)
+    return years
+
+
+def synthesize(out_dir, n_programs, years, grad_scale=1.0, nc_scale=1.0, seed=1):
+    """كتابة الملفات الثلاثة في out_dir؛ ترجع {اسم الملف: عدد الصفوف}"""
+    rng = random.Random(seed)
+    programs = [
+        (f'قسم {i % DEFAULT_DEPTS + 1}', f'برنامج {i + 1}', DEGREES[i % len(DEGREES)])
+        for i in range(n_programs)
+    ]
+    counts = defaultdict(int)
+    sid = 440000000
+
+    with open(os.path.join(out_dir, 'data.csv'), 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f, delimiter=';')
+        writer.writerow(DATA_COLUMNS)
+        for dept, major, degree in programs:
+            for y in years:
+                total = rng.randint(40, 400)
+                male = rng.randint(0, total)
+                saudi = rng.randint(total // 2, total)
+                new = rng.randint(0, total // 3)
+                grads = rng.randint(0, total // 4)
+                writer.writerow([
+                    dept, major, degree, y, total, male, total - male, saudi, total - saudi,
+                    new, rng.randint(0, new), grads, rng.randint(0, grads),
+                    rng.randint(0, total // 3), rng.randint(0, total // 3),
+                ])
+                counts['data.csv'] += 1
+
+    n_grads = max(1, round(GRADUATES_PER_PROGRAM_YEAR * grad_scale))
+    n_nc = max(1, round(NON_COMPLETERS_PER_PROGRAM_YEAR * nc_scale))
+    with open(os.path.join(out_dir, 'graduates_detail.csv'), 'w', encoding='utf-8', newline='') as fg, \
+            open(os.path.join(out_dir, 'non_completers.csv'), 'w', encoding='utf-8', newline='') as fn:
+        grads_w = csv.writer(fg, delimiter=';')
+        nc_w = csv.writer(fn, delimiter=';')
+        grads_w.writerow(GRAD_COLUMNS)
+        nc_w.writerow(NC_COLUMNS)
+        for dept, major, degree in programs:
+            for y in years:
+                for _ in range(n_grads):
+                    sid += 1
+                    grads_w.writerow([
+                        y, sid, f'طالب {sid}', major, degree, dept,
+                        rng.choice(('ذكر', 'أنثى')), rng.choice(('سعودي', 'مصري', 'يمني')),
+                        f'20{y - 24:02d}-08-2{rng.randint(0, 9)}', f'20{y - 21:02d}-06-15',
+                        f'20{y - 20:02d}-06-01', f'{rng.uniform(2, 5):.2f}',
+                    ])
+                    counts['graduates_detail.csv'] += 1
+                for _ in range(n_nc):
+                    sid += 1
+                    nc_w.writerow([
+                        y, sid, f'طالب {sid}', major, degree, dept, rng.choice(STATUSES),
+                        rng.choice(('ذكر', 'أنثى')), rng.choice(('سعودي', 'مصري', 'يمني')),
+                        f'20{y - 24:02d}-08-2{rng.randint(0, 9)}', f'{rng.uniform(0, 5):.2f}', 'منتظم',
+                    ])
+                    counts['non_completers.csv'] += 1
+    return dict(counts)
+
+
+# ============================================================
+# القياس
+# ============================================================
+class StageTimer:
+    """تغليف دوال create_excel (وفئات الرسوم) لتجميع الزمن لكل مرحلة"""
+
+    def __init__(self):
+        self.totals = defaultdict(float)
+        self.calls = defaultdict(int)
+        self._patched = []
+
+    def wrap(self, owner, attr, label):
+        original = getattr(owner, attr)
+
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return original(*args, **kwargs)
+            finally:
+                self.totals[label] += time.perf_counter() - start
+                self.calls[label] += 1
+
+        setattr(owner, attr, timed)
+        self._patched.append((owner, attr, original))
+
+    def restore(self):
+        for owner, attr, original in reversed(self._patched):
+            setattr(owner, attr, original)
+        self._patched = []
+
+
+def _chart_methods():
+    """(الفئة، الدالة) لعمليات بناء الرسوم: إضافة السلاسل والفئات وإدراج الرسم في الورقة"""
+    from openpyxl.chart._chart import ChartBase
+    from openpyxl.worksheet.worksheet import Worksheet
+    return [(ChartBase, 'add_data'), (ChartBase, 'set_categories'), (Worksheet, 'add_chart')]
+
+
+def _peak_rss_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss بالكيلوبايت على Linux وبالبايت على macOS
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def run_once(src_dir, out_path, trace_memory=False):
+    """قراءة الملفات وبناء الملف وحفظه مرة واحدة؛ ترجع (الأزمنة، عدد الاستدعاءات، ذروة الذاكرة)"""
+    timer = StageTimer()
+    for name in SHEET_BUILDERS:
+        timer.wrap(create_excel, name, name)
+    timer.wrap(create_excel, 'auto_width', 'auto_width')
+    for name in CHART_CLASSES:
+        timer.wrap(create_excel, name, 'charts')
+    for owner, attr in _chart_methods():
+        timer.wrap(owner, attr, 'charts')
+
+    if trace_memory:
+        tracemalloc.start()
+    try:
+        start = time.perf_counter()
+        data = create_excel.read_data(os.path.join(src_dir, 'data.csv'))
+        grad_rows = create_excel.read_detail_rows(os.path.join(src_dir, 'graduates_detail.csv'))
+        nc_rows = create_excel.read_detail_rows(os.path.join(src_dir, 'non_completers.csv'))
+        timer.totals['read_csv'] = time.perf_counter() - start
+
+        # دوال البناء تطبع تقدمها؛ نخفيه حتى لا يختلط بالتقرير
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            start = time.perf_counter()
+            wb = create_excel.build_workbook(data, grad_rows, nc_rows)
+            timer.totals['build_workbook'] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        wb.save(out_path)
+        timer.totals['wb.save'] = time.perf_counter() - start
+        traced_peak = tracemalloc.get_traced_memory()[1] / (1024 * 1024) if trace_memory else None
+    finally:
+        if trace_memory:
+            tracemalloc.stop()
+        timer.restore()
+    return dict(timer.totals), dict(timer.calls), traced_peak
+
+
+def print_report(results, calls, sizes, out_size, traced_peak):
+    """أقل زمن من عدة تكرارات لكل مرحلة"""
+    best = {k: min(r[k] for r in results) for k in results[0]}
+    total = best['read_csv'] + best['build_workbook'] + best['wb.save']
+    print(f"\n  {'المرحلة':<28}{'الزمن (ث)':>12}{'النسبة':>9}{'الاستدعاءات':>13}")
+    print(f"  {'-' * 62}")
+    order = ['read_csv', *SHEET_BUILDERS, 'auto_width', 'charts', 'build_workbook', 'wb.save']
+    for key in order:
+        if key not in best:
+            continue
+        print(f"  {key:<28}{best[key]:>12.3f}{best[key] / total:>9.1%}{calls.get(key, ''):>13}")
+    print(f"  {'-' * 62}")
+    print(f"  {'الإجمالي':<28}{total:>12.3f}")
+    print("\n  (أزمنة الأوراق تشمل auto_width والرسوم التي تستدعيها)")
+    print(f"\n  حجم الملف: {out_size:,} بايت")
+    rss = _peak_rss_mb()
+    if rss is not None:
+        print(f"  ذروة ذاكرة العملية (RSS): {rss:,.1f} MB")
+    if traced_peak is not None:
+        print(f"  ذروة تخصيصات Python (tracemalloc): {traced_peak:,.1f} MB")
+    print("  المدخلات: " + ' | '.join(f"{k}: {v:,} صف" for k, v in sizes.items()))
+
+
+# ============================================================
+# المعالجة الرئيسية
+# ============================================================
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='قياس أداء بناء ملف Excel على بيانات اصطناعية')
+    parser.add_argument('--programs', type=int, default=DEFAULT_PROGRAMS, help='عدد البرامج')
+    parser.add_argument('--years', type=int, default=len(create_excel.YEAR_ORDER),
+                        help='عدد السنوات (يمدد YEAR_ORDER عند الحاجة)')
+    parser.add_argument('--grad-scale', type=float, default=1.0,
+                        help=f'مضاعف الخريجين ({GRADUATES_PER_PROGRAM_YEAR} لكل برنامج وسنة)')
+    parser.add_argument('--nc-scale', type=float, default=1.0,
+                        help=f'مضاعف غير المكملين ({NON_COMPLETERS_PER_PROGRAM_YEAR} لكل برنامج وسنة)')
+    parser.add_argument('--repeat', type=int, default=1, help='عدد التكرارات (يُعرض أقل زمن)')
+    parser.add_argument('--trace-memory', action='store_true',
+                        help='قياس ذروة تخصيصات Python بـ tracemalloc (يبطئ التنفيذ)')
+    parser.add_argument('--keep', metavar='DIR', help='حفظ الملفات المولدة وملف Excel في DIR')
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args(argv)
+
+    years = year_order(args.years)
+    work_dir = args.keep or tempfile.mkdtemp(prefix='kpi_bench_')
+    os.makedirs(work_dir, exist_ok=True)
+
+    # السنوات الإضافية تحتاج تسميات في YEAR_LABELS
+    saved_order, saved_labels = create_excel.YEAR_ORDER, create_excel.YEAR_LABELS
+    create_excel.YEAR_ORDER = years
+    create_excel.YEAR_LABELS = {**saved_labels, **{y: str(1400 + y) for y in years if y not in saved_labels}}
+    try:
+        sizes = synthesize(work_dir, args.programs, years, args.grad_scale, args.nc_scale, args.seed)
+        print(f"البرامج: {args.programs} | السنوات: {len(years)} ({years[0]}–{years[-1]}) | "
+              f"مضاعف الخريجين: {args.grad_scale:g} | مضاعف غير المكملين: {args.nc_scale:g}")
+        out_path = os.path.join(work_dir, 'KPI_bench.xlsx')
+        results = []
+        traced_peak = None
+        for _ in range(max(1, args.repeat)):
+            totals, calls, peak = run_once(work_dir, out_path, args.trace_memory)
+            results.append(totals)
+            traced_peak = peak if peak is not None else traced_peak
+        print_report(results, calls, sizes, os.path.getsize(out_path), traced_peak)
+    finally:
+        create_excel.YEAR_ORDER, create_excel.YEAR_LABELS = saved_order, saved_labels
+        if not args.keep:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+استخراج مجزأ لعدة كليات (shards) ثم دمجها في data.csv للكلية والجامعة
+
+كل جزء (shard) كلية أو قسم بملفات فصوله وإعداداته الخاصة (ملف JSON):
+    {
+      "name": "sharia",
+      "college": "الشريعة والأنظمة",
+      "data_dir": "data",
+      "year_sequence": [38, 39, 40, 41, 42, 44, 45, 46, 47],
+      "dept_map": {"الفقه": "الشريعة", ...},
+      "excluded_programs": ["..."],
+      "program_aliases": {"القانون": "الأنظمة"},
+      "corrections": "data/corrections.csv"
+    }
+الحقول عدا name وdata_dir اختيارية (الافتراضي إعدادات extract_data، وملف التصحيحات
+<data_dir>/corrections.csv كما في الاستخراج الكامل).
+
+الاستخراج يعمل على كل جزء مستقلًا (ولو على أجهزة مختلفة) ويكتب:
+  - <name>/data.csv: المؤشرات الجزئية للجزء وحده
+  - <name>.shard.json.gz: مجموعات الدفعات (طلاب الفصل الأول بحقول التجميع فقط، والمتخرجون)
+والدمج يجمع مجموعات الدفعات فقط، دون قراءة ملفات الفصول، ثم يعيد حساب المؤشرات
+بنفس aggregate_kpis. فالطالب الذي انتقل بين كليتين لا يُعد مستجدًا على مستوى الجامعة.
+
+مثال:
+    python college_shards.py --extract shards/sharia.json shards/science.json --out shards_out
+    python college_shards.py --merge shards_out/*.shard.json.gz --out merged
+"""
+
+import sys
+import os
+import json
+import gzip
+import argparse
+from collections import defaultdict
+
+import extract_data
+from extract_data import aggregate_kpis, add_semester_records, write_kpi_csv, GRADUATED_STATUS
+
+sys.stdout.reconfigure(encoding='utf-8')
+
+# ============================================================
+# الإعدادات
+# ============================================================
+DEFAULT_OUT_DIR = "shards"
+SHARD_VERSION = 1
+SHARD_SUFFIX = '.shard.json.gz'
+UNIVERSITY_DIR = 'university'
+COLLEGES_DIR = 'colleges'
+
+# حقول سجل الفصل الأول التي تحتاجها aggregate_kpis
+SEM1_FIELDS = ('program', 'degree', 'status', 'gender', 'nationality')
+GRAD_FIELDS = ('program', 'degree')
+
+
+def load_config(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        config = json.load(f)
+    for field in ('name', 'data_dir'):
+        if not config.get(field):
+            raise ValueError(f"{path}: الحقل {field} مطلوب")
+    config.setdefault('college', config['name'])
+    config.setdefault('year_sequence', list(extract_data.YEAR_SEQUENCE))
+    config.setdefault('dept_map', dict(extract_data.DEPT_MAP))
+    config.setdefault('excluded_programs', sorted(extract_data.EXCLUDED_PROGRAMS))
+    config.setdefault('program_aliases', {})
+    config.setdefault('corrections', os.path.join(config['data_dir'], 'corrections.csv'))
+    return config
+
+
+# ============================================================
+# الاستخراج (لكل جزء)
+# ============================================================
+def extract_shard(config, out_dir=DEFAULT_OUT_DIR):
+    """تحليل ملفات فصول الجزء وكتابة مؤشراته الجزئية ومجموعات دفعاته؛ ترجع مسار ملف الجزء"""
+    aliases = config['program_aliases']
+    sem1_students = defaultdict(dict)
+    all_semesters_students = defaultdict(dict)
+    # تصحيحات المسجل تُطبق قبل التجميع كما في extract_data.main
+    corrections = extract_data.load_corrections(config['corrections'])
+    audit, corrected_rows, parsed = [], set(), set()
+    year_files = extract_data.list_semester_files(config['data_dir'])
+    for year in sorted(year_files):
+        for fname, semester in sorted(year_files[year], key=lambda x: x[1]):
+            students = extract_data.parse_semester_file(os.path.join(config['data_dir'], fname))
+            students = extract_data.apply_corrections(students, year, semester, corrections,
+                                                      audit, corrected_rows)
+            parsed.add((year, semester))
+            if aliases:
+                students = [
+                    dict(s, program=aliases[s['program']]) if s['program'] in aliases else s
+                    for s in students
+                ]
+            add_semester_records(sem1_students, all_semesters_students, year, semester, students)
+            print(f"  [{config['name']}] {fname}: {len(students):,} سجل")
+
+    aggregated = aggregate_kpis(
+        sem1_students, all_semesters_students, config['year_sequence'],
+        config['dept_map'], set(config['excluded_programs']), verbose=False,
+    )
+    partial_dir = os.path.join(out_dir, config['name'])
+    os.makedirs(partial_dir, exist_ok=True)
+    write_kpi_csv(os.path.join(partial_dir, 'data.csv'), aggregated)
+    if corrections:
+        extract_data.audit_missing_files(corrections, parsed, audit)
+        audit_path = os.path.join(partial_dir, 'corrections_audit.csv')
+        extract_data.write_corrections_audit(audit, audit_path)
+        applied = sum(1 for row in audit if row[-1] == 'applied')
+        print(f"  [{config['name']}] التصحيحات: {applied} من {len(audit)} مطبقة ({audit_path})")
+
+    shard = {
+        'version': SHARD_VERSION,
+        'name': config['name'],
+        'college': config['college'],
+        'year_sequence': config['year_sequence'],
+        'dept_map': config['dept_map'],
+        'excluded_programs': config['excluded_programs'],
+        'sem1': {
+            str(year): [[sid] + [s[f] for f in SEM1_FIELDS] for sid, s in students.items()]
+            for year, students in sem1_students.items()
+        },
+        'graduated': {
+            str(year): [[sid] + [s[f] for f in GRAD_FIELDS]
+                        for sid, s in students.items() if s['status'] == GRADUATED_STATUS]
+            for year, students in all_semesters_students.items()
+        },
+    }
+    path = os.path.join(out_dir, config['name'] + SHARD_SUFFIX)
+    payload = json.dumps(shard, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    with gzip.open(path, 'wb') as f:
+        f.write(payload)
+    print(f"  [{config['name']}] {len(aggregated)} صف جزئي | {path} ({os.path.getsize(path):,} بايت)")
+    return path
+
+
+# ============================================================
+# الدمج
+# ============================================================
+def load_shard(path):
+    with gzip.open(path, 'rb') as f:
+        shard = json.loads(f.read().decode('utf-8'))
+    if shard.get('version') != SHARD_VERSION:
+        raise ValueError(f"{path}: صيغة جزء غير مدعومة")
+    return shard
+
+
+def combine_shards(shards):
+    """دمج مجموعات الدفعات؛ ترجع (sem1_students, all_semesters_students, sequence, dept_map, excluded)"""
+    sem1_students = defaultdict(dict)
+    all_semesters_students = defaultdict(dict)
+    sequence = set()
+    dept_map = {}
+    excluded = set()
+    duplicates = 0
+
+    for shard in shards:
+        sequence.update(shard['year_sequence'])
+        excluded.update(shard['excluded_programs'])
+        for prog, dept in shard['dept_map'].items():
+            if dept_map.get(prog, dept) != dept:
+                print(f"  تحذير: البرنامج {prog} مربوط بقسمين ({dept_map[prog]} / {dept})")
+            dept_map.setdefault(prog, dept)
+        for year, rows in shard['sem1'].items():
+            target = sem1_students[int(year)]
+            for sid, *values in rows:
+                duplicates += sid in target
+                target[sid] = dict(zip(SEM1_FIELDS, values))
+        for year, rows in shard['graduated'].items():
+            target = all_semesters_students[int(year)]
+            for sid, *values in rows:
+                target[sid] = dict(zip(GRAD_FIELDS, values), status=GRADUATED_STATUS)
+
+    if duplicates:
+        print(f"  تحذير: {duplicates:,} طالب مكرر في فصل1 لأكثر من جزء في السنة نفسها (اعتُمد آخر جزء)")
+    return sem1_students, all_semesters_students, sorted(sequence), dept_map, excluded
+
+
+def merge_shards(paths, out_dir=DEFAULT_OUT_DIR):
+    """data.csv لكل كلية وللجامعة من ملفات الأجزاء؛ ترجع {المسار: عدد الصفوف}"""
+    shards = [load_shard(p) for p in paths]
+    by_college = defaultdict(list)
+    for shard in shards:
+        by_college[shard['college']].append(shard)
+
+    targets = [(os.path.join(out_dir, COLLEGES_DIR, college), group)
+               for college, group in sorted(by_college.items())]
+    targets.append((os.path.join(out_dir, UNIVERSITY_DIR), shards))
+
+    written = {}
+    for target_dir, group in targets:
+        sem1_students, all_semesters_students, sequence, dept_map, excluded = combine_shards(group)
+        aggregated = aggregate_kpis(sem1_students, all_semesters_students, sequence,
+                                    dept_map, excluded, verbose=False)
+        os.makedirs(target_dir, exist_ok=True)
+        path = os.path.join(target_dir, 'data.csv')
+        written[path] = write_kpi_csv(path, aggregated)
+    return written
+
+
+# ============================================================
+# المعالجة الرئيسية
+# ============================================================
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='استخراج مجزأ لعدة كليات ودمجها')
+    parser.add_argument('--extract', nargs='+', metavar='CONFIG', help='ملفات إعداد الأجزاء (JSON)')
+    parser.add_argument('--merge', nargs='+', metavar='SHARD', help=f'ملفات الأجزاء ({SHARD_SUFFIX})')
+    parser.add_argument('--out', default=DEFAULT_OUT_DIR, help='مجلد المخرجات')
+    args = parser.parse_args(argv)
+    if not args.extract and not args.merge:
+        parser.error('حدد --extract أو --merge')
+
+    if args.extract:
+        for config_path in args.extract:
+            extract_shard(load_config(config_path), args.out)
+    if args.merge:
+        for path, rows in merge_shards(args.merge, args.out).items():
+            print(f"  {path}: {rows} صف")
+
+
+if __name__ == '__main__':
+    main()
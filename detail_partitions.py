@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+نسخ مقسّمة ومفهرسة من graduates_detail.csv وnon_completers.csv حسب (السنة، التخصص)
+
+لكل ملف تفاصيل يُكتب مجلد في data/partitions/ فيه ملف CSV مستقل (بسطر العناوين)
+لكل (سنة، تخصص)، وبجانبه فهرس JSON صغير فيه لكل مقطع: اسم ملفه، وعدد الصفوف،
+والحجم، وبصمة sha256. فيجلب المستهلك (المتصفح أو سكربت) ملف المقطع الذي يحتاجه
+فقط، ويعمل ذلك مع النسخ المضغوطة مسبقًا (.gz/.br) دون الاعتماد على طلبات Range.
+
+مثال:
+    python detail_partitions.py --build
+    python detail_partitions.py --read graduates 47 الأنظمة
+"""
+
+import sys
+import os
+import io
+import csv
+import json
+import argparse
+
+from publish_data import sha256_bytes, write_if_changed
+
+sys.stdout.reconfigure(encoding='utf-8')
+
+# ============================================================
+# الإعدادات
+# ============================================================
+SITE_DATA_DIR = os.path.join("KPI_TaifShare3h-main", "data")
+PARTITIONS_DIR = os.path.join(SITE_DATA_DIR, "partitions")
+INDEX_VERSION = 2
+
+# الاسم → (الملف المصدر، عمود السنة، عمود التخصص)
+DETAIL_SOURCES = {
+    'graduates': ('graduates_detail.csv', 'السنة', 'التخصص'),
+    'non_completers': ('non_completers.csv', 'آخر_سنة', 'التخصص'),
+}
+
+
+def _encode_rows(rows):
+    buf = io.StringIO()
+    csv.writer(buf, delimiter=';').writerows(rows)
+    return buf.getvalue().encode('utf-8')
+
+
+def _year_key(year):
+    return (0, int(year)) if str(year).isdigit() else (1, str(year))
+
+
+def partition_filename(year, program):
+    """اسم ملف المقطع: السنة ثم بصمة قصيرة لاسم التخصص (آمن في الروابط وأنظمة الملفات)"""
+    return f"{year}_{sha256_bytes(program.encode('utf-8'))[:12]}.csv"
+
+
+# ============================================================
+# الكتابة
+# ============================================================
+def write_partitioned(name, site_dir=SITE_DATA_DIR, out_dir=PARTITIONS_DIR):
+    """كتابة <name>/<ملف لكل مقطع> و<name>.index.json؛ ترجع الفهرس (أو None إذا لم يوجد المصدر)"""
+    source, year_col, program_col = DETAIL_SOURCES[name]
+    src_path = os.path.join(site_dir, source)
+    if not os.path.exists(src_path):
+        return None
+
+    with open(src_path, 'r', encoding='utf-8', newline='') as f:
+        reader = csv.reader(f, delimiter=';')
+        header = next(reader, None)
+        if header is None:
+            return None
+        year_idx = header.index(year_col)
+        program_idx = header.index(program_col)
+        # التجميع مع الحفاظ على ترتيب الصفوف داخل كل مقطع
+        groups = {}
+        for row in reader:
+            groups.setdefault((row[year_idx], row[program_idx]), []).append(row)
+
+    part_dir = os.path.join(out_dir, name)
+    os.makedirs(part_dir, exist_ok=True)
+    partitions = []
+    for year, program in sorted(groups, key=lambda k: (_year_key(k[0]), k[1])):
+        rows = groups[(year, program)]
+        data = _encode_rows([header] + rows)
+        fname = partition_filename(year, program)
+        write_if_changed(os.path.join(part_dir, fname), data)
+        partitions.append({
+            'year': year,
+            'program': program,
+            'rows': len(rows),
+            'file': f"{name}/{fname}",
+            'size': len(data),
+            'sha256': sha256_bytes(data),
+        })
+
+    # حذف مقاطع لم تعد موجودة (ونسخها المضغوطة) والملف المجمّع من الصيغة السابقة
+    current = {os.path.basename(p['file']) for p in partitions}
+    for fname in os.listdir(part_dir):
+        if fname.split('.csv')[0] + '.csv' not in current:
+            os.remove(os.path.join(part_dir, fname))
+    legacy = os.path.join(out_dir, f"{name}.csv")
+    if os.path.exists(legacy):
+        os.remove(legacy)
+
+    index = {
+        'version': INDEX_VERSION,
+        'source': source,
+        'columns': header,
+        'key': [year_col, program_col],
+        'rows': sum(p['rows'] for p in partitions),
+        'partitions': partitions,
+    }
+    index_bytes = json.dumps(index, ensure_ascii=False, indent=1).encode('utf-8')
+    write_if_changed(os.path.join(out_dir, f"{name}.index.json"), index_bytes)
+    return index
+
+
+def write_all(site_dir=SITE_DATA_DIR, out_dir=PARTITIONS_DIR):
+    return {name: write_partitioned(name, site_dir, out_dir) for name in DETAIL_SOURCES}
+
+
+# ============================================================
+# القراءة
+# ============================================================
+def load_index(name, out_dir=PARTITIONS_DIR):
+    with open(os.path.join(out_dir, f"{name}.index.json"), 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def read_partition(name, year, program, out_dir=PARTITIONS_DIR, index=None):
+    """صفوف مقطع (سنة، تخصص) كقواميس، بقراءة ملف المقطع وحده والتحقق من بصمته"""
+    index = index or load_index(name, out_dir)
+    entry = next(
+        (p for p in index['partitions'] if p['year'] == str(year) and p['program'] == program),
+        None
+    )
+    if entry is None:
+        return []
+    with open(os.path.join(out_dir, entry['file']), 'rb') as f:
+        data = f.read()
+    if sha256_bytes(data) != entry['sha256']:
+        raise ValueError(f"بصمة المقطع ({year}، {program}) لا تطابق الفهرس")
+    rows = csv.DictReader(io.StringIO(data.decode('utf-8'), newline=''), delimiter=';')
+    return list(rows)
+
+
+# ============================================================
+# المعالجة الرئيسية
+# ============================================================
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='نسخ مقسّمة ومفهرسة لملفات الخريجين وغير المكملين')
+    parser.add_argument('--build', action='store_true', help='إعادة كتابة المقاطع والفهارس')
+    parser.add_argument('--read', nargs=3, metavar=('NAME', 'YEAR', 'PROGRAM'),
+                        help='قراءة مقطع واحد (NAME: graduates أو non_completers)')
+    args = parser.parse_args(argv)
+
+    if args.build:
+        for name, index in write_all().items():
+            if index is None:
+                print(f"  {name}: الملف المصدر غير موجود")
+            else:
+                print(f"  {name}: {index['rows']:,} صف في {len(index['partitions'])} مقطع")
+    if args.read:
+        name, year, program = args.read
+        rows = read_partition(name, year, program)
+        print(f"  {name} ({year}، {program}): {len(rows)} صف")
+        for r in rows[:10]:
+            print('    ' + ' | '.join(r.values()))
+
+
+if __name__ == '__main__':
+    main()
@@ -7,45 +7,71 @@
 import sys
 import os
 import csv
+import mmap
+import time
+import codecs
+import argparse
+from html.parser import HTMLParser
+from datetime import datetime, time as dt_time
 from collections import defaultdict
 from bs4 import BeautifulSoup
 import xlrd
 
+try:
+    import openpyxl
+except ImportError:  # openpyxl مطلوبة فقط لملفات .xlsx
+    openpyxl = None
+
+from teaching_sections import compute_sections
+from faculty_composition import build_faculty_index, composition_columns
+from publish_data import publish, sha256_file
+from detail_partitions import write_all as write_partitioned_details
+from graduate_search import write_index as write_graduate_index, INDEX_PATH as GRADUATE_INDEX_PATH
+from student_bitsets import StudentSets
+from academic_calendar import AcademicCalendar
+
 sys.stdout.reconfigure(encoding='utf-8')
 
 # ============================================================
 # الإعدادات
 # ============================================================
 DATA_DIR = "data"
+# صيغ ملفات الفصول مرتبة من الأسرع قراءة
+SEMESTER_EXTENSIONS = ('.csv', '.xlsx', '.xls')
 OUTPUT_CSV = os.path.join("KPI_TaifShare3h-main", "data", "data.csv")
 EXISTING_CSV = os.path.join("KPI_TaifShare3h-main", "data", "data.csv")
+TEACHING_YEARS_DIR = os.path.join("KPI_TaifShare3h-main", "data", "teaching", "years")
+PLANS_CSV = os.path.join("KPI_TaifShare3h-main", "data", "new_all_plans.csv")
+FACULTY_CSV = os.path.join("KPI_TaifShare3h-main", "data", "faculty.csv")
 
 # تسلسل السنوات (بدون 43 لأنها اندمجت مع 42)
 # نضيف 38 كسنة أساس لحساب مستجدي 39
 YEAR_SEQUENCE = [38, 39, 40, 41, 42, 44, 45, 46, 47]
 
-def get_previous_year(year):
+def get_previous_year(year, sequence=None):
     """الحصول على السنة السابقة في التسلسل"""
+    sequence = sequence or YEAR_SEQUENCE
     try:
-        idx = YEAR_SEQUENCE.index(year)
+        idx = sequence.index(year)
         if idx > 0:
-            return YEAR_SEQUENCE[idx - 1]
+            return sequence[idx - 1]
     except ValueError:
         pass
     return None
 
-def get_year_n_before(year, n):
+def get_year_n_before(year, n, sequence=None):
     """الحصول على السنة قبل n سنوات حقيقية (بالحساب الفعلي وليس بالفهرس)
     مثال: سنة 1446 قبل 4 سنوات = 1442 (وليس 1441)
     لأن 1443 غير موجودة (مدمجة) لكن الفارق الزمني الحقيقي هو 4 سنوات
     إذا وقعت السنة المستهدفة على سنة غير موجودة (مثل 1443)
     نرجع لأقرب سنة متاحة قبلها (1442)
     """
+    sequence = sequence or YEAR_SEQUENCE
     target = year - n
-    if target in YEAR_SEQUENCE:
+    if target in sequence:
         return target
     # سنة 1443 مدمجة → نرجع لأقرب سنة متاحة قبلها
-    candidates = [y for y in YEAR_SEQUENCE if y <= target]
+    candidates = [y for y in sequence if y <= target]
     if candidates:
         return max(candidates)
     return None
@@ -109,17 +135,26 @@ def parse_real_xls(filepath):
     """تحليل ملف XLS حقيقي واستخراج سجلات الطلاب"""
     wb = xlrd.open_workbook(filepath)
     sh = wb.sheet_by_index(0)
+    return parse_sheet_rows(sh.row_values(r) for r in range(sh.nrows))
+
+
+def parse_sheet_rows(rows, gpa_format=None):
+    """استخراج سجلات الطلاب من صفوف ورقة (قوائم قيم) بربط الأعمدة حسب صف الرأس
+    يُستخدم لملفات XLS الحقيقية وXLSX وCSV
+    gpa_format: صيغة المعدل في الخلايا الرقمية (مثل '.2f')؛ None يُبقي str(value) كما في XLS
+    """
     students = []
     current_dept = ''
 
     # تحديد أعمدة الرأس
     col_map = {}  # column_name -> column_index
 
-    for r in range(sh.nrows):
+    for row in rows:
         # قراءة جميع القيم في الصف
         row_vals = {}
-        for c in range(sh.ncols):
-            v = sh.cell_value(r, c)
+        for c, v in enumerate(row):
+            if isinstance(v, datetime):
+                v = v.date().isoformat() if v.time() == dt_time() else v.isoformat(sep=' ')
             if isinstance(v, str):
                 v = v.replace('\xa0', ' ').strip()
             if isinstance(v, float) and v == int(v):
@@ -209,33 +244,189 @@ def parse_real_xls(filepath):
             'gpa': get_val('gpa'),
             'dept': current_dept,
         }
+        gpa_raw = row_vals.get(col_map.get('gpa'))
+        if gpa_format and isinstance(gpa_raw, (int, float)):
+            student['gpa'] = format(gpa_raw, gpa_format)
         students.append(student)
 
     return students
 
 
 # ============================================================
-# استخراج البيانات من ملف HTML/XLS
+# استخراج البيانات من ملفات XLSX وCSV
 # ============================================================
-def parse_html_xls(filepath):
-    """تحليل ملف XLS (HTML) واستخراج سجلات الطلاب"""
+CSV_ENCODINGS = ('utf-8-sig', 'cp1256')
+
+
+def parse_xlsx(filepath):
+    """تحليل ملف XLSX بقراءة الصفوف تدريجيًا (openpyxl read_only)"""
+    if openpyxl is None:
+        raise ImportError("قراءة ملفات .xlsx تتطلب openpyxl")
+    wb = openpyxl.load_workbook(filepath, read_only=True, data_only=True)
+    try:
+        # المعدل في خلية رقمية يُكتب بخانتين كما في تصدير HTML/CSV
+        return parse_sheet_rows(wb.worksheets[0].iter_rows(values_only=True), gpa_format='.2f')
+    finally:
+        wb.close()
+
+
+def parse_csv(filepath):
+    """تحليل ملف CSV (UTF-8 أو cp1256، والفاصل يُكتشف من بداية الملف)"""
+    for encoding in CSV_ENCODINGS:
+        try:
+            with open(filepath, 'r', encoding=encoding, newline='') as f:
+                sample = f.read(64 * 1024)
+                try:
+                    dialect = csv.Sniffer().sniff(sample, delimiters=',;\t')
+                except csv.Error:
+                    dialect = csv.excel
+                f.seek(0)
+                return parse_sheet_rows(csv.reader(f, dialect))
+        except UnicodeDecodeError:
+            continue
+    raise ValueError(f"ترميز غير مدعوم: {filepath}")
+
+
+# ============================================================
+# قراءة صفوف ملف HTML/XLS
+# ============================================================
+# حجم الملف الذي يُقرأ بعده الملف تدريجيًا بدل تحميله كاملًا (مثل التصدير المجمّع لعدة سنوات)
+STREAM_THRESHOLD = 64 * 1024 * 1024
+STREAM_CHUNK = 1024 * 1024
+HTML_ENCODING = 'cp1256'
+
+
+def _html_rows_soup(filepath):
+    """نصوص خلايا كل صف في أول جدول (تحميل الملف كاملًا في BeautifulSoup)
+    الجداول المتداخلة داخل خلاياه تُحذف فلا تدخل صفوفها ولا نصوصها"""
     with open(filepath, 'rb') as f:
         content = f.read()
 
-    text = content.decode('cp1256')
+    text = content.decode(HTML_ENCODING)
     soup = BeautifulSoup(text, 'html.parser')
     tables = soup.find_all('table')
 
     if not tables:
-        return []
+        return
+
+    for nested in tables[0].find_all('table'):
+        nested.decompose()
+    for row in tables[0].find_all('tr'):
+        cells = row.find_all(['td', 'th'])
+        yield [c.get_text(strip=True) for c in cells]
+
+
+class _TableRowParser(HTMLParser):
+    """محلل تدريجي يجمع نصوص خلايا صفوف أول جدول فقط
+
+    نفس ناتج get_text(strip=True): أجزاء النص داخل الخلية تُقص وتُضم دون فاصل.
+    ما داخل الجداول المتداخلة (العمق > 1) يُتجاهل كما في _html_rows_soup.
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.rows = []          # الصفوف المكتملة منذ آخر سحب
+        self._table_depth = 0
+        self.done = False      # انتهى أول جدول
+        self._row = None
+        self._cell = None
+        self._text = []
+
+    def handle_starttag(self, tag, attrs):
+        if self.done:
+            return
+        self._flush_text()
+        if tag == 'table':
+            self._table_depth += 1
+        elif self._table_depth != 1:
+            return
+        elif tag == 'tr':
+            self.end_row()
+            self._row = []
+        elif tag in ('td', 'th') and self._row is not None:
+            self._end_cell()
+            self._cell = []
+
+    def handle_endtag(self, tag):
+        if self.done or not self._table_depth:
+            return
+        self._flush_text()
+        if tag == 'table':
+            self._table_depth -= 1
+            if not self._table_depth:
+                self.end_row()
+                self.done = True
+        elif self._table_depth != 1:
+            return
+        elif tag in ('td', 'th'):
+            self._end_cell()
+        elif tag == 'tr':
+            self.end_row()
+
+    def handle_data(self, data):
+        # قد يصل النص الواحد على عدة دفعات عند حدود القطع؛ يُقص بعد اكتماله
+        if self._cell is not None and self._table_depth == 1:
+            self._text.append(data)
+
+    def _flush_text(self):
+        if self._text:
+            piece = ''.join(self._text).strip()
+            if piece:
+                self._cell.append(piece)
+            self._text = []
+
+    def _end_cell(self):
+        if self._cell is not None:
+            self._flush_text()
+            self._row.append(''.join(self._cell))
+            self._cell = None
+
+    def end_row(self):
+        if self._row is not None:
+            self._end_cell()
+            self.rows.append(self._row)
+            self._row = None
+
+
+def _html_rows_stream(filepath, chunk_size=STREAM_CHUNK):
+    """نصوص خلايا صفوف أول جدول بقراءة تدريجية: الملف مُعيَّن في الذاكرة (mmap)
+    ويُفك ترميزه على دفعات، فلا يُحتفظ إلا بنافذة صغيرة من النص والصفوف"""
+    if os.path.getsize(filepath) == 0:
+        return
+    decoder = codecs.getincrementaldecoder(HTML_ENCODING)()
+    parser = _TableRowParser()
+    with open(filepath, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        for start in range(0, len(mm), chunk_size):
+            parser.feed(decoder.decode(mm[start:start + chunk_size]))
+            yield from parser.rows
+            parser.rows.clear()
+            if parser.done:
+                break
+        else:
+            parser.feed(decoder.decode(b'', final=True))
+            parser.close()
+            parser.end_row()
+            yield from parser.rows
+
+
+# ============================================================
+# استخراج البيانات من ملف HTML/XLS
+# ============================================================
+def parse_html_xls(filepath, stream=None):
+    """تحليل ملف XLS (HTML) واستخراج سجلات الطلاب
+
+    stream: قراءة تدريجية (True) أو تحميل كامل في BeautifulSoup (False)؛
+    الافتراضي None يختار التدريجية للملفات الأكبر من STREAM_THRESHOLD.
+    """
+    if stream is None:
+        stream = os.path.getsize(filepath) > STREAM_THRESHOLD
+    rows = _html_rows_stream(filepath) if stream else _html_rows_soup(filepath)
 
-    rows = tables[0].find_all('tr')
     students = []
     current_dept = ''
 
-    for row in rows:
-        cells = row.find_all(['td', 'th'])
-        cell_texts = [c.get_text(strip=True).replace('\xa0', ' ').strip() for c in cells]
+    for texts in rows:
+        cell_texts = [t.replace('\xa0', ' ').strip() for t in texts]
         non_empty = [t for t in cell_texts if t]
 
         if not non_empty:
@@ -335,110 +526,475 @@ def parse_html_xls(filepath):
 
 
 # ============================================================
-# المعالجة الرئيسية
+# قائمة ملفات الفصول
 # ============================================================
-def main():
-    print("=" * 70)
-    print("بدء استخراج البيانات من ملفات Excel")
-    print("المنهجية: إجمالي الطلاب = منتظم فقط من الفصل الأول")
-    print("         الخريجين = متخرج من أي فصل في السنة")
-    print("=" * 70)
-
-    # 1. قراءة جميع الملفات وتنظيمها حسب السنة والفصل
-    all_files = sorted([f for f in os.listdir(DATA_DIR) if f.endswith('.xls')])
+def list_semester_files(data_dir=DATA_DIR):
+    """ملفات الفصول مجمعة حسب السنة: {year: [(fname, semester)]}
+    اسم الملف: رقمان للسنة ثم رقم الفصل (مثال 461.xls أو 461.xlsx أو 461.csv)
+    """
+    # إذا وُجد الفصل بأكثر من صيغة يُؤخذ الأسرع قراءة (ترتيب SEMESTER_EXTENSIONS)
+    chosen = {}
+    for fname in sorted(os.listdir(data_dir)):
+        num, ext = os.path.splitext(fname)
+        if ext not in SEMESTER_EXTENSIONS or not (len(num) == 3 and num.isdigit()):
+            continue
+        key = (int(num[:2]), int(num[2]))
+        prev = chosen.get(key)
+        if prev is None or SEMESTER_EXTENSIONS.index(ext) < SEMESTER_EXTENSIONS.index(os.path.splitext(prev)[1]):
+            chosen[key] = fname
 
     year_files = defaultdict(list)
-    for fname in all_files:
-        num = fname.replace('.xls', '')
-        year = int(num[:2])
-        semester = int(num[2])
+    for (year, semester), fname in sorted(chosen.items()):
         year_files[year].append((fname, semester))
+    return year_files
 
-    print(f"\nالسنوات المتاحة: {sorted(year_files.keys())}")
-    for year in sorted(year_files.keys()):
-        files = year_files[year]
-        print(f"  سنة {year} (14{year:02d}): {[f[0] for f in files]}")
 
-    # 2. استخراج الطلاب لكل ملف حسب الفصل
-    # sem1_students[year] = {student_id: student_record}  ← الفصل الأول فقط
-    # all_semesters_students[year] = {student_id: student_record}  ← كل الفصول (للخريجين)
-    sem1_students = defaultdict(dict)
-    all_semesters_students = defaultdict(dict)
+def parse_semester_file(filepath, stream=None):
+    """تحليل ملف فصل حسب نوعه (CSV أو XLSX أو XLS حقيقي أو HTML)"""
+    ext = os.path.splitext(filepath)[1].lower()
+    if ext == '.csv':
+        return parse_csv(filepath)
+    if ext == '.xlsx':
+        return parse_xlsx(filepath)
+    if is_real_xls(filepath):
+        return parse_real_xls(filepath)
+    return parse_html_xls(filepath, stream=stream)
 
-    total_records = 0
-    for year in sorted(year_files.keys()):
-        for fname, semester in sorted(year_files[year], key=lambda x: x[1]):
-            filepath = os.path.join(DATA_DIR, fname)
-            print(f"\n  معالجة {fname}...", end=' ')
-            if is_real_xls(filepath):
-                students = parse_real_xls(filepath)
+
+# ============================================================
+# ملف التصحيحات (يُطبق على السجلات المحللة قبل التجميع)
+# ============================================================
+CORRECTIONS_PATH = os.path.join(DATA_DIR, "corrections.csv")
+# سجل التدقيق في مجلد فرعي حتى لا يطابق مدخلات مرحلة الاستخراج (data/*.csv في run_pipeline)
+CORRECTIONS_AUDIT = os.path.join(DATA_DIR, "audit", "corrections_audit.csv")
+CORRECTION_COLUMNS = ['student_id', 'year', 'semester', 'field', 'value', 'note']
+CORRECTABLE_FIELDS = (
+    'name', 'program', 'status', 'gender', 'age', 'nationality', 'degree',
+    'study_type', 'admission_date', 'expected_grad', 'grad_date', 'gpa', 'dept',
+)
+AUDIT_COLUMNS = ['student_id', 'year', 'semester', 'field', 'old_value', 'new_value', 'note', 'result']
+
+
+def load_corrections(path=CORRECTIONS_PATH):
+    """{(year, semester): {student_id: [(field, value, note)]}} من ملف التصحيحات
+    كل صف تصحيح حقل واحد: student_id;year;semester;field;value;note
+    """
+    corrections = defaultdict(lambda: defaultdict(list))
+    if not os.path.exists(path):
+        return corrections
+    with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+        for line_no, row in enumerate(csv.DictReader(f, delimiter=';'), start=2):
+            try:
+                year, semester = int(row['year']), int(row['semester'])
+            except (TypeError, ValueError):
+                raise ValueError(f"{path}:{line_no}: السنة والفصل يجب أن يكونا أرقامًا")
+            # السنة بأربعة أرقام (1446) أو برقمين (46) كما في أسماء ملفات الفصول
+            key = (year % 100 if year >= 1400 else year, semester)
+            if row['field'] not in CORRECTABLE_FIELDS:
+                raise ValueError(f"{path}:{line_no}: حقل غير معروف: {row['field']}")
+            corrections[key][row['student_id'].strip()].append(
+                (row['field'], (row.get('value') or '').strip(), row.get('note') or '')
+            )
+    return corrections
+
+
+def _kpi_row_key(year, s):
+    return (year, s['program'], DEGREE_MAP.get(s['degree'], s['degree']))
+
+
+def apply_corrections(students, year, semester, corrections, audit, affected):
+    """نسخة من سجلات الفصل بعد تطبيق تصحيحاته (السجلات الأصلية لا تُعدّل، فتبقى صالحة للذاكرة المؤقتة)
+    audit: قائمة يُضاف إليها صف لكل تصحيح، affected: مجموعة (السنة، التخصص، الدرجة) المتأثرة
+    """
+    pending = corrections.get((year, semester))
+    if not pending:
+        return students
+    result = []
+    found = set()
+    for s in students:
+        fixes = pending.get(s['student_id'])
+        if fixes:
+            found.add(s['student_id'])
+            affected.add(_kpi_row_key(year, s))
+            s = dict(s)
+            for field, value, note in fixes:
+                audit.append([s['student_id'], year, semester, field, s[field], value, note,
+                              'unchanged' if s[field] == value else 'applied'])
+                s[field] = value
+            affected.add(_kpi_row_key(year, s))
+        result.append(s)
+    for sid in pending.keys() - found:
+        for field, value, note in pending[sid]:
+            audit.append([sid, year, semester, field, '', value, note, 'student not found'])
+    return result
+
+
+def audit_missing_files(corrections, parsed, audit):
+    """صفوف تدقيق للتصحيحات التي لا يوجد ملف فصل لسنتها وفصلها
+    parsed: مجموعة (السنة، الفصل) المحللة
+    """
+    for year, semester in sorted(corrections.keys() - parsed):
+        for sid, fixes in corrections[(year, semester)].items():
+            for field, value, note in fixes:
+                audit.append([sid, year, semester, field, '', value, note, 'file not found'])
+
+
+def affected_kpi_rows(corrected_rows, aggregated, sequence=None):
+    """صفوف data.csv التي قد يغيّرها تصحيح في (السنة، التخصص، الدرجة):
+    السنة نفسها، والسنة التالية (المستجدون والمستمرون والتحويل)، وسنوات التخرج بالوقت
+    التي تقع دفعتها أو سنوات تخرجها على سنة التصحيح
+    """
+    sequence = sequence or YEAR_SEQUENCE
+    rows = set()
+    for d in aggregated.values():
+        year, prog, degree = d['semester'], d['prog'], d['degree']
+        first_cohort = get_year_n_before(year, DEGREE_YEARS.get(degree, 4), sequence)
+        prev_year = get_previous_year(year, sequence)
+        for c_year, c_prog, c_degree in corrected_rows:
+            if (c_prog, c_degree) != (prog, degree) or c_year > year:
+                continue
+            if c_year == year or c_year == prev_year or (first_cohort and c_year >= first_cohort):
+                rows.add((year, prog, degree))
+                break
+    return sorted(rows)
+
+
+def write_corrections_audit(audit, path=CORRECTIONS_AUDIT):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f, delimiter=';')
+        writer.writerow(AUDIT_COLUMNS)
+        writer.writerows(audit)
+
+
+# ============================================================
+# تتبع حالات الطلاب عبر السنوات (مرور واحد)
+# ============================================================
+def _detail_record(year, sid, s, prog, degree):
+    return {
+        'year': year,
+        'student_id': sid,
+        'name': s['name'],
+        'program': prog,
+        'degree': degree,
+        'dept': DEPT_MAP.get(prog, prog),
+        'gender': s['gender'],
+        'nationality': s['nationality'],
+        'admission_date': s.get('admission_date', ''),
+        'gpa': s.get('gpa', ''),
+    }
+
+
+# حقول التواريخ في سجل الخريج بترتيب أعمدتها (يوم_… ثم فصل_…)
+GRADUATE_DATE_FIELDS = ('admission_date', 'grad_date', 'expected_grad')
+
+
+def _calendar_values(rec, fields, suffix):
+    """أرقام الأيام أو الفصول لحقول التواريخ (فارغ للتاريخ غير الصالح)"""
+    return ['' if rec[f + suffix] is None else rec[f + suffix] for f in fields]
+
+
+def track_student_statuses(all_semesters_students):
+    """مرور واحد على سجلات السنوات بالترتيب مع حالة لكل (طالب، تخصص، درجة)
+
+    الحالة: آخر حالة وسنتها، أول سنة تخرج، آخر سجل غير مكتمل.
+    ترجع: الخريجين (سجل لكل سنة تخرج)، غير المكملين (آخر سجل لمن لم يتخرج
+    لاحقًا في البرنامج نفسه)، توزيع الحالات {(السنة، الحالة): العدد}،
+    وجميع الحالات. السنة 38 (سنة الأساس) تُحتسب للتخرج فقط.
+    """
+    states = {}          # (sid, prog, degree) → الحالة
+    non_completers = {}  # (sid, prog, degree) → آخر سجل غير مكتمل (بترتيب أول ظهور)
+    graduates = []
+    histogram = defaultdict(int)
+
+    for year in sorted(all_semesters_students.keys()):
+        in_scope = year in YEAR_SEQUENCE and year != 38
+        for sid, s in all_semesters_students[year].items():
+            status = s['status']
+            prog = s['program']
+            degree = DEGREE_MAP.get(s['degree'], s['degree'])
+            key = (sid, prog, degree)
+
+            st = states.get(key)
+            if st is None:
+                st = states[key] = {'status': '', 'last_year': None, 'first_grad_year': None}
+            st['status'] = status
+            st['last_year'] = year
+            if status == GRADUATED_STATUS and st['first_grad_year'] is None:
+                st['first_grad_year'] = year
+
+            if not in_scope:
+                continue
+            histogram[(year, status)] += 1
+            if prog in EXCLUDED_PROGRAMS or status == ENROLLED_STATUS:
+                continue
+
+            if status == GRADUATED_STATUS:
+                rec = _detail_record(year, sid, s, prog, degree)
+                rec['grad_date'] = s.get('grad_date', '')
+                rec['expected_grad'] = s.get('expected_grad', '')
+                graduates.append(rec)
             else:
-                students = parse_html_xls(filepath)
-            print(f"{len(students)} سجل")
-            total_records += len(students)
+                rec = _detail_record(year, sid, s, prog, degree)
+                rec['status'] = status
+                rec['study_type'] = s.get('study_type', '')
+                non_completers[key] = rec
 
-            for s in students:
-                sid = s['student_id']
+    non_completers_list = [
+        rec for key, rec in non_completers.items()
+        if states[key]['first_grad_year'] is None
+    ]
+    all_statuses = {status for (_, status) in histogram}
+    return graduates, non_completers_list, dict(histogram), all_statuses
 
-                # الفصل الأول فقط: لحساب إجمالي الطلاب
-                if semester == 1:
-                    sem1_students[year][sid] = s
 
-                # كل الفصول: لتتبع حالة التخرج
-                # إذا تخرج في أي فصل، نسجّل ذلك
-                existing = all_semesters_students[year].get(sid)
-                if existing:
-                    if s['status'] == GRADUATED_STATUS:
-                        all_semesters_students[year][sid] = s
-                else:
-                    all_semesters_students[year][sid] = s
+# ============================================================
+# تدفق الطلاب بين السنوات المتتالية
+# ============================================================
+# الحالة في السنة التالية لمن لم يظهر في أي فصل منها
+ABSENT_STATUS = 'غائب'
 
-    print(f"\n{'='*70}")
-    print(f"إجمالي السجلات المقروءة: {total_records:,}")
-    print(f"{'='*70}")
+FLOW_COLUMNS = [
+    'Dept_aName', 'Major_aName', 'Degree_aName', 'from_year', 'to_year',
+    'from_status', 'to_status', 'to_major', 'to_degree', 'count',
+]
 
-    # 3. طباعة ملخص
+
+def _valid_degree(raw):
+    degree = DEGREE_MAP.get(raw, raw)
+    if not degree or (degree == raw and degree not in DEGREE_MAP.values()):
+        return None
+    return degree
+
+
+def student_transitions(all_semesters_students):
+    """مصفوفة الانتقال لكل (تخصص، درجة) وزوج سنوات متتالي في YEAR_SEQUENCE
+
+    المفتاح: (تخصص، درجة، من سنة، إلى سنة، الحالة، الحالة التالية، التخصص التالي، الدرجة التالية)
+    والقيمة عدد الطلاب. الحالة السنوية كما في all_semesters_students (متخرج إن تخرج في
+    أي فصل)، ومن لم يظهر في السنة التالية حالته ABSENT_STATUS بلا تخصص.
+    """
+    # خط زمني لكل طالب: {السنة: (الحالة، التخصص، الدرجة)} في مرور واحد على السجلات
+    timelines = defaultdict(dict)
+    for year, students in all_semesters_students.items():
+        if year not in YEAR_SEQUENCE:
+            continue
+        for sid, s in students.items():
+            degree = _valid_degree(s['degree'])
+            if degree:
+                timelines[sid][year] = (s['status'], s['program'], degree)
+
+    pairs = [
+        (y0, y1) for y0, y1 in zip(YEAR_SEQUENCE, YEAR_SEQUENCE[1:])
+        if y0 in all_semesters_students and y1 in all_semesters_students
+    ]
+    flows = defaultdict(int)
+    for timeline in timelines.values():
+        for y0, y1 in pairs:
+            src = timeline.get(y0)
+            if src is None or src[1] in EXCLUDED_PROGRAMS:
+                continue
+            dst = timeline.get(y1, (ABSENT_STATUS, '', ''))
+            flows[(src[1], src[2], y0, y1, src[0], dst[0], dst[1], dst[2])] += 1
+    return dict(flows)
+
+
+def detect_transfers(sem1_students, sequence=None):
+    """التحويل الداخلي بين البرامج: ربط (hash join) فصل1 لسنتين متتاليتين بالرقم الجامعي
+
+    المحوَّل: ظهر في فصل1 للسنة السابقة في برنامج (بأي حالة)، وهو منتظم في فصل1
+    للسنة الحالية في برنامج آخر بالدرجة نفسها.
+    ترجع {السنة: [(sid, البرنامج السابق، البرنامج الحالي، الدرجة)]}.
+    """
+    sequence = sequence or YEAR_SEQUENCE
+    transfers = {}
+    for y0, y1 in zip(sequence, sequence[1:]):
+        if y0 not in sem1_students or y1 not in sem1_students:
+            continue
+        # جانب البناء: السنة السابقة
+        prev = {
+            sid: (s['program'], _valid_degree(s['degree']))
+            for sid, s in sem1_students[y0].items()
+        }
+        # جانب الفحص: منتظمو السنة الحالية
+        moved = []
+        for sid, s in sem1_students[y1].items():
+            if s['status'] != ENROLLED_STATUS:
+                continue
+            src = prev.get(sid)
+            if src is None:
+                continue
+            degree = _valid_degree(s['degree'])
+            if degree and src[1] == degree and src[0] != s['program']:
+                moved.append((sid, src[0], s['program'], degree))
+        transfers[y1] = moved
+    return transfers
+
+
+# ============================================================
+# توزيع المعدلات (GPA)
+# ============================================================
+# فئات ثابتة بعرض 0.5 على مقياس 5؛ المعدل الأعلى من 5 يدخل في الفئة الأخيرة
+GPA_MAX = 5.0
+GPA_BIN_WIDTH = 0.5
+GPA_BINS = int(GPA_MAX / GPA_BIN_WIDTH)
+GPA_QUANTILES = (10, 25, 50, 75, 90)
+GPA_POPULATIONS = ('enrolled', 'graduates', 'non_completers')
+
+GPA_COLUMNS = (
+    ['Dept_aName', 'Major_aName', 'Degree_aName', 'Semester', 'population', 'count']
+    + [f"bin_{i * GPA_BIN_WIDTH:.1f}_{(i + 1) * GPA_BIN_WIDTH:.1f}" for i in range(GPA_BINS)]
+    + [f"p{q}" for q in GPA_QUANTILES]
+)
+
+
+def parse_gpa(value):
+    """المعدل كرقم (يقبل الفاصلة العشرية كما في analyticsParseGPA في js/app.js)"""
+    try:
+        gpa = float(str(value or '').strip().replace(',', '.'))
+    except ValueError:
+        return None
+    return gpa if gpa >= 0 else None
+
+
+def _quantile(sorted_values, q):
+    """تقسيم خطي بين أقرب قيمتين (مثل numpy.percentile الافتراضي)"""
+    pos = (len(sorted_values) - 1) * q / 100
+    lo = int(pos)
+    hi = min(lo + 1, len(sorted_values) - 1)
+    return round(sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (pos - lo), 2)
+
+
+def gpa_distributions(sem1_students, graduates_list, non_completers_list):
+    """{(تخصص، درجة، سنة، الفئة): {'count', 'bins', 'quantiles'}}
+
+    الفئات: المنتظمون في فصل1 (نفس مجتمع students_total)، الخريجون حسب سنة التخرج،
+    وغير المكملين حسب آخر سنة ظهور.
+    """
+    values = defaultdict(list)
+    for year, students in sem1_students.items():
+        if year not in YEAR_SEQUENCE:
+            continue
+        for s in students.values():
+            degree = _valid_degree(s['degree'])
+            if not degree or s['status'] != ENROLLED_STATUS or s['program'] in EXCLUDED_PROGRAMS:
+                continue
+            values[(s['program'], degree, year, 'enrolled')].append(s['gpa'])
+    for population, records in (('graduates', graduates_list), ('non_completers', non_completers_list)):
+        for r in records:
+            values[(r['program'], r['degree'], r['year'], population)].append(r['gpa'])
+
+    distributions = {}
+    for key, raw in values.items():
+        gpas = sorted(g for g in map(parse_gpa, raw) if g is not None)
+        if not gpas:
+            continue
+        bins = [0] * GPA_BINS
+        for g in gpas:
+            bins[min(int(g / GPA_BIN_WIDTH), GPA_BINS - 1)] += 1
+        distributions[key] = {
+            'count': len(gpas),
+            'bins': bins,
+            'quantiles': [_quantile(gpas, q) for q in GPA_QUANTILES],
+        }
+    return distributions
+
+
+# ============================================================
+# تجميع المؤشرات حسب (سنة، تخصص، درجة)
+# ============================================================
+def add_semester_records(sem1_students, all_semesters_students, year, semester, students):
+    """إضافة سجلات ملف فصل: الفصل الأول للإجمالي، وكل الفصول لتتبع التخرج (المتخرج في أي فصل يُعتمد)"""
+    for s in students:
+        sid = s['student_id']
+
+        # الفصل الأول فقط: لحساب إجمالي الطلاب
+        if semester == 1:
+            sem1_students[year][sid] = s
+
+        # كل الفصول: لتتبع حالة التخرج
+        # إذا تخرج في أي فصل، نسجّل ذلك
+        existing = all_semesters_students[year].get(sid)
+        if existing:
+            if s['status'] == GRADUATED_STATUS:
+                all_semesters_students[year][sid] = s
+        else:
+            all_semesters_students[year][sid] = s
+
+
+def aggregate_kpis(sem1_students, all_semesters_students, year_sequence=None, dept_map=None,
+                   excluded_programs=None, verbose=True):
+    """صفوف data.csv الأساسية: {"قسم|تخصص|درجة|سنة": {...}}
+    السجلات تحتاج فقط: program, degree, status, gender, nationality
+    (ولذلك يمكن حسابها من مجموعات الدفعات المدمجة من عدة كليات دون الملفات الأصلية)
+    """
+    sequence = year_sequence or YEAR_SEQUENCE
+    dept_map = DEPT_MAP if dept_map is None else dept_map
+    excluded_programs = EXCLUDED_PROGRAMS if excluded_programs is None else excluded_programs
+
+    # مجموعات الطلاب كـ bitsets على قاموس أرقام صحيحة واحد
+    # sem1_all[year]: كل طلاب فصل1 (بأي حالة) | sem1_enrolled[year]: المنتظمون فيه
+    # graduated_sets[year]: المتخرجون في أي فصل | program_sem1[year][(تخصص، درجة)]: طلاب البرنامج في فصل1
+    sets = StudentSets()
+    sem1_all = {}
+    sem1_enrolled = {}
+    program_sem1 = {}
     for year in sorted(sem1_students.keys()):
         s1 = sem1_students[year]
-        enrolled = sum(1 for s in s1.values() if s['status'] == ENROLLED_STATUS)
-        all_s = all_semesters_students[year]
-        graduated = sum(1 for s in all_s.values() if s['status'] == GRADUATED_STATUS)
-        print(f"\n  سنة {year} (14{year:02d}): فصل1={len(s1):,} | منتظم={enrolled:,} | متخرج(كل الفصول)={graduated:,}")
-
-    # 4. حساب المستجدين: منتظم في فصل1 للسنة الحالية ولم يكن في فصل1 للسنة السابقة
-    # new_students[year] = set of student_ids (منتظم في الفصل الأول وجديد)
+        sem1_all[year] = sets.of(s1)
+        sem1_enrolled[year] = sets.of(sid for sid, s in s1.items() if s['status'] == ENROLLED_STATUS)
+        by_program = defaultdict(list)
+        for sid, s in s1.items():
+            by_program[(s['program'], DEGREE_MAP.get(s['degree'], s['degree']))].append(sid)
+        program_sem1[year] = {k: sets.of(ids) for k, ids in by_program.items()}
+
+    graduated_sets = {
+        year: sets.of(sid for sid, s in all_s.items() if s['status'] == GRADUATED_STATUS)
+        for year, all_s in all_semesters_students.items()
+    }
+
+    def program_mask(year, prog, degree):
+        return program_sem1.get(year, {}).get((prog, degree)) or sets.empty()
+
+    # حساب المستجدين: منتظم في فصل1 للسنة الحالية ولم يكن في فصل1 للسنة السابقة (بأي حالة)
     new_students = {}
-    for year in YEAR_SEQUENCE:
+    for year in sequence:
         if year not in sem1_students:
             continue
 
-        # أرقام المنتظمين فقط في الفصل الأول
-        current_enrolled_ids = set(
-            sid for sid, s in sem1_students[year].items()
-            if s['status'] == ENROLLED_STATUS
-        )
-
-        prev_year = get_previous_year(year)
+        prev_year = get_previous_year(year, sequence)
         if prev_year and prev_year in sem1_students:
-            # أرقام كل الطلاب في الفصل الأول للسنة السابقة (بأي حالة)
-            prev_all_ids = set(sem1_students[prev_year].keys())
-            new_students[year] = current_enrolled_ids - prev_all_ids
+            new_students[year] = sem1_enrolled[year] - sem1_all[prev_year]
         else:
-            new_students[year] = set()
+            new_students[year] = sets.empty()
 
-        if new_students[year]:
+        if new_students[year] and verbose:
             print(f"\n  المستجدون سنة {year}: {len(new_students[year]):,}")
 
-    # 5. تجميع البيانات حسب (سنة، تخصص، درجة)
-    print(f"\n{'='*70}")
-    print("تجميع البيانات...")
-    print(f"{'='*70}")
+    # التحويل الداخلي بين البرامج (يُحتسب وارد/صادر، ويُستبعد المحوَّل من مقام الاستبقاء المعدّل)
+    transfers = detect_transfers(sem1_students, sequence)
+    transfers_in = defaultdict(int)
+    transfers_out = defaultdict(list)
+    for year, moved in transfers.items():
+        for sid, from_prog, to_prog, degree in moved:
+            transfers_in[(to_prog, degree, year)] += 1
+            transfers_out[(from_prog, degree, year)].append(sid)
+        if moved and verbose:
+            print(f"\n  التحويل بين البرامج سنة {year}: {len(moved):,}")
+    transfers_out = {k: sets.of(ids) for k, ids in transfers_out.items()}
+
+    # التجميع حسب (سنة، تخصص، درجة)
+    if verbose:
+        print(f"\n{'='*70}")
+        print("تجميع البيانات...")
+        print(f"{'='*70}")
 
     aggregated = {}
 
     for year in sorted(sem1_students.keys()):
-        if year not in YEAR_SEQUENCE:
-            print(f"  تحذير: سنة {year} ليست في التسلسل المعروف")
+        if year not in sequence:
+            if verbose:
+                print(f"  تحذير: سنة {year} ليست في التسلسل المعروف")
             continue
 
         # ── جمع "المنتظمين" من الفصل الأول حسب (تخصص، درجة) ──
@@ -465,9 +1021,9 @@ def main():
 
         for (prog, degree) in all_keys:
             # استبعاد البرامج القديمة/الملغاة
-            if prog in EXCLUDED_PROGRAMS:
+            if prog in excluded_programs:
                 continue
-            dept = DEPT_MAP.get(prog, prog)
+            dept = dept_map.get(prog, prog)
             key = f"{dept}|{prog}|{degree}|{year}"
 
             # المنتظمون من الفصل الأول فقط
@@ -485,72 +1041,45 @@ def main():
             graduates_total = len(graduated)
 
             # المستجدون: منتظم في فصل1 وجديد
+            enrolled_mask = program_mask(year, prog, degree) & sem1_enrolled[year]
             prog_new = 0
             if year in new_students:
-                enrolled_ids = set(s['student_id'] for s in enrolled)
-                prog_new = len(enrolled_ids & new_students[year])
+                prog_new = len(enrolled_mask & new_students[year])
 
-            # الاستبقاء: مستجدو السنة السابقة الذين لا يزالون منتظمين في فصل1 الحالي
+            # الاستبقاء: مستجدو السنة السابقة في البرنامج الذين لا يزالون منتظمين فيه في فصل1 الحالي
+            # prev_new_count: عدد مستجدي السنة السابقة في هذا البرنامج (مقام نسبة الاستبقاء)
             students_retained = 0
-            prev_year = get_previous_year(year)
+            prev_new_count = 0
+            prev_year = get_previous_year(year, sequence)
             if prev_year and prev_year in new_students:
-                current_enrolled_ids = set(s['student_id'] for s in enrolled)
-                for sid in new_students[prev_year]:
-                    if sid in sem1_students[prev_year]:
-                        prev_s = sem1_students[prev_year][sid]
-                        prev_prog = prev_s['program']
-                        prev_degree = DEGREE_MAP.get(prev_s['degree'], prev_s['degree'])
-                        if prev_prog == prog and prev_degree == degree:
-                            if sid in current_enrolled_ids:
-                                students_retained += 1
+                prev_cohort = new_students[prev_year] & program_mask(prev_year, prog, degree)
+                prev_new_count = len(prev_cohort)
+                students_retained = len(prev_cohort & enrolled_mask)
+
+            # الاستبقاء المعدّل: المحوَّلون من الدفعة إلى برنامج آخر لا يُعدّون فاقدًا
+            retention_adjusted = ''
+            if prev_new_count:
+                moved_out = transfers_out.get((prog, degree, year))
+                denominator = prev_new_count - (len(prev_cohort & moved_out) if moved_out else 0)
+                if denominator > 0:
+                    retention_adjusted = round(students_retained / denominator * 100, 1)
 
             # التخرج بالوقت المحدد حسب الدرجة العلمية:
             # بكالوريوس = 4 سنوات، ماجستير = سنتين، دكتوراه = 3 سنوات
+            # مستجدو n سنوات سابقة في البرنامج الذين تخرجوا في أي فصل خلال المدة
             graduates_ontime = 0
-            n_years = DEGREE_YEARS.get(degree, 4)
-            year_n_ago = get_year_n_before(year, n_years)
-            if year_n_ago and year_n_ago in new_students:
-                for sid in new_students[year_n_ago]:
-                    if sid in sem1_students[year_n_ago]:
-                        old_s = sem1_students[year_n_ago][sid]
-                        old_prog = old_s['program']
-                        old_degree = DEGREE_MAP.get(old_s['degree'], old_s['degree'])
-                        if old_prog == prog and old_degree == degree:
-                            # البحث عن التخرج في أي فصل خلال المدة المحددة
-                            found_graduated = False
-                            idx_start = YEAR_SEQUENCE.index(year_n_ago) + 1
-                            idx_end = YEAR_SEQUENCE.index(year) + 1
-                            for check_idx in range(idx_start, idx_end):
-                                check_year = YEAR_SEQUENCE[check_idx]
-                                if check_year in all_semesters_students:
-                                    check_s = all_semesters_students[check_year].get(sid)
-                                    if check_s and check_s['status'] == GRADUATED_STATUS:
-                                        found_graduated = True
-                                        break
-                            if found_graduated:
-                                graduates_ontime += 1
-
-            # عدد مستجدي n سنوات سابقة في هذا البرنامج (مقام نسبة التخرج بالوقت)
             new_n_ago_count = 0
+            n_years = DEGREE_YEARS.get(degree, 4)
+            year_n_ago = get_year_n_before(year, n_years, sequence)
             if year_n_ago and year_n_ago in new_students:
-                for sid in new_students[year_n_ago]:
-                    if sid in sem1_students[year_n_ago]:
-                        old_s = sem1_students[year_n_ago][sid]
-                        old_prog = old_s['program']
-                        old_degree = DEGREE_MAP.get(old_s['degree'], old_s['degree'])
-                        if old_prog == prog and old_degree == degree:
-                            new_n_ago_count += 1
-
-            # عدد مستجدي السنة السابقة في هذا البرنامج (مقام نسبة الاستبقاء)
-            prev_new_count = 0
-            if prev_year and prev_year in new_students:
-                for sid in new_students[prev_year]:
-                    if sid in sem1_students[prev_year]:
-                        prev_s = sem1_students[prev_year][sid]
-                        prev_prog = prev_s['program']
-                        prev_degree = DEGREE_MAP.get(prev_s['degree'], prev_s['degree'])
-                        if prev_prog == prog and prev_degree == degree:
-                            prev_new_count += 1
+                cohort = new_students[year_n_ago] & program_mask(year_n_ago, prog, degree)
+                new_n_ago_count = len(cohort)
+                idx_start = sequence.index(year_n_ago) + 1
+                idx_end = sequence.index(year) + 1
+                graduated_since = sets.union(
+                    graduated_sets[y] for y in sequence[idx_start:idx_end] if y in graduated_sets
+                )
+                graduates_ontime = len(cohort & graduated_since)
 
             aggregated[key] = {
                 'dept': dept,
@@ -568,8 +1097,181 @@ def main():
                 'graduates_ontime': graduates_ontime,
                 'prev_new_count': prev_new_count,
                 'new_4_ago_count': new_n_ago_count,
+                'transfers_in': transfers_in.get((prog, degree, year), 0),
+                'transfers_out': len(transfers_out.get((prog, degree, year)) or ()),
+                'retention_transfer_adjusted': retention_adjusted,
             }
 
+    return aggregated
+
+
+# ============================================================
+# كتابة data.csv
+# ============================================================
+# الأعمدة الجديدة تُضاف في النهاية (الموقع يقرأ الأعمدة بالاسم)
+KPI_CSV_HEADERS = [
+    'Dept_aName', 'Major_aName', 'Degree_aName', 'Semester',
+    'students_total', 'students_male', 'students_female',
+    'students_saudi', 'students_international',
+    'students_new', 'students_retained',
+    'graduates_total', 'graduates_ontime',
+    'prev_new_count', 'new_4_ago_count',
+    'sections_total', 'sections_male', 'sections_female',
+    'faculty_total', 'faculty_phd', 'faculty_male', 'faculty_female',
+    'faculty_published', 'research_count', 'citations',
+    'eval_courses', 'eval_experience', 'eval_employers',
+    'performance_rate', 'employment_rate',
+    'avg_class_size',
+    'transfers_in', 'transfers_out', 'retention_transfer_adjusted',
+] + [f"gpa_median_{p}" for p in GPA_POPULATIONS]
+
+
+def write_kpi_csv(path, aggregated, sections=None, faculty_index=None, gpa_dist=None):
+    """كتابة data.csv من صفوف aggregate_kpis مع الشعب وتركيبة هيئة التدريس وأوسط المعدلات (إن وجدت)"""
+    sections = sections or {}
+    faculty_index = faculty_index or {}
+    gpa_dist = gpa_dist or {}
+    rows_written = 0
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f, delimiter=';')
+        writer.writerow(KPI_CSV_HEADERS)
+
+        for key in sorted(aggregated.keys()):
+            d = aggregated[key]
+            sec = sections.get((d['prog'], d['degree'], d['semester']), {})
+            fac = composition_columns(faculty_index, d['dept'], d['semester'])
+
+            row = [
+                d['dept'],
+                d['prog'],
+                d['degree'],
+                d['semester'],
+                d['students_total'],
+                d['students_male'],
+                d['students_female'],
+                d['students_saudi'],
+                d['students_international'],
+                d['students_new'],
+                d['students_retained'],
+                d['graduates_total'],
+                d['graduates_ontime'],
+                d['prev_new_count'],
+                d['new_4_ago_count'],
+                sec.get('sections_total', ''),
+                sec.get('sections_male', ''),
+                sec.get('sections_female', ''),
+                fac['faculty_total'],
+                fac['faculty_phd'],
+                fac['faculty_male'],
+                fac['faculty_female'],
+                '', '', '',  # research
+                '', '', '',  # eval
+                '', '',  # rates
+                sec.get('avg_class_size', ''),
+                d['transfers_in'],
+                d['transfers_out'],
+                d['retention_transfer_adjusted'],
+            ]
+            median_idx = GPA_QUANTILES.index(50)
+            for population in GPA_POPULATIONS:
+                dist = gpa_dist.get((d['prog'], d['degree'], d['semester'], population))
+                row.append(dist['quantiles'][median_idx] if dist else '')
+            writer.writerow(row)
+            rows_written += 1
+    return rows_written
+
+
+# ============================================================
+# المعالجة الرئيسية
+# ============================================================
+def main(publish_outputs=True, sqlite_path=None, stream_html=None, snapshots_path=None,
+         partition_details=False, parse_cache=None):
+    print("=" * 70)
+    print("بدء استخراج البيانات من ملفات Excel")
+    print("المنهجية: إجمالي الطلاب = منتظم فقط من الفصل الأول")
+    print("         الخريجين = متخرج من أي فصل في السنة")
+    print("=" * 70)
+
+    # 1. قراءة جميع الملفات وتنظيمها حسب السنة والفصل
+    year_files = list_semester_files(DATA_DIR)
+
+    print(f"\nالسنوات المتاحة: {sorted(year_files.keys())}")
+    for year in sorted(year_files.keys()):
+        files = year_files[year]
+        print(f"  سنة {year} (14{year:02d}): {[f[0] for f in files]}")
+
+    # 2. استخراج الطلاب لكل ملف حسب الفصل
+    # sem1_students[year] = {student_id: student_record}  ← الفصل الأول فقط
+    # all_semesters_students[year] = {student_id: student_record}  ← كل الفصول (للخريجين)
+    sem1_students = defaultdict(dict)
+    all_semesters_students = defaultdict(dict)
+    # سجلات كل ملف كما هي (لمستودع SQLite أو مخزن اللقطات عند الطلب)
+    semester_records = []
+    keep_records = bool(sqlite_path or snapshots_path)
+    # تصحيحات المسجل (data/corrections.csv) تُطبق على نسخ السجلات قبل أي تجميع
+    corrections = load_corrections()
+    corrections_audit = []
+    corrected_rows = set()
+    parsed_semesters = set()
+
+    total_records = 0
+    for year in sorted(year_files.keys()):
+        for fname, semester in sorted(year_files[year], key=lambda x: x[1]):
+            filepath = os.path.join(DATA_DIR, fname)
+            print(f"\n  معالجة {fname}...", end=' ')
+            if parse_cache is not None:
+                students = parse_cache.get(filepath, stream=stream_html)
+            else:
+                students = parse_semester_file(filepath, stream=stream_html)
+            print(f"{len(students)} سجل")
+            students = apply_corrections(students, year, semester, corrections,
+                                         corrections_audit, corrected_rows)
+            parsed_semesters.add((year, semester))
+            total_records += len(students)
+            if keep_records:
+                semester_records.append((year, semester, students))
+
+            add_semester_records(sem1_students, all_semesters_students, year, semester, students)
+
+    print(f"\n{'='*70}")
+    print(f"إجمالي السجلات المقروءة: {total_records:,}")
+    print(f"{'='*70}")
+
+    if corrections:
+        audit_missing_files(corrections, parsed_semesters, corrections_audit)
+        write_corrections_audit(corrections_audit)
+        applied = sum(1 for row in corrections_audit if row[-1] == 'applied')
+        print(f"\n  التصحيحات: {applied} من {len(corrections_audit)} مطبقة (السجل في {CORRECTIONS_AUDIT})")
+
+    if sqlite_path:
+        import student_warehouse
+        n = student_warehouse.build_warehouse(sqlite_path, semester_records)
+        print(f"\n  تم تحميل {n:,} سجل فصلي في مستودع SQLite: {sqlite_path}")
+
+    if snapshots_path:
+        import snapshot_store
+        store = snapshot_store.build_from_records(semester_records)
+        size = store.save(snapshots_path)
+        st = store.stats()
+        print(f"\n  مخزن اللقطات: {snapshots_path} ({size:,} بايت) | "
+              f"{st['records_full']:,} سجل → {st['students']:,} أساسي + {st['field_changes']:,} تغيير")
+
+    # 3. طباعة ملخص
+    for year in sorted(sem1_students.keys()):
+        s1 = sem1_students[year]
+        enrolled = sum(1 for s in s1.values() if s['status'] == ENROLLED_STATUS)
+        all_s = all_semesters_students[year]
+        graduated = sum(1 for s in all_s.values() if s['status'] == GRADUATED_STATUS)
+        print(f"\n  سنة {year} (14{year:02d}): فصل1={len(s1):,} | منتظم={enrolled:,} | متخرج(كل الفصول)={graduated:,}")
+
+    # 4-5. مجموعات الطلاب (bitsets) والتجميع حسب (سنة، تخصص، درجة)
+    aggregated = aggregate_kpis(sem1_students, all_semesters_students)
+
+    if corrected_rows:
+        # التصحيح يغيّر أيضًا مستجدي ومستمري السنة التالية والتخرج بالوقت في السنوات اللاحقة
+        for year, prog, degree in affected_kpi_rows(corrected_rows, aggregated):
+            print(f"    صف متأثر: {year} | {prog} | {degree}")
+
     # 6. طباعة الملخص
     print(f"\n{'='*70}")
     print(f"إجمالي السجلات المجمعة: {len(aggregated)}")
@@ -590,36 +1292,24 @@ def main():
             grad_rate = round(d['graduates_ontime'] / d['new_4_ago_count'] * 100, 1)
             print(f"    معدل التخرج بالوقت: {grad_rate}% ({d['graduates_ontime']} من {d['new_4_ago_count']})")
 
-    # 7. استخراج سجلات الخريجين الفردية
+    # 7. الخريجون وغير المكملين وتوزيع الحالات في مرور واحد
     print(f"\n{'='*70}")
-    print("استخراج سجلات الخريجين الفردية...")
+    print("تتبع حالات الطلاب (الخريجون وغير المكملين)...")
     print(f"{'='*70}")
 
-    graduates_list = []
-    for year in sorted(all_semesters_students.keys()):
-        if year not in YEAR_SEQUENCE or year == 38:
-            continue
-        for sid, s in all_semesters_students[year].items():
-            if s['status'] == GRADUATED_STATUS:
-                prog = s['program']
-                if prog in EXCLUDED_PROGRAMS:
-                    continue
-                degree = DEGREE_MAP.get(s['degree'], s['degree'])
-                dept = DEPT_MAP.get(prog, prog)
-                graduates_list.append({
-                    'year': year,
-                    'student_id': sid,
-                    'name': s['name'],
-                    'program': prog,
-                    'degree': degree,
-                    'dept': dept,
-                    'gender': s['gender'],
-                    'nationality': s['nationality'],
-                    'admission_date': s.get('admission_date', ''),
-                    'grad_date': s.get('grad_date', ''),
-                    'expected_grad': s.get('expected_grad', ''),
-                    'gpa': s.get('gpa', ''),
-                })
+    graduates_list, non_completers_list, status_histogram, all_statuses = \
+        track_student_statuses(all_semesters_students)
+
+    # 7.1 تحويل التواريخ مرة واحدة إلى أرقام أيام وفصول (academic_calendar.py)
+    calendar = AcademicCalendar.load()
+    calendar.bucket(graduates_list, GRADUATE_DATE_FIELDS)
+    calendar.bucket(non_completers_list, ('admission_date',))
+    terms = sorted(
+        g['grad_date_term'] - g['admission_date_term'] for g in graduates_list
+        if g['grad_date_term'] is not None and g['admission_date_term'] is not None
+    )
+    if terms:
+        print(f"  وسيط مدة الدراسة: {terms[len(terms) // 2]} خانة فصل ({len(terms):,} خريج بتاريخين صالحين)")
 
     GRADUATES_CSV = os.path.join("KPI_TaifShare3h-main", "data", "graduates_detail.csv")
     with open(GRADUATES_CSV, 'w', encoding='utf-8', newline='') as f:
@@ -627,74 +1317,33 @@ def main():
         writer.writerow([
             'السنة', 'الرقم_الجامعي', 'الاسم', 'التخصص', 'الدرجة', 'القسم',
             'الجنس', 'الجنسية', 'تاريخ_القبول', 'تاريخ_التخرج',
-            'تاريخ_التخرج_المتوقع', 'المعدل'
+            'تاريخ_التخرج_المتوقع', 'المعدل',
+            'يوم_القبول', 'يوم_التخرج', 'يوم_التخرج_المتوقع',
+            'فصل_القبول', 'فصل_التخرج', 'فصل_التخرج_المتوقع'
         ])
         for g in sorted(graduates_list, key=lambda x: (x['year'], x['dept'], x['program'])):
             writer.writerow([
                 g['year'], g['student_id'], g['name'], g['program'],
                 g['degree'], g['dept'], g['gender'], g['nationality'],
                 g['admission_date'], g['grad_date'],
-                g['expected_grad'], g['gpa']
+                g['expected_grad'], g['gpa'],
+                *_calendar_values(g, GRADUATE_DATE_FIELDS, '_day'),
+                *_calendar_values(g, GRADUATE_DATE_FIELDS, '_term')
             ])
     print(f"  تم كتابة {len(graduates_list)} سجل خريج في {GRADUATES_CSV}")
+    index_size = write_graduate_index(graduates_list)
+    print(f"  فهرس بحث الخريجين: {GRADUATE_INDEX_PATH} ({index_size:,} بايت)")
 
-    # 8. استخراج سجلات غير المكملين (جميع الحالات عدا منتظم ومتخرج)
+    # 8. كتابة سجلات غير المكملين (جميع الحالات عدا منتظم ومتخرج)
     print(f"\n{'='*70}")
-    print("استخراج سجلات غير المكملين...")
+    print("سجلات غير المكملين وتوزيع الحالات...")
     print(f"{'='*70}")
 
-    # نجمع كل الحالات الفريدة أولاً للطباعة
-    all_statuses = set()
-    non_completers_dict = {}  # (student_id, program, degree) -> latest record
-
-    for year in sorted(all_semesters_students.keys()):
-        if year not in YEAR_SEQUENCE or year == 38:
-            continue
-        for sid, s in all_semesters_students[year].items():
-            status = s['status']
-            all_statuses.add(status)
-
-            if status == ENROLLED_STATUS or status == GRADUATED_STATUS:
-                continue
-
-            prog = s['program']
-            if prog in EXCLUDED_PROGRAMS:
-                continue
-            degree = DEGREE_MAP.get(s['degree'], s['degree'])
-            dept = DEPT_MAP.get(prog, prog)
-
-            rec_key = (sid, prog, degree)
-            existing = non_completers_dict.get(rec_key)
-            # نحتفظ بأحدث سجل (أكبر سنة)
-            if not existing or year > existing['year']:
-                non_completers_dict[rec_key] = {
-                    'year': year,
-                    'student_id': sid,
-                    'name': s['name'],
-                    'program': prog,
-                    'degree': degree,
-                    'dept': dept,
-                    'status': status,
-                    'gender': s['gender'],
-                    'nationality': s['nationality'],
-                    'admission_date': s.get('admission_date', ''),
-                    'gpa': s.get('gpa', ''),
-                    'study_type': s.get('study_type', ''),
-                }
-
-    # استبعاد من تخرج لاحقاً (قد يكون غير مكمل في سنة ثم تخرج لاحقاً)
-    graduated_ids = set()
-    for year in all_semesters_students:
-        for sid, s in all_semesters_students[year].items():
-            if s['status'] == GRADUATED_STATUS:
-                prog = s['program']
-                degree = DEGREE_MAP.get(s['degree'], s['degree'])
-                graduated_ids.add((sid, prog, degree))
-
-    non_completers_list = [
-        rec for key, rec in non_completers_dict.items()
-        if key not in graduated_ids
-    ]
+    status_totals = defaultdict(int)
+    for (_, status), n in status_histogram.items():
+        status_totals[status] += n
+    for status, n in sorted(status_totals.items(), key=lambda x: -x[1]):
+        print(f"  {status}: {n:,}")
 
     print(f"  جميع الحالات الموجودة: {all_statuses}")
     non_comp_statuses = set(r['status'] for r in non_completers_list)
@@ -705,74 +1354,245 @@ def main():
         writer = csv.writer(f, delimiter=';')
         writer.writerow([
             'آخر_سنة', 'الرقم_الجامعي', 'الاسم', 'التخصص', 'الدرجة', 'القسم',
-            'الحالة', 'الجنس', 'الجنسية', 'تاريخ_القبول', 'المعدل', 'نوع_الدراسة'
+            'الحالة', 'الجنس', 'الجنسية', 'تاريخ_القبول', 'المعدل', 'نوع_الدراسة',
+            'يوم_القبول', 'فصل_القبول'
         ])
         for nc in sorted(non_completers_list, key=lambda x: (x['year'], x['dept'], x['program'], x['status'])):
             writer.writerow([
                 nc['year'], nc['student_id'], nc['name'], nc['program'],
                 nc['degree'], nc['dept'], nc['status'], nc['gender'],
                 nc['nationality'], nc['admission_date'], nc['gpa'],
-                nc['study_type']
+                nc['study_type'],
+                *_calendar_values(nc, ('admission_date',), '_day'),
+                *_calendar_values(nc, ('admission_date',), '_term')
             ])
     print(f"  تم كتابة {len(non_completers_list)} سجل غير مكمل في {NON_COMP_CSV}")
 
-    # 9. كتابة CSV النهائي
-    print(f"\n{'='*70}")
-    print(f"كتابة الملف النهائي: {OUTPUT_CSV}")
-    print(f"{'='*70}")
-
-    csv_headers = [
-        'Dept_aName', 'Major_aName', 'Degree_aName', 'Semester',
-        'students_total', 'students_male', 'students_female',
-        'students_saudi', 'students_international',
-        'students_new', 'students_retained',
-        'graduates_total', 'graduates_ontime',
-        'prev_new_count', 'new_4_ago_count',
-        'sections_total', 'sections_male', 'sections_female',
-        'faculty_total', 'faculty_phd', 'faculty_male', 'faculty_female',
-        'faculty_published', 'research_count', 'citations',
-        'eval_courses', 'eval_experience', 'eval_employers',
-        'performance_rate', 'employment_rate'
-    ]
+    if partition_details:
+        for name, index in write_partitioned_details().items():
+            print(f"  مقاطع {name}: {len(index['partitions'])} ملف (سنة، تخصص) مع فهرس البصمات")
 
-    rows_written = 0
-    with open(OUTPUT_CSV, 'w', encoding='utf-8', newline='') as f:
+    # 8.1 مصفوفة انتقال الطلاب بين السنوات (للتدفق/Sankey دون سجلات فردية)
+    flows = student_transitions(all_semesters_students)
+    FLOW_CSV = os.path.join("KPI_TaifShare3h-main", "data", "student_flow.csv")
+    with open(FLOW_CSV, 'w', encoding='utf-8', newline='') as f:
         writer = csv.writer(f, delimiter=';')
-        writer.writerow(csv_headers)
+        writer.writerow(FLOW_COLUMNS)
+        for (prog, degree, y0, y1, st0, st1, prog1, degree1), n in sorted(flows.items()):
+            writer.writerow([DEPT_MAP.get(prog, prog), prog, degree, y0, y1, st0, st1, prog1, degree1, n])
+    transfers = sum(n for k, n in flows.items() if k[6] and (k[6], k[7]) != (k[0], k[1]))
+    print(f"  تم كتابة {len(flows)} صف انتقال في {FLOW_CSV} (منها تحويل بين برامج: {transfers} طالب)")
+
+    # 8.2 توزيع المعدلات لكل برنامج وسنة (المنتظمون / الخريجون / غير المكملين)
+    gpa_dist = gpa_distributions(sem1_students, graduates_list, non_completers_list)
+    GPA_CSV = os.path.join("KPI_TaifShare3h-main", "data", "gpa_distribution.csv")
+    with open(GPA_CSV, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f, delimiter=';')
+        writer.writerow(GPA_COLUMNS)
+        order = {p: i for i, p in enumerate(GPA_POPULATIONS)}
+        for (prog, degree, year, population) in sorted(gpa_dist, key=lambda k: (k[0], k[1], k[2], order[k[3]])):
+            dist = gpa_dist[(prog, degree, year, population)]
+            writer.writerow(
+                [DEPT_MAP.get(prog, prog), prog, degree, year, population, dist['count']]
+                + dist['bins'] + dist['quantiles']
+            )
+    print(f"  تم كتابة {len(gpa_dist)} توزيع معدلات في {GPA_CSV}")
+
+    # 9. حساب الشعب من ملفات التدريس الفعلي، وتركيبة هيئة التدريس من faculty.csv
+    print(f"\n{'='*70}")
+    print("حساب الشعب وتركيبة هيئة التدريس...")
+    print(f"{'='*70}")
 
-        for key in sorted(aggregated.keys()):
-            d = aggregated[key]
+    sections = {}
+    if os.path.isdir(TEACHING_YEARS_DIR) and os.path.exists(PLANS_CSV):
+        sections, unmapped = compute_sections(TEACHING_YEARS_DIR, PLANS_CSV)
+        for year in sorted(unmapped):
+            print(f"  سنة {year}: شعب غير مربوطة ببرنامج = {unmapped[year]:,}")
+    else:
+        print("  تحذير: ملفات التدريس أو الخطط غير موجودة، ستبقى أعمدة الشعب فارغة")
+
+    faculty_index = {}
+    if os.path.exists(FACULTY_CSV):
+        faculty_index = build_faculty_index(FACULTY_CSV)
+        print(f"  فهرس هيئة التدريس: {len(faculty_index)} (قسم، سنة)")
+        if not any(e['has_gender'] for e in faculty_index.values()):
+            print("  ملاحظة: faculty.csv بلا عمود للجنس، فيبقى faculty_male وfaculty_female فارغين")
+    else:
+        print(f"  تحذير: {FACULTY_CSV} غير موجود، ستبقى أعمدة تركيبة هيئة التدريس فارغة")
+
+    # 10. كتابة CSV النهائي
+    print(f"\n{'='*70}")
+    print(f"كتابة الملف النهائي: {OUTPUT_CSV}")
+    print(f"{'='*70}")
 
-            row = [
-                d['dept'],
-                d['prog'],
-                d['degree'],
-                d['semester'],
-                d['students_total'],
-                d['students_male'],
-                d['students_female'],
-                d['students_saudi'],
-                d['students_international'],
-                d['students_new'],
-                d['students_retained'],
-                d['graduates_total'],
-                d['graduates_ontime'],
-                d['prev_new_count'],
-                d['new_4_ago_count'],
-                '', '', '',  # sections
-                '', '', '', '',  # faculty
-                '', '', '',  # research
-                '', '', '',  # eval
-                '', '',  # rates
-            ]
-            writer.writerow(row)
-            rows_written += 1
+    rows_written = write_kpi_csv(OUTPUT_CSV, aggregated, sections, faculty_index, gpa_dist)
 
     print(f"\n  تم كتابة {rows_written} صف في {OUTPUT_CSV}")
+
+    # 11. نسخ مضغوطة مسبقًا (.gz / .br) وmanifest لملفات النشر
+    if publish_outputs:
+        print(f"\n{'='*70}")
+        print("تجهيز النسخ المضغوطة للنشر...")
+        print(f"{'='*70}")
+        publish(os.path.dirname(OUTPUT_CSV))
     print(f"\n{'='*70}")
     print("تم الانتهاء بنجاح!")
     print(f"{'='*70}")
 
 
+# ============================================================
+# وضع المراقبة: إعادة البناء عند وصول ملفات فصول جديدة
+# ============================================================
+WATCH_INTERVAL = 2.0   # ثوانٍ بين كل فحص لمجلد البيانات
+WATCH_DEBOUNCE = 3.0   # مدة ثبات المجلد قبل إعادة البناء (لتجميع دفعات النسخ)
+WORKBOOK_INPUTS = (
+    OUTPUT_CSV,
+    os.path.join("KPI_TaifShare3h-main", "data", "graduates_detail.csv"),
+    os.path.join("KPI_TaifShare3h-main", "data", "non_completers.csv"),
+)
+
+
+def file_signature(filepath):
+    st = os.stat(filepath)
+    return (st.st_size, st.st_mtime_ns)
+
+
+def scan_data_dir(data_dir=DATA_DIR):
+    """{مسار: (الحجم، وقت التعديل)} لملفات الفصول الحالية"""
+    return {
+        os.path.join(data_dir, fname): file_signature(os.path.join(data_dir, fname))
+        for files in list_semester_files(data_dir).values()
+        for fname, _ in files
+    }
+
+
+class ParseCache:
+    """سجلات ملفات الفصول المحللة في الذاكرة بين مرات البناء
+    يُعاد استخدام السجل إذا لم يتغير الحجم ووقت التعديل، أو تغيّرا وبقيت البصمة كما هي
+    """
+
+    def __init__(self):
+        self.entries = {}   # path → (signature, sha256, students)
+        self.parsed = 0
+        self.reused = 0
+
+    def is_current(self, filepath):
+        entry = self.entries.get(filepath)
+        if entry is None:
+            return False
+        sig = file_signature(filepath)
+        if entry[0] == sig:
+            return True
+        if entry[1] == sha256_file(filepath):
+            self.entries[filepath] = (sig, entry[1], entry[2])
+            return True
+        return False
+
+    def get(self, filepath, stream=None):
+        if self.is_current(filepath):
+            self.reused += 1
+            return self.entries[filepath][2]
+        sig = file_signature(filepath)
+        digest = sha256_file(filepath)
+        students = parse_semester_file(filepath, stream=stream)
+        self.entries[filepath] = (sig, digest, students)
+        self.parsed += 1
+        return students
+
+    def changed(self, paths):
+        """الملفات الجديدة أو المعدلة فعلًا، والملفات المحذوفة منذ آخر بناء"""
+        modified = [p for p in paths if not self.is_current(p)]
+        removed = [p for p in self.entries if p not in paths]
+        return modified, removed
+
+    def prune(self, paths):
+        for p in [p for p in self.entries if p not in paths]:
+            del self.entries[p]
+
+
+def _stamps(paths):
+    return {p: sha256_file(p) if os.path.exists(p) else None for p in paths}
+
+
+def watch(interval=WATCH_INTERVAL, debounce=WATCH_DEBOUNCE, build_workbook=True, **main_kwargs):
+    """فحص مجلد البيانات (وملف التصحيحات) دوريًا وإعادة البناء بعد ثبات التغييرات
+    تُحلل الملفات الجديدة أو المعدلة فقط، ويُعاد بناء ملف Excel فقط إذا تغيرت مدخلاته
+    """
+    cache = ParseCache()
+    built_overlay = {}
+
+    def rebuild():
+        built_overlay.update(_stamps([CORRECTIONS_PATH]))
+        start = time.perf_counter()
+        parsed, reused = cache.parsed, cache.reused
+        before = _stamps(WORKBOOK_INPUTS)
+        try:
+            main(parse_cache=cache, **main_kwargs)
+            if build_workbook and _stamps(WORKBOOK_INPUTS) != before:
+                import create_excel
+                create_excel.main([])
+        except Exception as e:  # ملف ما زال يُنسخ أو تالف: ننتظر التغيير التالي
+            print(f"\n  ✗ فشل البناء: {e}")
+        cache.prune(scan_data_dir())
+        print(f"\n  ↻ البناء استغرق {time.perf_counter() - start:.1f} ث | "
+              f"ملفات محللة: {cache.parsed - parsed} | من الذاكرة: {cache.reused - reused}")
+
+    def scan():
+        overlay = file_signature(CORRECTIONS_PATH) if os.path.exists(CORRECTIONS_PATH) else None
+        return scan_data_dir(), overlay
+
+    seen = scan()
+    rebuild()
+    print(f"\nمراقبة {DATA_DIR}/ كل {interval:g} ث (Ctrl+C للإيقاف)...")
+    pending_since = None
+    try:
+        while True:
+            time.sleep(interval)
+            current = scan()
+            if current != seen:
+                # ما زالت الملفات تتغير: نؤجل حتى يثبت المجلد مدة debounce
+                seen = current
+                pending_since = time.monotonic()
+                continue
+            if pending_since is None or time.monotonic() - pending_since < debounce:
+                continue
+            pending_since = None
+            modified, removed = cache.changed(current[0])
+            if _stamps([CORRECTIONS_PATH]) != built_overlay:
+                modified.append(CORRECTIONS_PATH)
+            if not modified and not removed:
+                continue
+            names = [os.path.basename(p) for p in modified + removed]
+            print(f"\n  تغييرات في: {', '.join(sorted(names))}")
+            rebuild()
+    except KeyboardInterrupt:
+        print("\nتم إيقاف المراقبة")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='استخراج بيانات الطلاب وحساب مؤشرات الأداء')
+    # يستخدمه run_pipeline.py الذي يشغّل مرحلة النشر مستقلة
+    parser.add_argument('--no-publish', action='store_true', help='بدون نسخ .gz/.br وmanifest')
+    parser.add_argument('--sqlite', metavar='PATH', help='تحميل السجلات الفصلية في قاعدة SQLite')
+    parser.add_argument('--snapshots', metavar='PATH', help='حفظ مخزن اللقطات بترميز الفروق')
+    parser.add_argument('--partition-details', action='store_true',
+                        help='نسخ مقسّمة حسب (السنة، التخصص) من ملفات الخريجين وغير المكملين مع فهرس')
+    parser.add_argument('--stream-html', action='store_true', default=None,
+                        help='قراءة ملفات HTML تدريجيًا (تلقائي للملفات الكبيرة)')
+    parser.add_argument('--watch', action='store_true',
+                        help='مراقبة مجلد البيانات وإعادة بناء data.csv وملف Excel عند وصول ملفات جديدة')
+    parser.add_argument('--interval', type=float, default=WATCH_INTERVAL, help='ثوانٍ بين كل فحص')
+    parser.add_argument('--debounce', type=float, default=WATCH_DEBOUNCE,
+                        help='ثوانٍ من ثبات المجلد قبل إعادة البناء')
+    return parser.parse_args(argv)
+
+
 if __name__ == '__main__':
-    main()
+    args = parse_args()
+    options = dict(publish_outputs=not args.no_publish, sqlite_path=args.sqlite,
+                   stream_html=args.stream_html, snapshots_path=args.snapshots,
+                   partition_details=args.partition_details)
+    if args.watch:
+        watch(interval=args.interval, debounce=args.debounce, **options)
+    else:
+        main(**options)
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+حساب تركيبة هيئة التدريس (faculty_total / faculty_phd / faculty_male / faculty_female) من faculty.csv
+
+يُبنى فهرس واحد على (السنة، القسم) للأعضاء النشطين، ثم تُنسخ قيم القسم على جميع
+برامجه في تلك السنة (كما في مؤشرات البحث في js/app.js). تطبيع الرتبة وكشف حملة
+الدكتوراه من اللقب ("د." / "أ.د.") مُجمّعان مرة واحدة على مستوى الوحدة.
+
+faculty.csv الحالي لا يحتوي على عمود للجنس، فيبقى faculty_male وfaculty_female
+فارغين (للتعبئة اليدوية) إلى أن يُضاف أحد أعمدة GENDER_COLUMNS.
+"""
+
+import sys
+import os
+import re
+import csv
+from collections import defaultdict
+
+sys.stdout.reconfigure(encoding='utf-8')
+
+# ============================================================
+# الإعدادات
+# ============================================================
+FACULTY_CSV = os.path.join("KPI_TaifShare3h-main", "data", "faculty.csv")
+
+ACTIVE_VALUE = 'نعم'
+
+# تطبيع الرتبة بنفس ترتيب normalizeRank في js/app.js (الأخص أولًا)
+RANK_RULES = [
+    (re.compile(r'أستاذ مساعد'), 'أستاذ مساعد'),
+    (re.compile(r'أستاذ مشارك'), 'أستاذ مشارك'),
+    (re.compile(r'أستاذ'), 'أستاذ'),
+    (re.compile(r'محاضر'), 'محاضر'),
+    (re.compile(r'معيد'), 'معيد'),
+    (re.compile(r'مدرس'), 'مدرس'),
+    (re.compile(r'متعاون'), 'متعاون'),
+]
+RANK_SPELLING = re.compile(r'استاذ')
+
+# الرتب الأكاديمية التي تستلزم الدكتوراه
+PHD_RANKS = {'أستاذ', 'أستاذ مشارك', 'أستاذ مساعد'}
+
+# لقب الدكتوراه في بداية الاسم: "د." أو "أ.د." (بمسافات أو بدونها، وبالألف أو الهمزة)
+PHD_HONORIFIC = re.compile(r'^\s*(?:[أا]\s*\.\s*)?د\s*\.')
+
+# تطبيع القسم كما في normalizeDepartment في js/app.js
+DEPT_ALIASES = {
+    'الثقافة الإسلامية': 'الدراسات الإسلامية',
+}
+
+# أعمدة الجنس الاختيارية (faculty.csv الحالي لا يحتوي عليها)
+GENDER_COLUMNS = ('gender', 'Gender', 'الجنس')
+MALE_VALUES = {'ذكر', 'male', 'm', 'M'}
+FEMALE_VALUES = {'أنثى', 'انثى', 'female', 'f', 'F'}
+
+
+# ============================================================
+# التطبيع
+# ============================================================
+def normalize_rank(rank):
+    r = RANK_SPELLING.sub('أستاذ', str(rank or '').strip(), count=1)
+    if not r:
+        return ''
+    for pattern, label in RANK_RULES:
+        if pattern.search(r):
+            return label
+    return r
+
+
+def has_phd(name, rank):
+    """حامل دكتوراه: رتبة أكاديمية أو لقب "د." / "أ.د." في الاسم"""
+    return rank in PHD_RANKS or bool(PHD_HONORIFIC.match(name or ''))
+
+
+def normalize_department(dept):
+    d = str(dept or '').strip()
+    return DEPT_ALIASES.get(d, d)
+
+
+def _gender(row):
+    for col in GENDER_COLUMNS:
+        v = (row.get(col) or '').strip()
+        if v in MALE_VALUES:
+            return 'male'
+        if v in FEMALE_VALUES:
+            return 'female'
+    return ''
+
+
+# ============================================================
+# الفهرس
+# ============================================================
+def build_faculty_index(faculty_csv=FACULTY_CSV):
+    """{(القسم، السنة برقمين): {'total','phd','male','female','has_gender'}} للأعضاء النشطين"""
+    index = defaultdict(lambda: {'total': 0, 'phd': 0, 'male': 0, 'female': 0, 'has_gender': False})
+    seen = set()
+    with open(faculty_csv, 'r', encoding='utf-8-sig') as f:
+        reader = csv.DictReader(f)
+        gender_known = any(c in (reader.fieldnames or []) for c in GENDER_COLUMNS)
+        for row in reader:
+            fid = (row.get('id') or '').strip()
+            year = (row.get('year') or '').strip()
+            if not fid or not year.isdigit():
+                continue
+            if (row.get('active') or '').strip() != ACTIVE_VALUE:
+                continue
+            dept = normalize_department(row.get('department'))
+            if not dept:
+                continue
+            key = (dept, int(year) % 100)
+            if (key, fid) in seen:
+                continue
+            seen.add((key, fid))
+
+            entry = index[key]
+            entry['total'] += 1
+            if has_phd(row.get('name'), normalize_rank(row.get('rank'))):
+                entry['phd'] += 1
+            if gender_known:
+                entry['has_gender'] = True
+                g = _gender(row)
+                if g:
+                    entry[g] += 1
+    return dict(index)
+
+
+def composition_columns(index, dept, year):
+    """قيم الأعمدة faculty_total / faculty_phd / faculty_male / faculty_female لبرنامج في قسم وسنة"""
+    entry = index.get((normalize_department(dept), year))
+    if not entry:
+        return {'faculty_total': '', 'faculty_phd': '', 'faculty_male': '', 'faculty_female': ''}
+    return {
+        'faculty_total': entry['total'],
+        'faculty_phd': entry['phd'],
+        'faculty_male': entry['male'] if entry['has_gender'] else '',
+        'faculty_female': entry['female'] if entry['has_gender'] else '',
+    }
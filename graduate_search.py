@@ -0,0 +1,339 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+فهرس بحث مسبق (n-gram) لأسماء الخريجين وأرقامهم الجامعية
+
+يُطبَّع الاسم والرقم (الأرقام العربية، علامات الاتجاه، المسافات كما في
+normalizeArabicText في js/app.js، إضافة إلى توحيد أ/إ/آ→ا و ة→ه و ى→ي وحذف التطويل
+والتشكيل)، ثم يُبنى فهرس مقلوب من المقاطع الثلاثية (trigrams) إلى أرقام السجلات.
+قائمة كل مقطع مخزنة كفروق بترميز varint أو كـ bitset (أيهما أصغر؛ المقاطع الشائعة
+bitset يُقاطَع بعملية & واحدة كما في student_bitsets)، وسجلات العرض (الحقول فقط، دون
+النص المطبَّع الذي يُعاد حسابه عند التحقق) مضغوط كل منها وحده بـ deflate مع قاموس
+مسبق مشترك (أكثر الأسماء وقيم السنة/التخصص/الدرجة تكرارًا)، ومواضعها في الترويسة.
+الملف يُعيَّن في الذاكرة (mmap)، فلا يُقرأ ويُفك عند البحث إلا قوائم مقاطع الاستعلام
+والسجلات المرشحة نفسها.
+
+صيغة الملف: MAGIC + طول الترويسة (4 بايت) + ترويسة JSON + كتلة القوائم + كتلة السجلات.
+
+مثال:
+    python graduate_search.py --build
+    python graduate_search.py --query "اسامه"
+"""
+
+import sys
+import os
+import re
+import csv
+import json
+import time
+import base64
+import zlib
+import mmap
+import struct
+import argparse
+
+from collections import Counter
+
+from publish_data import write_if_changed
+from student_bitsets import IntBitset
+
+sys.stdout.reconfigure(encoding='utf-8')
+
+# ============================================================
+# الإعدادات
+# ============================================================
+SITE_DATA_DIR = os.path.join("KPI_TaifShare3h-main", "data")
+GRADUATES_CSV = os.path.join(SITE_DATA_DIR, "graduates_detail.csv")
+INDEX_PATH = os.path.join(SITE_DATA_DIR, "graduates_search.idx")
+MAGIC = b'KPIGSX2\n'
+GRAM_SIZE = 3
+DEFAULT_LIMIT = 20
+ZDICT_SIZE = 8192       # حجم القاموس المسبق لضغط السجلات (بايت)
+FIELD_SEP = '\x1f'
+
+# حقول سجل العرض المحفوظة لكل خريج
+DOC_FIELDS = ('student_id', 'name', 'year', 'program', 'degree')
+
+# ============================================================
+# التطبيع
+# ============================================================
+_CHAR_MAP = str.maketrans({
+    **{d: str(i) for i, d in enumerate('٠١٢٣٤٥٦٧٨٩')},
+    **{d: str(i) for i, d in enumerate('۰۱۲۳۴۵۶۷۸۹')},
+    'أ': 'ا', 'إ': 'ا', 'آ': 'ا', 'ٱ': 'ا',
+    'ة': 'ه', 'ى': 'ي',
+    'ـ': None,            # التطويل
+    '\u200e': None, '\u200f': None,
+})
+_DIACRITICS = re.compile('[\u064B-\u0652\u0670]')  # التشكيل والألف الخنجرية
+_SPACES = re.compile(r'\s+')
+
+
+def normalize(text):
+    """تطبيع نص عربي للبحث (يقابل normalizeArabicText مع توحيد الهمزات والتاء والياء)"""
+    if text is None:
+        return ''
+    text = _DIACRITICS.sub('', str(text).translate(_CHAR_MAP))
+    return _SPACES.sub(' ', text).strip().lower()
+
+
+def grams(text):
+    """المقاطع الثلاثية لكل كلمة في نص مطبَّع (الكلمة القصيرة تُعد مقطعًا واحدًا)"""
+    out = set()
+    for token in text.split(' '):
+        if len(token) < GRAM_SIZE:
+            if token:
+                out.add(token)
+            continue
+        for i in range(len(token) - GRAM_SIZE + 1):
+            out.add(token[i:i + GRAM_SIZE])
+    return out
+
+
+# ============================================================
+# varint
+# ============================================================
+def encode_postings(ids):
+    """قائمة أرقام مرتبة → فروق متتالية بترميز varint"""
+    out = bytearray()
+    prev = 0
+    for i in ids:
+        delta = i - prev
+        prev = i
+        while delta >= 0x80:
+            out.append((delta & 0x7F) | 0x80)
+            delta >>= 7
+        out.append(delta)
+    return bytes(out)
+
+
+def decode_postings(data, start=0, end=None):
+    end = len(data) if end is None else end
+    ids = []
+    value = shift = prev = 0
+    for pos in range(start, end):
+        byte = data[pos]
+        value |= (byte & 0x7F) << shift
+        if byte & 0x80:
+            shift += 7
+        else:
+            prev += value
+            ids.append(prev)
+            value = shift = 0
+    return ids
+
+
+# ============================================================
+# البناء
+# ============================================================
+def doc_key(values):
+    """النص المطبَّع الذي يُبحث فيه: الاسم ثم الرقم الجامعي"""
+    return normalize(f"{values[1]} {values[0]}")
+
+
+def _deflater(zdict):
+    return zlib.compressobj(9, zlib.DEFLATED, -15, 9, zlib.Z_DEFAULT_STRATEGY, zdict)
+
+
+def build_zdict(rows):
+    """قاموس deflate مسبق من أكثر الأجزاء تكرارًا في السجلات (الأكثر تكرارًا في آخره لأقصر مسافة)"""
+    counts = Counter()
+    for values in rows:
+        counts.update(values[1].split(' '))
+        counts[FIELD_SEP + FIELD_SEP.join(values[2:])] += 1
+    parts, size = [], 0
+    for part, _ in counts.most_common():
+        encoded = part.encode('utf-8') + b' '
+        if size + len(encoded) > ZDICT_SIZE:
+            break
+        parts.append(encoded)
+        size += len(encoded)
+    return b''.join(reversed(parts))
+
+
+def build_index(graduates):
+    """graduates: قواميس فيها حقول DOC_FIELDS (مثل graduates_list في extract_data)؛ ترجع بايتات الملف"""
+    postings = {}
+    rows = []
+    for doc_id, g in enumerate(graduates):
+        values = [str(g.get(f, '') or '') for f in DOC_FIELDS]
+        for gram in grams(doc_key(values)):
+            postings.setdefault(gram, []).append(doc_id)
+        rows.append(values)
+
+    zdict = build_zdict(rows)
+    docs = bytearray()
+    doc_offsets = []
+    for values in rows:
+        doc_offsets.append(len(docs))
+        deflater = _deflater(zdict)
+        docs += deflater.compress(FIELD_SEP.join(values).encode('utf-8')) + deflater.flush()
+
+    # جدول المقاطع: [الموضع، الطول، عدد السجلات، 1 إذا كانت القائمة bitset]
+    blob = bytearray()
+    gram_table = {}
+    for gram in sorted(postings):
+        ids = postings[gram]
+        data = encode_postings(ids)
+        bits = IntBitset.from_ints(ids).bits
+        bitmap = bits.to_bytes((bits.bit_length() + 7) // 8, 'little')
+        is_bitmap = len(bitmap) < len(data)
+        if is_bitmap:
+            data = bitmap
+        gram_table[gram] = [len(blob), len(data), len(ids), int(is_bitmap)]
+        blob += data
+
+    header = {
+        'version': 2,
+        'fields': list(DOC_FIELDS),
+        'gram_size': GRAM_SIZE,
+        'docs': len(rows),
+        'postings_length': len(blob),
+        'doc_offsets': base64.b64encode(encode_postings(doc_offsets + [len(docs)])).decode('ascii'),
+        'zdict': base64.b64encode(zdict).decode('ascii'),
+        'grams': gram_table,
+    }
+    header_bytes = json.dumps(header, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    return MAGIC + struct.pack('<I', len(header_bytes)) + header_bytes + bytes(blob) + bytes(docs)
+
+
+def write_index(graduates, path=INDEX_PATH):
+    data = build_index(graduates)
+    write_if_changed(path, data)
+    return len(data)
+
+
+def read_graduates_csv(path=GRADUATES_CSV):
+    """قراءة graduates_detail.csv إلى حقول DOC_FIELDS"""
+    columns = {'student_id': 'الرقم_الجامعي', 'name': 'الاسم', 'year': 'السنة',
+               'program': 'التخصص', 'degree': 'الدرجة'}
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        return [{k: row.get(col, '') for k, col in columns.items()}
+                for row in csv.DictReader(f, delimiter=';')]
+
+
+# ============================================================
+# البحث
+# ============================================================
+class GraduateIndex:
+    """فهرس محمّل (bytes أو mmap)؛ القوائم وكتل السجلات تُقرأ وتُفك عند الطلب فقط"""
+
+    def __init__(self, data):
+        if data[:len(MAGIC)] != MAGIC:
+            raise ValueError("ملف فهرس الخريجين غير صالح")
+        pos = len(MAGIC)
+        (header_len,) = struct.unpack_from('<I', data, pos)
+        pos += 4
+        header = json.loads(data[pos:pos + header_len].decode('utf-8'))
+        pos += header_len
+        self.data = data
+        self.fields = header['fields']
+        self.grams = header['grams']
+        self.doc_count = header['docs']
+        self.postings_start = pos
+        self.docs_start = pos + header['postings_length']
+        self.doc_offsets = decode_postings(base64.b64decode(header['doc_offsets']))
+        self.zdict = base64.b64decode(header['zdict'])
+
+    @classmethod
+    def load(cls, path=INDEX_PATH):
+        with open(path, 'rb') as f:
+            return cls(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+
+    def close(self):
+        if isinstance(self.data, mmap.mmap):
+            self.data.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return self.doc_count
+
+    def _postings(self, gram):
+        """سجلات المقطع كـ IntBitset"""
+        entry = self.grams.get(gram)
+        if entry is None:
+            return IntBitset()
+        start = self.postings_start + entry[0]
+        data = self.data[start:start + entry[1]]
+        if entry[3]:
+            return IntBitset(int.from_bytes(data, 'little'))
+        return IntBitset.from_ints(decode_postings(data))
+
+    def _doc(self, doc_id):
+        start = self.docs_start + self.doc_offsets[doc_id]
+        end = self.docs_start + self.doc_offsets[doc_id + 1]
+        inflater = zlib.decompressobj(-15, self.zdict)
+        return inflater.decompress(self.data[start:end]).decode('utf-8').split(FIELD_SEP)
+
+    def search(self, query, limit=DEFAULT_LIMIT):
+        """سجلات الخريجين التي يحتوي اسمها المطبَّع أو رقمها كل كلمات الاستعلام"""
+        tokens = normalize(query).split(' ')
+        tokens = [t for t in tokens if t]
+        if not tokens:
+            return []
+
+        # تقاطع القوائم بدءًا بأقصرها (df محفوظ في الجدول)، والمرشحون يُمرّون تصاعديًا
+        query_grams = sorted(grams(' '.join(t for t in tokens if len(t) >= GRAM_SIZE)),
+                             key=lambda g: self.grams.get(g, (0, 0, 0, 0))[2])
+        if query_grams:
+            candidates = None
+            for gram in query_grams:
+                ids = self._postings(gram)
+                candidates = ids if candidates is None else candidates & ids
+                if not candidates:
+                    return []
+        else:
+            # كل الكلمات أقصر من المقطع: الكلمة تقع داخل مقطع ثلاثي لكلمة أطول
+            # أو هي جزء من كلمة قصيرة مفهرسة كاملة، فالمرشحون اتحاد تلك المقاطع
+            candidates = None
+            for token in tokens:
+                ids = IntBitset()
+                for gram in self.grams:
+                    if token in gram:
+                        ids = ids | self._postings(gram)
+                candidates = ids if candidates is None else candidates & ids
+                if not candidates:
+                    return []
+
+        results = []
+        for doc_id in candidates:
+            values = self._doc(doc_id)
+            key = doc_key(values)
+            if all(t in key for t in tokens):
+                results.append(dict(zip(self.fields, values)))
+                if len(results) >= limit:
+                    break
+        return results
+
+
+# ============================================================
+# المعالجة الرئيسية
+# ============================================================
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='فهرس بحث أسماء الخريجين وأرقامهم')
+    parser.add_argument('--build', action='store_true', help='بناء الفهرس من graduates_detail.csv')
+    parser.add_argument('--query', help='نص البحث (اسم أو جزء منه أو رقم جامعي)')
+    parser.add_argument('--limit', type=int, default=DEFAULT_LIMIT)
+    args = parser.parse_args(argv)
+
+    if args.build:
+        graduates = read_graduates_csv()
+        size = write_index(graduates)
+        print(f"تم بناء فهرس {len(graduates):,} خريج في {INDEX_PATH} ({size:,} بايت)")
+    if args.query:
+        with GraduateIndex.load() as index:
+            start = time.perf_counter()
+            results = index.search(args.query, args.limit)
+            elapsed = (time.perf_counter() - start) * 1000
+        print(f"  {len(results)} نتيجة في {elapsed:.3f} ms")
+        for r in results:
+            print(f"    {r['student_id']} | {r['name']} | {r['year']} | {r['program']} | {r['degree']}")
+
+
+if __name__ == '__main__':
+    main()
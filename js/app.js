@@ -582,6 +582,12 @@ function parseDaySerial(value) {
     return Math.floor(parsed.getTime() / 86400000);
 }
 
+// رقم اليوم المحسوب مسبقًا في ملفات التفاصيل (يوم_القبول، يوم_التخرج ...)، وإلا تحليل نص التاريخ
+function detailDaySerial(row, serialKey, value) {
+    const serial = parseInt(row[serialKey], 10);
+    return Number.isFinite(serial) ? serial : parseDaySerial(value);
+}
+
 async function applyAverageGraduationDurationFromDetails(rows) {
     const csvText = await fetchTextIfExists(`data/graduates_detail.csv?t=${Date.now()}`);
     if (!csvText) return { applied: false, reason: 'missing-graduates-detail' };
@@ -600,8 +606,8 @@ async function applyAverageGraduationDurationFromDetails(rows) {
         const program = normalizeSurveyProgramName(g['التخصص'] || g['Major_aName'] || g['program']);
         if (!year || !program) return;
 
-        const admissionDay = parseDaySerial(g['تاريخ_القبول'] || g['admission_date'] || g['AdmissionDate']);
-        const graduateDay = parseDaySerial(g['تاريخ_التخرج'] || g['grad_date'] || g['GraduationDate']);
+        const admissionDay = detailDaySerial(g, 'يوم_القبول', g['تاريخ_القبول'] || g['admission_date'] || g['AdmissionDate']);
+        const graduateDay = detailDaySerial(g, 'يوم_التخرج', g['تاريخ_التخرج'] || g['grad_date'] || g['GraduationDate']);
         if (admissionDay == null || graduateDay == null || graduateDay < admissionDay) return;
 
         const years = (graduateDay - admissionDay) / 365.25;
@@ -2957,9 +2963,9 @@ function analyticsParseGPA(value) {
     return Number.isFinite(num) ? num : null;
 }
 
-function analyticsDurationYears(startValue, endValue) {
-    const start = parseDaySerial(startValue);
-    const end = parseDaySerial(endValue);
+function analyticsDurationYears(row) {
+    const start = detailDaySerial(row, 'يوم_القبول', row['تاريخ_القبول']);
+    const end = detailDaySerial(row, 'يوم_التخرج', row['تاريخ_التخرج']);
     if (start == null || end == null || end < start) return null;
     const years = (end - start) / 365.25;
     if (!Number.isFinite(years) || years < 0.2 || years > 15) return null;
@@ -3203,14 +3209,14 @@ function getAnalyticsSourceDefinitions() {
                     return values.length ? Math.max(...values) : null;
                 }, format: value => analyticsFormatDecimal(value, 2) },
                 { id: 'avg_study_duration', label: 'متوسط مدة الدراسة حتى التخرج', unit: 'سنة', compute: records => analyticsAverage(records, row =>
-                    analyticsDurationYears(row['تاريخ_القبول'], row['تاريخ_التخرج'])
+                    analyticsDurationYears(row)
                 ), format: value => analyticsFormatDecimal(value, 2) },
                 { id: 'ontime_expected_rate', label: 'الالتزام بموعد التخرج المتوقع', unit: '%', compute: records => {
                     let matched = 0;
                     let total = 0;
                     records.forEach(row => {
-                        const expected = parseDaySerial(row['تاريخ_التخرج_المتوقع']);
-                        const actual = parseDaySerial(row['تاريخ_التخرج']);
+                        const expected = detailDaySerial(row, 'يوم_التخرج_المتوقع', row['تاريخ_التخرج_المتوقع']);
+                        const actual = detailDaySerial(row, 'يوم_التخرج', row['تاريخ_التخرج']);
                         if (expected == null || actual == null) return;
                         total++;
                         if (actual <= expected) matched++;
@@ -0,0 +1,384 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+خدمة HTTP محلية للاستعلام عن مؤشرات الأداء من الذاكرة
+
+تُحمّل data.csv وgraduates_detail.csv وnon_completers.csv مرة واحدة (بنفس قراءة
+create_excel.read_data وتجميعاته)، ثم تُجاب الاستعلامات حسب البرنامج والدرجة والسنة
+والقسم من ذاكرة LRU لاستجابات JSON جاهزة ومضغوطة gzip. خيط مراقبة يعيد التحميل
+تلقائيًا عند تغير الملفات (بعد تشغيل extract_data.py) ويُفرغ الذاكرة.
+
+المسارات:
+    /kpis?program=&degree=&year=&dept=      صفوف البرامج مع النسب المحسوبة
+    /years                                  ملخص كل سنة (مجموع البرامج)
+    /programs                               قائمة البرامج وسنواتها
+    /cohort?kind=graduates|non_completers&program=&degree=&year=
+    /cohort/track?program=&degree=&year=    تتبع دفعة المستجدين (يتطلب students.db)
+    /health
+
+مثال:
+    python kpi_server.py --port 8765
+    curl --compressed "http://127.0.0.1:8765/kpis?program=الأنظمة&year=1447"
+"""
+
+import sys
+import os
+import json
+import gzip
+import time
+import hashlib
+import sqlite3
+import argparse
+import threading
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+
+import create_excel
+
+sys.stdout.reconfigure(encoding='utf-8')
+
+# ============================================================
+# الإعدادات
+# ============================================================
+SITE_DATA_DIR = os.path.join("KPI_TaifShare3h-main", "data")
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+CACHE_SIZE = 512
+RELOAD_INTERVAL = 1.0  # ثوانٍ بين فحوص تغير الملفات
+
+WATCHED_FILES = {
+    'data': 'data.csv',
+    'graduates': 'graduates_detail.csv',
+    'non_completers': 'non_completers.csv',
+}
+# مستودع الطلاب خارج مجلد الموقع (انظر student_warehouse.DEFAULT_DB)
+WAREHOUSE_DB = os.path.join("data", "students.db")
+
+# الحقول النصية في ملفات التفاصيل للتصفية
+DETAIL_FILTERS = {
+    'graduates': {'year': 'السنة', 'program': 'التخصص', 'degree': 'الدرجة', 'dept': 'القسم'},
+    'non_completers': {'year': 'آخر_سنة', 'program': 'التخصص', 'degree': 'الدرجة', 'dept': 'القسم'},
+}
+
+
+class QueryError(ValueError):
+    """معامل استعلام غير صالح (HTTP 400)"""
+
+
+def _short_year(value):
+    """'1447' أو '47' → 47"""
+    try:
+        return int(value) % 100
+    except (TypeError, ValueError):
+        raise QueryError(f"سنة غير صالحة: {value}")
+
+
+# ============================================================
+# اللقطة المحمّلة
+# ============================================================
+class Snapshot:
+    """نسخة ثابتة من البيانات؛ تُستبدل كاملة عند إعادة التحميل"""
+
+    def __init__(self, data_dir, version, db_path=WAREHOUSE_DB):
+        self.version = version
+        self.loaded_at = time.time()
+        self.rows = create_excel.read_data(os.path.join(data_dir, WATCHED_FILES['data']))
+        self.details = {
+            kind: create_excel.read_detail_rows(os.path.join(data_dir, WATCHED_FILES[kind]))
+            for kind in ('graduates', 'non_completers')
+        }
+        self.year_agg = create_excel.aggregate_by_year(self.rows)
+        self.programs = create_excel.group_programs(self.rows)
+        self.db_path = db_path if os.path.exists(db_path) else None
+
+
+def _with_rates(d):
+    row = dict(d)
+    row['retention_rate'] = create_excel.pct(d['students_retained'], d['prev_new_count'])
+    row['ontime_rate'] = create_excel.pct(d['graduates_ontime'], d['new_4_ago_count'])
+    row['male_pct'] = create_excel.pct(d['students_male'], d['students_total'])
+    row['female_pct'] = create_excel.pct(d['students_female'], d['students_total'])
+    row['intl_pct'] = create_excel.pct(d['students_international'], d['students_total'])
+    return row
+
+
+# ============================================================
+# الاستعلامات
+# ============================================================
+def query_kpis(snap, params):
+    year = _short_year(params['year']) if 'year' in params else None
+    out = []
+    for d in snap.rows:
+        if year is not None and d['sem'] != year:
+            continue
+        if 'program' in params and d['major'] != params['program']:
+            continue
+        if 'degree' in params and d['degree'] != params['degree']:
+            continue
+        if 'dept' in params and d['dept'] != params['dept']:
+            continue
+        out.append(_with_rates(d))
+    return out
+
+
+def query_years(snap, params):
+    out = []
+    for y in sorted(snap.year_agg):
+        a = snap.year_agg[y]
+        out.append({
+            'year': y, **a,
+            'retention_rate': create_excel.pct(a['retained'], a['prev_new']),
+            'ontime_rate': create_excel.pct(a['grads_ontime'], a['new_4_ago']),
+        })
+    return out
+
+
+def query_programs(snap, params):
+    return [
+        {'dept': dept, 'program': major, 'degree': degree,
+         'years': sorted(d['sem'] for d in rows)}
+        for (dept, major, degree), rows in sorted(snap.programs.items())
+    ]
+
+
+def query_cohort(snap, params):
+    kind = params.get('kind', 'graduates')
+    if kind not in DETAIL_FILTERS:
+        raise QueryError(f"نوع غير معروف: {kind}")
+    filters = []
+    for key, column in DETAIL_FILTERS[kind].items():
+        if key in params:
+            value = str(_short_year(params[key])) if key == 'year' else params[key]
+            filters.append((column, value))
+    return [r for r in snap.details[kind] if all(r.get(c) == v for c, v in filters)]
+
+
+def query_cohort_track(snap, params):
+    """مستجدو (برنامج، درجة، سنة) وحالتهم في كل سنة لاحقة من مستودع الطلاب"""
+    if snap.db_path is None:
+        raise QueryError("مستودع الطلاب غير موجود؛ شغّل student_warehouse.py --build")
+    for key in ('program', 'degree', 'year'):
+        if key not in params:
+            raise QueryError(f"المعامل {key} مطلوب")
+    year = _short_year(params['year'])
+    conn = sqlite3.connect(f"file:{snap.db_path}?mode=ro", uri=True)
+    try:
+        cohort = conn.execute(
+            "SELECT COUNT(*) FROM v_new_students WHERE year = ? AND program = ? AND degree = ?",
+            (year, params['program'], params['degree'])
+        ).fetchone()[0]
+        rows = conn.execute("""
+            SELECT sy.year, sy.status, sy.program = n.program AS same_program, COUNT(*)
+            FROM v_new_students n
+            JOIN student_year sy ON sy.student_id = n.student_id
+            JOIN year_sequence a ON a.year = sy.year
+            JOIN year_sequence b ON b.year = n.year
+            WHERE n.year = ? AND n.program = ? AND n.degree = ? AND a.position >= b.position
+            GROUP BY sy.year, sy.status, same_program
+            ORDER BY a.position
+        """, (year, params['program'], params['degree'])).fetchall()
+    finally:
+        conn.close()
+
+    by_year = OrderedDict()
+    for y, status, same_program, n in rows:
+        entry = by_year.setdefault(y, {'year': y, 'statuses': {}, 'other_program': 0})
+        entry['statuses'][status] = entry['statuses'].get(status, 0) + n
+        if not same_program:
+            entry['other_program'] += n
+    return {'cohort_size': cohort, 'years': list(by_year.values())}
+
+
+def query_health(snap, params):
+    return {
+        'version': snap.version,
+        'loaded_at': snap.loaded_at,
+        'rows': len(snap.rows),
+        'graduates': len(snap.details['graduates']),
+        'non_completers': len(snap.details['non_completers']),
+        'warehouse': snap.db_path is not None,
+    }
+
+
+ROUTES = {
+    '/kpis': query_kpis,
+    '/years': query_years,
+    '/programs': query_programs,
+    '/cohort': query_cohort,
+    '/cohort/track': query_cohort_track,
+    '/health': query_health,
+}
+
+
+# ============================================================
+# المخزن: اللقطة + ذاكرة LRU + إعادة التحميل
+# ============================================================
+class KPIStore:
+    def __init__(self, data_dir=SITE_DATA_DIR, cache_size=CACHE_SIZE, db_path=WAREHOUSE_DB):
+        self.data_dir = data_dir
+        self.db_path = db_path
+        self.cache_size = cache_size
+        self._lock = threading.Lock()
+        self._cache = OrderedDict()
+        self._stamps = self._file_stamps()
+        self.snapshot = Snapshot(data_dir, version=1, db_path=db_path)
+        self.hits = 0
+        self.misses = 0
+
+    def _file_stamps(self):
+        stamps = {}
+        paths = [os.path.join(self.data_dir, name) for name in WATCHED_FILES.values()]
+        for name in paths + [self.db_path]:
+            try:
+                st = os.stat(name)
+                stamps[name] = (st.st_size, st.st_mtime_ns)
+            except FileNotFoundError:
+                stamps[name] = None
+        return stamps
+
+    def reload_if_changed(self):
+        """إعادة التحميل إذا تغير أحد الملفات؛ ترجع True عند إعادة التحميل"""
+        stamps = self._file_stamps()
+        if stamps == self._stamps:
+            return False
+        snap = Snapshot(self.data_dir, version=self.snapshot.version + 1, db_path=self.db_path)
+        with self._lock:
+            self.snapshot = snap
+            self._stamps = stamps
+            self._cache.clear()
+        return True
+
+    def watch(self, interval=RELOAD_INTERVAL):
+        """خيط خلفي لمراقبة الملفات"""
+        def loop():
+            while True:
+                time.sleep(interval)
+                try:
+                    if self.reload_if_changed():
+                        print(f"  ↻ أُعيد تحميل البيانات (الإصدار {self.snapshot.version})")
+                except (OSError, ValueError, KeyError) as e:
+                    # ملف قيد الكتابة؛ يُعاد المحاولة في الفحص التالي
+                    print(f"  ⚠ تعذر إعادة التحميل: {e}")
+        t = threading.Thread(target=loop, name='kpi-reload', daemon=True)
+        t.start()
+        return t
+
+    def get(self, path, params):
+        """(body, gzip_body, etag) للاستعلام، من الذاكرة إن وُجد"""
+        snap = self.snapshot
+        key = (snap.version, path, tuple(sorted(params.items())))
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is not None:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return entry
+            self.misses += 1
+
+        result = ROUTES[path](snap, params)
+        body = json.dumps(result, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        entry = (body, gzip.compress(body, compresslevel=6, mtime=0),
+                 '"' + hashlib.sha1(body).hexdigest() + '"')
+
+        with self._lock:
+            if snap.version == self.snapshot.version:
+                self._cache[key] = entry
+                if len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        return entry
+
+
+# ============================================================
+# HTTP
+# ============================================================
+class KPIRequestHandler(BaseHTTPRequestHandler):
+    store = None
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        parts = urlsplit(self.path)
+        path = parts.path.rstrip('/') or '/'
+        params = {k: v[-1] for k, v in parse_qs(parts.query).items()}
+        if path not in ROUTES:
+            return self._send_error(404, f"مسار غير معروف: {path}")
+        try:
+            body, gz_body, etag = self.store.get(path, params)
+        except QueryError as e:
+            return self._send_error(400, str(e))
+        except sqlite3.Error as e:
+            # مستودع قديم المخطط أو تالف أو قيد إعادة البناء
+            return self._send_error(503, f"تعذر الاستعلام من مستودع الطلاب: {e}")
+
+        if self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        use_gzip = 'gzip' in (self.headers.get('Accept-Encoding') or '')
+        payload = gz_body if use_gzip else body
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(payload)))
+        self.send_header('ETag', etag)
+        self.send_header('Vary', 'Accept-Encoding')
+        self.send_header('Access-Control-Allow-Origin', '*')
+        if use_gzip:
+            self.send_header('Content-Encoding', 'gzip')
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _send_error(self, code, message):
+        payload = json.dumps({'error': message}, ensure_ascii=False).encode('utf-8')
+        self.send_response(code)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class KPIServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128  # الافتراضي 5 يُسقط الاتصالات تحت الحمل المتزامن
+
+
+def serve(store, host=DEFAULT_HOST, port=DEFAULT_PORT):
+    handler = type('Handler', (KPIRequestHandler,), {'store': store})
+    return KPIServer((host, port), handler)
+
+
+# ============================================================
+# المعالجة الرئيسية
+# ============================================================
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='خدمة HTTP محلية لمؤشرات الأداء')
+    parser.add_argument('--data-dir', default=SITE_DATA_DIR)
+    parser.add_argument('--db', default=WAREHOUSE_DB, help='مستودع الطلاب (student_warehouse.py)')
+    parser.add_argument('--host', default=DEFAULT_HOST)
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--cache-size', type=int, default=CACHE_SIZE)
+    parser.add_argument('--reload-interval', type=float, default=RELOAD_INTERVAL)
+    args = parser.parse_args(argv)
+
+    store = KPIStore(args.data_dir, args.cache_size, args.db)
+    store.watch(args.reload_interval)
+    server = serve(store, args.host, args.port)
+    print("=" * 70)
+    print(f"خدمة مؤشرات الأداء: http://{args.host}:{args.port}")
+    print(f"  {len(store.snapshot.rows)} صف | المسارات: {', '.join(ROUTES)}")
+    print("=" * 70)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
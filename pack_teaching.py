@@ -0,0 +1,309 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ترميز ملفات التدريس السنوية (teaching/years/<year>.json) بصيغة مضغوطة
+
+كل سجل في ملفات التدريس يكرر اسم المقرر ورمزه ونمط التدريس ونوع الدراسة
+والموقع داخل كل عنصر من cs. هذا السكربت يحوّل هذه القيم النصية المكررة إلى
+جداول قاموس لكل ملف مع مراجع رقمية، ويخزن السجلات بشكل أعمدة (أو صفوف)
+مع نسخ مضغوطة مسبقًا gzip/brotli، ويوفر قارئًا يعيد السجلات كما هي تمامًا.
+"""
+
+import sys
+import os
+import json
+import gzip
+import argparse
+
+try:
+    import brotli
+except ImportError:  # brotli اختياري
+    brotli = None
+
+sys.stdout.reconfigure(encoding='utf-8')
+
+# ============================================================
+# الإعدادات
+# ============================================================
+TEACHING_DIR = os.path.join("KPI_TaifShare3h-main", "data", "teaching")
+YEARS_DIR = os.path.join(TEACHING_DIR, "years")
+PACKED_DIR = os.path.join(TEACHING_DIR, "packed")
+
+PACKED_FORMAT = 'teaching-packed'
+PACKED_VERSION = 1
+
+# تخطيطات التخزين المدعومة
+LAYOUT_COLUMNS = 'columns'  # مصفوفة لكل حقل (الأصغر بعد الضغط)
+LAYOUT_ROWS = 'rows'        # مصفوفة قيم لكل سجل/شعبة
+LAYOUTS = (LAYOUT_COLUMNS, LAYOUT_ROWS)
+
+# مفتاح قائمة الشعب داخل كل سجل
+SECTIONS_KEY = 'cs'
+
+JSON_SEPARATORS = (',', ':')
+
+
+# ============================================================
+# الترميز
+# ============================================================
+class _StringTable:
+    """جدول قاموس: نص → رقم بترتيب أول ظهور"""
+
+    def __init__(self):
+        self.values = []
+        self._index = {}
+
+    def ref(self, value):
+        idx = self._index.get(value)
+        if idx is None:
+            idx = len(self.values)
+            self._index[value] = idx
+            self.values.append(value)
+        return idx
+
+
+def _schema(items, what):
+    """ترتيب المفاتيح الموحد لمجموعة عناصر (يجب أن تتطابق كل العناصر)"""
+    if not items:
+        return []
+    keys = list(items[0].keys())
+    for item in items:
+        if list(item.keys()) != keys:
+            raise ValueError(f"مفاتيح غير موحدة في {what}: {list(item.keys())} ≠ {keys}")
+    return keys
+
+
+def _string_fields(items, keys):
+    """الحقول التي كل قيمها نصوص (تُرمّز بالقاموس)"""
+    return [k for k in keys if all(isinstance(item[k], str) for item in items)]
+
+
+def _encode_items(items, keys, encoded, tables, layout):
+    """ترميز قائمة عناصر حسب التخطيط المطلوب"""
+    def cell(item, k):
+        v = item[k]
+        return tables[k].ref(v) if k in encoded else v
+
+    if layout == LAYOUT_COLUMNS:
+        return {k: [cell(item, k) for item in items] for k in keys}
+    return [[cell(item, k) for k in keys] for item in items]
+
+
+def encode_year(payload, layout=LAYOUT_COLUMNS):
+    """تحويل محتوى ملف سنة تدريس إلى الصيغة المرمّزة"""
+    if layout not in LAYOUTS:
+        raise ValueError(f"تخطيط غير معروف: {layout}")
+
+    records = payload['records']
+    sections = [c for rec in records for c in rec.get(SECTIONS_KEY, [])]
+
+    record_keys = [k for k in _schema(records, 'records') if k != SECTIONS_KEY]
+    section_keys = _schema(sections, SECTIONS_KEY)
+    record_encoded = _string_fields(records, record_keys)
+    section_encoded = _string_fields(sections, section_keys)
+
+    tables = {k: _StringTable() for k in record_encoded + section_encoded}
+    flat_records = [{k: rec[k] for k in record_keys} for rec in records]
+
+    packed = {
+        'format': PACKED_FORMAT,
+        'version': PACKED_VERSION,
+        'layout': layout,
+        'meta': {k: v for k, v in payload.items() if k != 'records'},
+        'record_keys': record_keys,
+        'section_keys': section_keys,
+        'encoded': sorted(tables.keys()),
+        'records': _encode_items(flat_records, record_keys, record_encoded, tables, layout),
+        'section_counts': [len(rec.get(SECTIONS_KEY, [])) for rec in records],
+        'sections': _encode_items(sections, section_keys, section_encoded, tables, layout),
+    }
+    packed['tables'] = {k: t.values for k, t in sorted(tables.items())}
+    return packed
+
+
+# ============================================================
+# فك الترميز
+# ============================================================
+def _decode_items(block, keys, tables, layout, count):
+    if layout == LAYOUT_COLUMNS:
+        columns = []
+        for k in keys:
+            col = block[k]
+            table = tables.get(k)
+            columns.append([table[i] for i in col] if table is not None else col)
+        return [dict(zip(keys, vals)) for vals in zip(*columns)] if keys else [{} for _ in range(count)]
+
+    out = []
+    for row in block:
+        out.append({
+            k: (tables[k][v] if k in tables else v)
+            for k, v in zip(keys, row)
+        })
+    return out
+
+
+def decode_year(packed):
+    """إعادة محتوى ملف السنة الأصلي من الصيغة المرمّزة"""
+    if packed.get('format') != PACKED_FORMAT:
+        raise ValueError("الملف ليس بصيغة teaching-packed")
+    if packed.get('version') != PACKED_VERSION:
+        raise ValueError(f"إصدار غير مدعوم: {packed.get('version')}")
+
+    layout = packed['layout']
+    tables = packed['tables']
+    counts = packed['section_counts']
+    record_keys = packed['record_keys']
+
+    flat = _decode_items(packed['records'], record_keys, tables, layout, len(counts))
+    sections = _decode_items(packed['sections'], packed['section_keys'], tables, layout, sum(counts))
+
+    records = []
+    pos = 0
+    for rec, n in zip(flat, counts):
+        rec = dict(rec)
+        rec[SECTIONS_KEY] = sections[pos:pos + n]
+        pos += n
+        records.append(rec)
+
+    payload = dict(packed['meta'])
+    payload['records'] = records
+    return payload
+
+
+# ============================================================
+# فهرس أعضاء هيئة التدريس (meta.json)
+# ============================================================
+def encode_faculty_index(faculty_index):
+    """ترميز faculty_index إلى أعمدة مع جداول للقسم والرتبة"""
+    ids = list(faculty_index.keys())
+    profiles = [faculty_index[i] for i in ids]
+    keys = _schema(profiles, 'faculty_index')
+    encoded = [k for k in _string_fields(profiles, keys) if k != 'n']
+    tables = {k: _StringTable() for k in encoded}
+    return {
+        'ids': ids,
+        'keys': keys,
+        'columns': _encode_items(profiles, keys, encoded, tables, LAYOUT_COLUMNS),
+        'tables': {k: t.values for k, t in sorted(tables.items())},
+    }
+
+
+def decode_faculty_index(packed_index):
+    """إعادة faculty_index الأصلي"""
+    profiles = _decode_items(
+        packed_index['columns'], packed_index['keys'], packed_index['tables'],
+        LAYOUT_COLUMNS, len(packed_index['ids'])
+    )
+    return dict(zip(packed_index['ids'], profiles))
+
+
+# ============================================================
+# القراءة والكتابة
+# ============================================================
+def dumps(obj):
+    return json.dumps(obj, ensure_ascii=False, separators=JSON_SEPARATORS)
+
+
+def read_bytes(path):
+    """قراءة ملف مع فك الضغط حسب الامتداد (.gz / .br)"""
+    with open(path, 'rb') as f:
+        raw = f.read()
+    if path.endswith('.gz'):
+        return gzip.decompress(raw)
+    if path.endswith('.br'):
+        if brotli is None:
+            raise RuntimeError("قراءة ملفات .br تتطلب مكتبة brotli")
+        return brotli.decompress(raw)
+    return raw
+
+
+def load_year(path):
+    """قراءة ملف سنة تدريس (أصلي أو مرمّز، مضغوط أو لا) وإرجاع السجلات الأصلية"""
+    payload = json.loads(read_bytes(path).decode('utf-8'))
+    if isinstance(payload, dict) and payload.get('format') == PACKED_FORMAT:
+        return decode_year(payload)
+    return payload
+
+
+def load_meta(path):
+    """قراءة meta.json (أصلي أو مرمّز) مع faculty_index بصيغته الأصلية"""
+    meta = json.loads(read_bytes(path).decode('utf-8'))
+    packed_index = meta.pop('faculty_index_packed', None)
+    if packed_index is not None:
+        meta['faculty_index'] = decode_faculty_index(packed_index)
+    return meta
+
+
+def write_variants(path, data, compress=True):
+    """كتابة الملف مع نسخ gzip/brotli بأقصى ضغط، وإرجاع الأحجام"""
+    sizes = {}
+    with open(path, 'wb') as f:
+        f.write(data)
+    sizes['raw'] = len(data)
+    if compress:
+        gz = gzip.compress(data, compresslevel=9, mtime=0)
+        with open(path + '.gz', 'wb') as f:
+            f.write(gz)
+        sizes['gz'] = len(gz)
+        if brotli is not None:
+            br = brotli.compress(data, quality=11)
+            with open(path + '.br', 'wb') as f:
+                f.write(br)
+            sizes['br'] = len(br)
+    return sizes
+
+
+# ============================================================
+# المعالجة الرئيسية
+# ============================================================
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='ترميز ملفات التدريس السنوية بصيغة مضغوطة')
+    parser.add_argument('--src', default=TEACHING_DIR, help='مجلد teaching المصدر')
+    parser.add_argument('--out', default=PACKED_DIR, help='مجلد الإخراج')
+    parser.add_argument('--layout', choices=LAYOUTS, default=LAYOUT_COLUMNS)
+    parser.add_argument('--no-compress', action='store_true', help='بدون نسخ .gz/.br')
+    args = parser.parse_args(argv)
+
+    years_dir = os.path.join(args.src, 'years')
+    os.makedirs(args.out, exist_ok=True)
+
+    print("=" * 70)
+    print(f"ترميز ملفات التدريس: {years_dir} → {args.out} (تخطيط: {args.layout})")
+    if brotli is None and not args.no_compress:
+        print("  تنبيه: مكتبة brotli غير متوفرة، سيتم إنتاج .gz فقط")
+    print("=" * 70)
+
+    for fname in sorted(f for f in os.listdir(years_dir) if f.endswith('.json')):
+        src_path = os.path.join(years_dir, fname)
+        with open(src_path, 'r', encoding='utf-8') as f:
+            payload = json.load(f)
+
+        packed = encode_year(payload, args.layout)
+        if decode_year(packed) != payload:
+            raise RuntimeError(f"فشل التحقق من إعادة البناء: {fname}")
+
+        out_path = os.path.join(args.out, fname)
+        sizes = write_variants(out_path, dumps(packed).encode('utf-8'), not args.no_compress)
+        src_size = os.path.getsize(src_path)
+        extra = ', '.join(f"{k}={v:,}" for k, v in sizes.items() if k != 'raw')
+        print(f"  {fname}: {src_size:,} → {sizes['raw']:,} بايت"
+              f" ({sizes['raw'] / src_size:.0%}){' | ' + extra if extra else ''}")
+
+    meta_path = os.path.join(args.src, 'meta.json')
+    if os.path.exists(meta_path):
+        with open(meta_path, 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        original = dict(meta)
+        if 'faculty_index' in meta:
+            meta['faculty_index_packed'] = encode_faculty_index(meta.pop('faculty_index'))
+        out_path = os.path.join(args.out, 'meta.json')
+        sizes = write_variants(out_path, dumps(meta).encode('utf-8'), not args.no_compress)
+        if load_meta(out_path) != original:
+            raise RuntimeError("فشل التحقق من إعادة بناء meta.json")
+        print(f"  meta.json: {os.path.getsize(meta_path):,} → {sizes['raw']:,} بايت")
+
+    print("\nتم الانتهاء بنجاح!")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,344 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+تقارير البرامج الجاهزة للطباعة (HTML لكل برنامج، صفحة A4 لكل سنة)
+
+بديل خادمي لتصدير PDF في المتصفح (exportSectionAsPDF يحوّل الصفحة إلى صورة واحدة):
+التقرير نص ورسوم SVG متجهة، فيبقى قابلًا للبحث والنسخ وصغير الحجم، ويُطبع إلى PDF
+مباشرة من أي متصفح. المؤشرات تُقرأ من INDICATORS_UG / INDICATORS_PG في js/app.js
+وتُحسب بنفس منطق calcKPIs من data.csv.
+
+تُبنى التقارير بالتوازي، ولا يُعاد بناء تقرير برنامج إلا إذا تغيرت بصمة بياناته
+(صفوفه في data.csv وتعريفات المؤشرات وإصدار القالب).
+
+مثال:
+    python program_reports.py
+    python program_reports.py --force --workers 4
+"""
+
+import sys
+import os
+import re
+import csv
+import json
+import html
+import hashlib
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+
+from publish_data import write_if_changed
+
+sys.stdout.reconfigure(encoding='utf-8')
+
+# ============================================================
+# الإعدادات
+# ============================================================
+SITE_DIR = "KPI_TaifShare3h-main"
+DATA_CSV = os.path.join(SITE_DIR, "data", "data.csv")
+APP_JS = os.path.join(SITE_DIR, "js", "app.js")
+REPORTS_DIR = os.path.join(SITE_DIR, "data", "reports")
+STATE_NAME = '.reports_state.json'
+TEMPLATE_VERSION = 2
+
+BACHELOR_DEGREES = {'بكالوريوس'}
+UNSAFE_FILENAME = re.compile(r'[\\/:*?"<>|\s]+')
+
+# الأعمدة الرقمية المستخدمة في التقرير (كما يقرؤها parseFlatCSV ثم calcKPIs)
+NUMERIC_COLUMNS = (
+    'students_total', 'students_male', 'students_female', 'students_saudi',
+    'students_international', 'students_new', 'students_retained',
+    'graduates_total', 'graduates_ontime', 'prev_new_count', 'new_4_ago_count',
+    'faculty_total', 'faculty_published', 'research_count', 'citations',
+    'eval_courses', 'eval_experience', 'eval_employers', 'performance_rate',
+    'employment_rate', 'avg_time_to_graduate', 'eval_supervision', 'eval_services',
+)
+COUNT_ROWS = (
+    ('students_total', 'إجمالي الطلاب المنتظمين'),
+    ('students_male', 'الطلاب'),
+    ('students_female', 'الطالبات'),
+    ('students_saudi', 'السعوديون'),
+    ('students_international', 'غير السعوديين'),
+    ('students_new', 'المستجدون'),
+    ('graduates_total', 'الخريجون'),
+)
+
+
+# ============================================================
+# تعريفات المؤشرات من js/app.js
+# ============================================================
+_INDICATOR = re.compile(
+    r"\{\s*id:\s*(\d+),\s*code:\s*'([^']+)',\s*name:\s*\"([^\"]+)\",\s*unit:\s*\"([^\"]+)\",\s*key:\s*\"([^\"]+)\"([^}]*)\}"
+)
+_GRAD_ONLY = re.compile(r'gradOnly\s*:\s*true')
+
+
+def load_indicators(path=APP_JS):
+    """{'UG': [...], 'PG': [...]} كل عنصر {id, code, name, unit, key, grad_only}"""
+    with open(path, 'r', encoding='utf-8') as f:
+        source = f.read()
+    indicators = {}
+    for level in ('UG', 'PG'):
+        m = re.search(rf'const INDICATORS_{level} = \[(.*?)\];', source, re.S)
+        if not m:
+            raise ValueError(f"لم يُعثر على INDICATORS_{level} في {path}")
+        indicators[level] = [
+            {'id': int(i), 'code': code, 'name': name, 'unit': unit, 'key': key,
+             'grad_only': bool(_GRAD_ONLY.search(rest))}
+            for i, code, name, unit, key, rest in _INDICATOR.findall(m.group(1))
+        ]
+    return indicators
+
+
+# ============================================================
+# حساب المؤشرات (مطابق لـ calcKPIs في js/app.js)
+# ============================================================
+def _num(value):
+    try:
+        return float(value) if value not in ('', None) else None
+    except ValueError:
+        return None
+
+
+def pct(num, den):
+    if not den:
+        return None
+    return round((num or 0) / den * 1000) / 10
+
+
+def calc_kpis(d):
+    kpi = {
+        'experience_eval': d.get('eval_experience'),
+        'course_eval': d.get('eval_courses'),
+        'supervision_eval': d.get('eval_supervision'),
+        'services_satisfaction': d.get('eval_services'),
+        'employer_eval': d.get('eval_employers'),
+        'student_performance': d.get('performance_rate'),
+        'employment_rate': d.get('employment_rate'),
+        'graduation_rate': pct(d.get('graduates_ontime'), d.get('new_4_ago_count')),
+        'retention_rate': pct(d.get('students_retained'), d.get('prev_new_count')),
+        'avg_time_to_graduate': d.get('avg_time_to_graduate'),
+        'student_publication': None,
+        'patents': None,
+    }
+    detail = {}
+    if d.get('new_4_ago_count'):
+        detail['graduation_rate'] = f"{d.get('graduates_ontime') or 0:g} من {d['new_4_ago_count']:g}"
+    if d.get('prev_new_count'):
+        detail['retention_rate'] = f"{d.get('students_retained') or 0:g} من {d['prev_new_count']:g}"
+    kpi['dropout_rate'] = (round((100 - kpi['retention_rate']) * 10) / 10
+                           if kpi['retention_rate'] is not None else None)
+
+    faculty = d.get('faculty_total') or 0
+    students = d.get('students_total') or 0
+    kpi['student_faculty_ratio'] = f"1:{students / faculty:.1f}" if faculty > 0 and students > 0 else None
+    kpi['publication_pct'] = pct(d.get('faculty_published'), faculty) if faculty > 0 else None
+    kpi['research_per_faculty'] = (round((d.get('research_count') or 0) / faculty * 100) / 100
+                                   if faculty > 0 else None)
+    kpi['citations_per_faculty'] = (round((d.get('citations') or 0) / faculty * 10) / 10
+                                    if faculty > 0 else None)
+    return kpi, detail
+
+
+def fmt_kpi(value, unit):
+    if value is None:
+        return 'غير متوفر'
+    if unit == '%':
+        return f"{value:.1f}%"
+    if unit in ('درجة', 'سنة'):
+        return f"{float(value):.2f}"
+    return f"{value:g}" if isinstance(value, float) else str(value)
+
+
+# ============================================================
+# البيانات
+# ============================================================
+def read_programs(path=DATA_CSV):
+    """{(dept, major, degree): {year: row}} مع قيم رقمية لأعمدة NUMERIC_COLUMNS"""
+    programs = {}
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        for r in csv.DictReader(f, delimiter=';'):
+            row = {k: _num(r.get(k)) for k in NUMERIC_COLUMNS}
+            key = (r['Dept_aName'], r['Major_aName'], r['Degree_aName'])
+            programs.setdefault(key, {})[int(r['Semester'])] = row
+    return programs
+
+
+def report_filename(key):
+    dept, major, degree = key
+    return f"{UNSAFE_FILENAME.sub('_', f'{dept}_{major}_{degree}')}.html"
+
+
+def fingerprint(key, years, indicators):
+    payload = json.dumps([TEMPLATE_VERSION, key, sorted(years.items()), indicators],
+                         ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+# ============================================================
+# القالب
+# ============================================================
+STYLE = """
+@page { size: A4; margin: 15mm; }
+body { font-family: 'Tajawal', 'Arial', sans-serif; color: #222; margin: 0; }
+.page { page-break-after: always; break-after: page; }
+.page:last-child { page-break-after: auto; break-after: auto; }
+h1 { color: #0d6e6e; font-size: 20pt; margin: 0 0 4mm; }
+h2 { color: #0a5555; font-size: 13pt; margin: 6mm 0 2mm; }
+.meta { color: #555; margin-bottom: 4mm; }
+table { width: 100%; border-collapse: collapse; font-size: 10.5pt; }
+th { background: #0d6e6e; color: #fff; padding: 2mm; }
+td { border: 1px solid #ccc; padding: 1.6mm 2mm; }
+tr:nth-child(even) td { background: #f5f5f5; }
+td.num { text-align: center; white-space: nowrap; }
+td.na { color: #999; text-align: center; }
+.detail { color: #777; font-size: 9pt; }
+svg text { font-family: inherit; font-size: 9px; }
+"""
+
+
+def _trend_svg(years, field, color, width=520, height=150):
+    """رسم أعمدة SVG لقيمة عبر السنوات"""
+    points = [(y, years[y].get(field) or 0) for y in sorted(years)]
+    if not points:
+        return ''
+    top = max(v for _, v in points) or 1
+    bar_w = width / len(points)
+    parts = [f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height + 30}" '
+             f'viewBox="0 0 {width} {height + 30}">']
+    for i, (y, v) in enumerate(points):
+        h = v / top * height
+        x = i * bar_w + bar_w * 0.15
+        parts.append(f'<rect x="{x:.1f}" y="{height - h:.1f}" width="{bar_w * 0.7:.1f}" '
+                     f'height="{h:.1f}" fill="{color}"/>')
+        cx = i * bar_w + bar_w / 2
+        parts.append(f'<text x="{cx:.1f}" y="{height - h - 3:.1f}" text-anchor="middle">{v:g}</text>')
+        parts.append(f'<text x="{cx:.1f}" y="{height + 14}" text-anchor="middle">14{y:02d}</text>')
+    parts.append('</svg>')
+    return ''.join(parts)
+
+
+def render_program(key, years, indicators):
+    """HTML تقرير برنامج: صفحة لكل سنة ثم صفحة الاتجاهات"""
+    dept, major, degree = key
+    level = 'UG' if degree in BACHELOR_DEGREES else 'PG'
+    # كما في getIndicatorsForDegree: مؤشرات الدراسات العليا (gradOnly) لا تظهر للبكالوريوس
+    level_indicators = [ind for ind in indicators[level] if level == 'PG' or not ind['grad_only']]
+    esc = html.escape
+    pages = []
+    for y in sorted(years):
+        d = years[y]
+        kpi, detail = calc_kpis(d)
+        rows = []
+        for ind in level_indicators:
+            value = kpi.get(ind['key'])
+            text = fmt_kpi(value, ind['unit'])
+            extra = f'<div class="detail">({esc(detail[ind["key"]])})</div>' if ind['key'] in detail else ''
+            rows.append(f'<tr><td>{esc(ind["code"])}</td><td>{esc(ind["name"])}</td>'
+                        f'<td class="{"na" if value is None else "num"}">{esc(text)}{extra}</td></tr>')
+        counts = ''.join(
+            f'<tr><td>{esc(label)}</td><td class="num">{(d.get(field) or 0):g}</td></tr>'
+            for field, label in COUNT_ROWS
+        )
+        pages.append(f"""<section class="page">
+<h1>{esc(major)} — {esc(degree)}</h1>
+<div class="meta">القسم: {esc(dept)} | العام الجامعي 14{y:02d}هـ</div>
+<h2>مؤشرات الأداء الرئيسية</h2>
+<table><tr><th>الرمز</th><th>المؤشر</th><th>القيمة</th></tr>{''.join(rows)}</table>
+<h2>أعداد الطلاب</h2>
+<table><tr><th>البيان</th><th>العدد</th></tr>{counts}</table>
+</section>""")
+
+    pages.append(f"""<section class="page">
+<h1>{esc(major)} — {esc(degree)}: الاتجاهات</h1>
+<h2>إجمالي الطلاب المنتظمين</h2>{_trend_svg(years, 'students_total', '#0d8e8e')}
+<h2>الخريجون</h2>{_trend_svg(years, 'graduates_total', '#c9a227')}
+<h2>المستجدون</h2>{_trend_svg(years, 'students_new', '#3b82f6')}
+</section>""")
+
+    return f"""<!DOCTYPE html>
+<html lang="ar" dir="rtl">
+<head><meta charset="utf-8"><title>{esc(major)} — {esc(degree)}</title><style>{STYLE}</style></head>
+<body>
+{''.join(pages)}
+</body>
+</html>
+""".encode('utf-8')
+
+
+def _render_job(job):
+    key, years, indicators, path = job
+    write_if_changed(path, render_program(key, years, indicators))
+    return key, path, os.path.getsize(path)
+
+
+def render_index(programs, out_dir):
+    items = ''.join(
+        f'<li><a href="{html.escape(report_filename(k))}">{html.escape(k[1])} — {html.escape(k[2])}</a>'
+        f' <span class="meta">({html.escape(k[0])})</span></li>'
+        for k in sorted(programs)
+    )
+    page = (f'<!DOCTYPE html><html lang="ar" dir="rtl"><head><meta charset="utf-8">'
+            f'<title>تقارير البرامج</title><style>{STYLE}</style></head>'
+            f'<body><h1>تقارير البرامج</h1><ul>{items}</ul></body></html>\n')
+    write_if_changed(os.path.join(out_dir, 'index.html'), page.encode('utf-8'))
+
+
+# ============================================================
+# البناء التدريجي
+# ============================================================
+def build_reports(data_path=DATA_CSV, out_dir=REPORTS_DIR, workers=None, force=False):
+    """بناء تقارير البرامج التي تغيرت بياناتها؛ ترجع (المبنية [(key, path, size)], عدد غير المتغيرة)"""
+    os.makedirs(out_dir, exist_ok=True)
+    indicators = load_indicators()
+    programs = read_programs(data_path)
+
+    state_path = os.path.join(out_dir, STATE_NAME)
+    state = {}
+    if os.path.exists(state_path) and not force:
+        with open(state_path, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+
+    jobs = []
+    new_state = {}
+    for key, years in programs.items():
+        fname = report_filename(key)
+        digest = fingerprint(key, years, indicators)
+        new_state[fname] = digest
+        path = os.path.join(out_dir, fname)
+        if state.get(fname) != digest or not os.path.exists(path):
+            jobs.append((key, years, indicators, path))
+
+    built = []
+    if jobs:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            built = list(pool.map(_render_job, jobs))
+
+    # تقارير برامج لم تعد في data.csv (من المجلد نفسه، فتُحذف أيضًا مع --force أو دون ملف حالة)
+    for fname in os.listdir(out_dir):
+        if fname.endswith('.html') and fname != 'index.html' and fname not in new_state:
+            os.remove(os.path.join(out_dir, fname))
+
+    render_index(programs, out_dir)
+    write_if_changed(state_path, json.dumps(new_state, ensure_ascii=False, indent=1,
+                                            sort_keys=True).encode('utf-8'))
+    return built, len(programs) - len(jobs)
+
+
+# ============================================================
+# المعالجة الرئيسية
+# ============================================================
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='تقارير البرامج الجاهزة للطباعة (HTML/PDF)')
+    parser.add_argument('--out-dir', default=REPORTS_DIR)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--force', action='store_true', help='إعادة بناء كل التقارير')
+    args = parser.parse_args(argv)
+
+    built, unchanged = build_reports(out_dir=args.out_dir, workers=args.workers, force=args.force)
+    for key, path, size in built:
+        print(f"  ✓ {key[1]} ({key[2]}): {path} ({size:,} بايت)")
+    print(f"\nتم بناء {len(built)} تقرير، {unchanged} دون تغيير | الفهرس: {os.path.join(args.out_dir, 'index.html')}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+تجهيز ملفات البيانات المنشورة للموقع: نسخ مضغوطة مسبقًا (.gz / .br) وملف manifest
+
+لكل ملف بيانات منشور (data.csv، graduates_detail.csv، non_completers.csv، faculty.csv،
+ملفات التدريس ...) تُكتب نسخة gzip ونسخة brotli بأقصى ضغط، ويُسجّل الحجم وبصمة
+sha256 في data/manifest.json. الملفات التي لم تتغير بصمتها لا يُعاد كتابة نسخها
+المضغوطة، فتبقى ETags ثابتة بين عمليات النشر.
+"""
+
+import sys
+import os
+import json
+import gzip
+import hashlib
+import argparse
+
+try:
+    import brotli
+except ImportError:  # brotli اختياري
+    brotli = None
+
+sys.stdout.reconfigure(encoding='utf-8')
+
+# ============================================================
+# الإعدادات
+# ============================================================
+SITE_DATA_DIR = os.path.join("KPI_TaifShare3h-main", "data")
+MANIFEST_NAME = 'manifest.json'
+
+# امتدادات الملفات المنشورة
+PUBLISHED_EXTENSIONS = ('.csv', '.json')
+
+
+# ============================================================
+# أدوات
+# ============================================================
+def sha256_bytes(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def sha256_file(path):
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            h.update(block)
+    return h.hexdigest()
+
+
+def write_if_changed(path, data):
+    """كتابة البايتات فقط إذا اختلف المحتوى؛ ترجع True إذا كُتب الملف"""
+    if os.path.exists(path) and os.path.getsize(path) == len(data):
+        with open(path, 'rb') as f:
+            if f.read() == data:
+                return False
+    tmp = path + '.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(data)
+    os.replace(tmp, path)
+    return True
+
+
+def compress_variants(data):
+    """{'gz': bytes, 'br': bytes} بأقصى ضغط (br فقط إذا توفرت مكتبة brotli)"""
+    variants = {'gz': gzip.compress(data, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        variants['br'] = brotli.compress(data, quality=11)
+    return variants
+
+
+def published_files(root=SITE_DATA_DIR):
+    """المسارات النسبية لكل ملفات البيانات المنشورة تحت root"""
+    # الملفات والمجلدات المخفية (.pipeline_state.json، reports/.reports_state.json ...) حالة داخلية لا تُنشر
+    files = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = sorted(d for d in dirnames if not d.startswith('.'))
+        for fname in sorted(filenames):
+            if fname == MANIFEST_NAME or fname.startswith('.') or not fname.endswith(PUBLISHED_EXTENSIONS):
+                continue
+            files.append(os.path.relpath(os.path.join(dirpath, fname), root))
+    return [p.replace(os.sep, '/') for p in files]
+
+
+def load_manifest(root=SITE_DATA_DIR):
+    path = os.path.join(root, MANIFEST_NAME)
+    if not os.path.exists(path):
+        return {'files': {}}
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+# ============================================================
+# النشر
+# ============================================================
+def publish(root=SITE_DATA_DIR, verbose=True):
+    """إنتاج النسخ المضغوطة وتحديث manifest.json؛ ترجع (المحدّثة، غير المتغيرة)"""
+    previous = load_manifest(root).get('files', {})
+    entries = {}
+    updated, unchanged = [], []
+
+    for rel in published_files(root):
+        path = os.path.join(root, rel)
+        with open(path, 'rb') as f:
+            data = f.read()
+        digest = sha256_bytes(data)
+        prev = previous.get(rel)
+
+        siblings_ok = all(
+            os.path.exists(path + '.' + kind)
+            for kind in (prev or {}).get('variants', {})
+        )
+        if prev and prev.get('sha256') == digest and siblings_ok and (
+            brotli is None or 'br' in prev.get('variants', {})
+        ):
+            entries[rel] = prev
+            unchanged.append(rel)
+            continue
+
+        variants = {}
+        for kind, payload in compress_variants(data).items():
+            write_if_changed(path + '.' + kind, payload)
+            variants[kind] = {'size': len(payload), 'sha256': sha256_bytes(payload)}
+        entries[rel] = {'size': len(data), 'sha256': digest, 'variants': variants}
+        updated.append(rel)
+
+    # حذف نسخ مضغوطة يتيمة لملفات لم تعد موجودة
+    for rel in set(previous) - set(entries):
+        for kind in previous[rel].get('variants', {}):
+            orphan = os.path.join(root, rel) + '.' + kind
+            if os.path.exists(orphan):
+                os.remove(orphan)
+
+    manifest = {'version': 1, 'files': dict(sorted(entries.items()))}
+    manifest_data = json.dumps(manifest, ensure_ascii=False, indent=1).encode('utf-8')
+    write_if_changed(os.path.join(root, MANIFEST_NAME), manifest_data)
+
+    if verbose:
+        for rel in updated:
+            e = entries[rel]
+            sizes = ', '.join(f"{k}={v['size']:,}" for k, v in e['variants'].items())
+            print(f"  {rel}: {e['size']:,} بايت → {sizes}")
+        print(f"  محدّث: {len(updated)} | دون تغيير: {len(unchanged)}")
+    return updated, unchanged
+
+
+# ============================================================
+# المعالجة الرئيسية
+# ============================================================
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='نسخ مضغوطة مسبقًا وmanifest لملفات البيانات المنشورة')
+    parser.add_argument('--root', default=SITE_DATA_DIR)
+    args = parser.parse_args(argv)
+
+    print("=" * 70)
+    print(f"تجهيز ملفات النشر في {args.root}")
+    if brotli is None:
+        print("  تنبيه: مكتبة brotli غير متوفرة، سيتم إنتاج .gz فقط")
+    print("=" * 70)
+    publish(args.root)
+
+
+if __name__ == '__main__':
+    main()
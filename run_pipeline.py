@@ -0,0 +1,282 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+تشغيل مراحل تحديث البيانات كمخطط اعتماديات (DAG) مع كشف التغيير
+
+المراحل: ملفات الفصول XLS → data.csv / graduates_detail.csv / non_completers.csv
+→ KPI_Data_Complete.xlsx، وبالتوازي حزمة النشر المضغوطة (publish_data.py).
+تُتخطى المرحلة إذا لم تتغير بصمات مدخلاتها ومخرجاتها منذ آخر تشغيل ناجح،
+وتعمل المراحل المستقلة في الوقت نفسه. الأنماط تقبل ** لكل المجلدات الفرعية (كما
+يمشي publish_data.py مجلد الموقع)، والمراحل التي تكتب في مجلد تقرؤه مرحلة أخرى
+دون ملف مشترك تُرتب صراحة بـ after. البصمات محفوظة مع (الحجم، وقت التعديل)
+فلا يُعاد حساب بصمة ملف لم يتغير — تشغيل بدون تغيير ينتهي فورًا تقريبًا.
+"""
+
+import sys
+import os
+import glob
+import fnmatch
+import json
+import time
+import argparse
+import subprocess
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+from publish_data import sha256_file, write_if_changed
+
+sys.stdout.reconfigure(encoding='utf-8')
+
+# ============================================================
+# الإعدادات
+# ============================================================
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+SITE_DATA_DIR = os.path.join("KPI_TaifShare3h-main", "data")
+XLS_DIR = "data"
+# حالة المراحل داخلية فتُحفظ بجانب ملفات التصدير الخام لا في مجلد الموقع المنشور
+STATE_PATH = os.path.join(XLS_DIR, '.pipeline_state.json')
+
+
+def _site(*parts):
+    return os.path.join(SITE_DATA_DIR, *parts)
+
+
+def _script(name, *args):
+    return [sys.executable, os.path.join(SCRIPTS_DIR, name), *args]
+
+
+class Stage:
+    """مرحلة: مدخلات ومخرجات (مسارات أو أنماط glob) وأمر التشغيل، ومراحل تسبقها صراحة"""
+
+    def __init__(self, name, inputs, outputs, command, after=()):
+        self.name = name
+        self.inputs = inputs
+        self.outputs = outputs
+        self.command = command
+        self.deps = set(after)
+
+
+def default_stages():
+    """تعريف مراحل التحديث"""
+    return [
+        Stage(
+            'extract',
+            inputs=[
+                os.path.join(XLS_DIR, '*.xls'),
+                os.path.join(XLS_DIR, '*.xlsx'),
+                os.path.join(XLS_DIR, '*.csv'),
+                _site('new_all_plans.csv'),
+                _site('faculty.csv'),
+                _site('teaching', 'years', '*.json'),
+            ],
+            outputs=[
+                _site('data.csv'), _site('graduates_detail.csv'), _site('non_completers.csv'),
+                _site('student_flow.csv'), _site('gpa_distribution.csv'),
+                _site('graduates_search.idx'),
+                _site('partitions', 'graduates.index.json'),
+                _site('partitions', 'non_completers.index.json'),
+                _site('partitions', '*', '*.csv'),
+            ],
+            command=_script('extract_data.py', '--no-publish', '--partition-details'),
+        ),
+        Stage(
+            'workbook',
+            inputs=[_site('data.csv'), _site('graduates_detail.csv'), _site('non_completers.csv')],
+            outputs=[_site('KPI_Data_Complete.xlsx')],
+            command=_script('create_excel.py'),
+        ),
+        Stage(
+            'reports',
+            inputs=[_site('data.csv'), os.path.join('KPI_TaifShare3h-main', 'js', 'app.js')],
+            outputs=[_site('reports', 'index.html')],
+            command=_script('program_reports.py'),
+        ),
+        # كل ملفات .csv/.json التي ينشرها publish_data.py (partitions/ وteaching/packed/ ...)؛
+        # والتقارير تُكتب داخل المجلد نفسه فلا يُضغط قبل اكتمالها
+        Stage(
+            'bundle',
+            inputs=[_site('**', '*.csv'), _site('**', '*.json')],
+            outputs=[_site('manifest.json')],
+            command=_script('publish_data.py', '--root', SITE_DATA_DIR),
+            after=('reports',),
+        ),
+    ]
+
+
+# ============================================================
+# البصمات والحالة
+# ============================================================
+class FileHasher:
+    """بصمات sha256 مع تخزين مؤقت حسب (الحجم، وقت التعديل)"""
+
+    def __init__(self, cache):
+        self.cache = cache
+
+    def digest(self, path):
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            return None
+        stamp = [st.st_size, st.st_mtime_ns]
+        cached = self.cache.get(path)
+        if cached and cached[0] == stamp:
+            return cached[1]
+        h = sha256_file(path)
+        self.cache[path] = [stamp, h]
+        return h
+
+
+def expand(patterns, exclude=()):
+    paths = set()
+    for p in patterns:
+        # ** يشمل كل المجلدات الفرعية عدا المخفية (مثل published_files)
+        matches = glob.glob(p, recursive=True) if glob.has_magic(p) else [p]
+        paths.update(m for m in matches if os.path.basename(m) not in exclude)
+    return sorted(paths)
+
+
+def fingerprint(paths, hasher):
+    return {p: hasher.digest(p) for p in paths}
+
+
+def load_state(path=STATE_PATH):
+    if not os.path.exists(path):
+        return {'stages': {}, 'hashes': {}}
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_state(state, path=STATE_PATH):
+    data = json.dumps(state, ensure_ascii=False, indent=1, sort_keys=True).encode('utf-8')
+    write_if_changed(path, data)
+
+
+# ============================================================
+# التشغيل
+# ============================================================
+def _matches(path, pattern):
+    # في fnmatch تعبر * الفواصل، فيكفي حذف **/ ليطابق النمط أي عمق (ومنه الجذر)
+    pattern = os.path.normpath(pattern).replace('**' + os.sep, '')
+    return fnmatch.fnmatch(path, pattern)
+
+
+def link_stages(stages):
+    """الاعتماديات: المرحلة تعتمد على كل مرحلة تنتج أحد مدخلاتها (مع after الصريحة)"""
+    producers = {}
+    for st in stages:
+        for out in st.outputs:
+            producers[os.path.normpath(out)] = st.name
+    by_name = {st.name: st for st in stages}
+    for st in stages:
+        unknown = st.deps - set(by_name)
+        if unknown:
+            raise ValueError(f"المرحلة {st.name} تعتمد على مراحل غير معرّفة: {sorted(unknown)}")
+        for pattern in st.inputs:
+            for out, producer in producers.items():
+                if producer == st.name:
+                    continue
+                if _matches(out, pattern):
+                    st.deps.add(producer)
+    return by_name
+
+
+def _stage_inputs(st):
+    # مخرجات المرحلة نفسها (مثل manifest.json) لا تُعد من مدخلاتها
+    return expand(st.inputs, exclude={os.path.basename(o) for o in st.outputs})
+
+
+def run(stages, force=False, dry_run=False, max_workers=None):
+    """تشغيل المراحل حسب الاعتماديات؛ ترجع {المرحلة: 'ran'|'skipped'|'failed'|'blocked'}
+    وفي dry_run تكون المرحلة 'would-run' إذا تغيرت بصماتها أو ستُشغّل مرحلة تعتمد عليها"""
+    by_name = link_stages(stages)
+    state = load_state()
+    hasher = FileHasher(state.setdefault('hashes', {}))
+    results = {}
+    pending = dict(by_name)
+    running = {}
+
+    def ready(st):
+        return all(results.get(d) in ('ran', 'skipped', 'would-run') for d in st.deps)
+
+    def execute(st):
+        start = time.perf_counter()
+        proc = subprocess.run(st.command, capture_output=True, text=True, encoding='utf-8')
+        return proc, time.perf_counter() - start
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        while pending or running:
+            for name in list(pending):
+                st = pending[name]
+                if any(results.get(d) in ('failed', 'blocked') for d in st.deps):
+                    results[name] = 'blocked'
+                    del pending[name]
+                    print(f"  ⛔ {name}: متوقفة لفشل مرحلة سابقة")
+                    continue
+                if not ready(st):
+                    continue
+                del pending[name]
+
+                inputs = fingerprint(_stage_inputs(st), hasher)
+                outputs = fingerprint(expand(st.outputs), hasher)
+                prev = state['stages'].get(name, {})
+                unchanged = (
+                    prev.get('inputs') == inputs
+                    and prev.get('outputs') == outputs
+                    and all(outputs.values())
+                )
+                # في التشغيل التجريبي لم تتغير المدخلات بعد، لكن المرحلة السابقة ستغيّرها
+                upstream = any(results.get(d) == 'would-run' for d in st.deps)
+                if unchanged and not force and not upstream:
+                    results[name] = 'skipped'
+                    print(f"  ⏭  {name}: دون تغيير")
+                    continue
+                if dry_run:
+                    results[name] = 'would-run'
+                    print(f"  •  {name}: ستُشغّل ({' '.join(st.command[1:])})")
+                    continue
+                print(f"  ▶  {name}: بدء التشغيل")
+                running[pool.submit(execute, st)] = (st, inputs)
+
+            if not running:
+                continue
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for fut in done:
+                st, inputs = running.pop(fut)
+                proc, elapsed = fut.result()
+                if proc.returncode != 0:
+                    results[st.name] = 'failed'
+                    print(f"  ✖  {st.name}: فشلت ({elapsed:.1f} ث)\n{proc.stderr[-2000:]}")
+                    continue
+                results[st.name] = 'ran'
+                state['stages'][st.name] = {
+                    'inputs': inputs,
+                    'outputs': fingerprint(expand(st.outputs), hasher),
+                }
+                print(f"  ✔  {st.name}: اكتملت ({elapsed:.1f} ث)")
+
+    if not dry_run:
+        save_state(state)
+    return results
+
+
+# ============================================================
+# المعالجة الرئيسية
+# ============================================================
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='تشغيل مراحل تحديث البيانات مع كشف التغيير')
+    parser.add_argument('--force', action='store_true', help='تشغيل كل المراحل بغض النظر عن التغيير')
+    parser.add_argument('--dry-run', action='store_true', help='عرض المراحل التي ستُشغّل فقط')
+    parser.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args(argv)
+
+    print("=" * 70)
+    print("تشغيل مراحل تحديث البيانات")
+    print("=" * 70)
+    start = time.perf_counter()
+    results = run(default_stages(), force=args.force, dry_run=args.dry_run, max_workers=args.workers)
+    print(f"\nالمدة: {time.perf_counter() - start:.2f} ث")
+    if any(r in ('failed', 'blocked') for r in results.values()):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
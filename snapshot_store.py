@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+مخزن لقطات الفصول بترميز الفروق (delta encoding)
+
+ملفات الفصل الأول والثاني من السنة نفسها، والسنوات المتتالية، تتكرر فيها معظم
+السجلات بنفس الحقول. يحفظ المخزن السجل الأساسي لكل طالب مرة واحدة (أول ظهور)،
+ثم لكل (سنة، فصل) فقط: من دخل ومن خرج مقارنة باللقطة السابقة، والحقول التي تغيرت
+(الحالة، المعدل، التخصص ...) مقارنة بآخر حالة معروفة للطالب. فيتناسب الحجم مع
+التغيّر لا مع (عدد الطلاب × عدد الفصول)، ويُعاد بناء أي فصل بتطبيق الفروق.
+
+إذا تكرر رقم طالب في ملف الفصل نفسه يُعتمد أول سجل له في الفروق، وتُحفظ السجلات
+المكررة التالية كاملة مع لقطتها، فيُعيدها view كما هي (بعد سجلات الطلاب الآخرين).
+
+مثال:
+    python snapshot_store.py --build snapshots.json.gz
+    python snapshot_store.py --load snapshots.json.gz --view 47 1
+"""
+
+import sys
+import os
+import json
+import gzip
+import argparse
+from bisect import bisect_right
+
+sys.stdout.reconfigure(encoding='utf-8')
+
+# ============================================================
+# الإعدادات
+# ============================================================
+DEFAULT_PATH = os.path.join("KPI_TaifShare3h-main", "data", "snapshots.json.gz")
+STORE_VERSION = 2
+
+# حقول سجل الطالب كما تُنتجها دوال التحليل في extract_data (عدا الرقم الجامعي)
+FIELDS = (
+    'name', 'program', 'status', 'gender', 'age', 'nationality', 'degree',
+    'study_type', 'admission_date', 'expected_grad', 'grad_date', 'gpa', 'dept',
+)
+
+
+class SnapshotStore:
+    """لقطات (سنة، فصل) مرتبة، مع سجل أساسي لكل طالب وفروق لكل لقطة"""
+
+    def __init__(self):
+        self.snapshots = []   # [(year, semester)] بالترتيب
+        self.base = {}        # sid → [قيم FIELDS] عند أول ظهور
+        self.changes = {}     # sid → ([فهرس اللقطة], [{فهرس الحقل: القيمة}])
+        self.joined = []      # لكل لقطة: الطلاب الذين لم يكونوا في اللقطة السابقة
+        self.left = []        # لكل لقطة: طلاب اللقطة السابقة الغائبون عنها
+        self.duplicates = []  # لكل لقطة: [sid, قيم FIELDS] للسجلات المكررة بعد أول ظهور في الملف
+        self._current = {}    # sid → آخر حالة معروفة (قائمة قيم)، للبناء فقط
+        self._members = set()
+
+    # ── البناء ──
+    def add(self, year, semester, students):
+        """إضافة لقطة فصل (بعد اللقطات السابقة زمنيًا)"""
+        key = (year, semester)
+        if self.snapshots and key <= self.snapshots[-1]:
+            raise ValueError(f"اللقطة {key} ليست بعد {self.snapshots[-1]}")
+        idx = len(self.snapshots)
+        self.snapshots.append(key)
+
+        members = {}
+        duplicates = []
+        for s in students:
+            sid = s['student_id']
+            values = [s.get(f, '') for f in FIELDS]
+            if sid in members:
+                duplicates.append([sid, values])
+                continue
+            members[sid] = None
+            prev = self._current.get(sid)
+            if prev is None:
+                self.base[sid] = values
+            else:
+                diff = {i: v for i, (p, v) in enumerate(zip(prev, values)) if p != v}
+                if diff:
+                    idxs, deltas = self.changes.setdefault(sid, ([], []))
+                    idxs.append(idx)
+                    deltas.append(diff)
+            self._current[sid] = values
+
+        member_set = set(members)
+        self.duplicates.append(duplicates)
+        self.joined.append([sid for sid in members if sid not in self._members])
+        self.left.append(sorted(self._members - member_set))
+        self._members = member_set
+
+    # ── إعادة البناء ──
+    def index_of(self, year, semester):
+        try:
+            return self.snapshots.index((year, semester))
+        except ValueError:
+            raise KeyError((year, semester))
+
+    def members(self, idx):
+        """أرقام طلاب اللقطة idx بإعادة تطبيق الدخول/الخروج"""
+        present = {}
+        for i in range(idx + 1):
+            for sid in self.left[i]:
+                present.pop(sid, None)
+            present.update(dict.fromkeys(self.joined[i]))
+        return list(present)
+
+    def record(self, sid, idx):
+        """سجل الطالب كما كان في اللقطة idx (أو آخر حالة قبلها)"""
+        values = list(self.base[sid])
+        entry = self.changes.get(sid)
+        if entry:
+            idxs, deltas = entry
+            for diff in deltas[:bisect_right(idxs, idx)]:
+                for i, v in diff.items():
+                    values[i] = v
+        rec = dict(zip(FIELDS, values))
+        rec['student_id'] = sid
+        return rec
+
+    def view(self, year, semester):
+        """سجلات فصل كامل بنفس شكل ناتج parse_semester_file"""
+        idx = self.index_of(year, semester)
+        records = [self.record(sid, idx) for sid in self.members(idx)]
+        for sid, values in self.duplicates[idx]:
+            rec = dict(zip(FIELDS, values))
+            rec['student_id'] = sid
+            records.append(rec)
+        return records
+
+    def stats(self):
+        present = 0
+        members = set()
+        for joined, left in zip(self.joined, self.left):
+            members.difference_update(left)
+            members.update(joined)
+            present += len(members)
+        return {
+            'snapshots': len(self.snapshots),
+            'students': len(self.base),
+            'records_full': present + sum(map(len, self.duplicates)),
+            'duplicates': sum(map(len, self.duplicates)),
+            'membership_events': sum(map(len, self.joined)) + sum(map(len, self.left)),
+            'field_changes': sum(len(d) for _, deltas in self.changes.values() for d in deltas),
+        }
+
+    # ── الحفظ والتحميل ──
+    def to_json(self):
+        return {
+            'version': STORE_VERSION,
+            'fields': list(FIELDS),
+            'snapshots': [list(k) for k in self.snapshots],
+            'base': self.base,
+            'changes': {
+                sid: [[i, {str(f): v for f, v in d.items()}] for i, d in zip(idxs, deltas)]
+                for sid, (idxs, deltas) in self.changes.items()
+            },
+            'joined': self.joined,
+            'left': self.left,
+            'duplicates': self.duplicates,
+        }
+
+    @classmethod
+    def from_json(cls, data):
+        if data.get('version') != STORE_VERSION or tuple(data.get('fields', ())) != FIELDS:
+            raise ValueError("صيغة مخزن اللقطات غير مدعومة")
+        store = cls()
+        store.snapshots = [tuple(k) for k in data['snapshots']]
+        store.base = data['base']
+        store.changes = {
+            sid: ([i for i, _ in entries], [{int(f): v for f, v in d.items()} for _, d in entries])
+            for sid, entries in data['changes'].items()
+        }
+        store.joined = data['joined']
+        store.left = data['left']
+        store.duplicates = data['duplicates']
+        return store
+
+    def save(self, path=DEFAULT_PATH):
+        payload = json.dumps(self.to_json(), ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        opener = gzip.open if path.endswith('.gz') else open
+        with opener(path, 'wb') as f:
+            f.write(payload)
+        return os.path.getsize(path)
+
+    @classmethod
+    def load(cls, path=DEFAULT_PATH):
+        opener = gzip.open if path.endswith('.gz') else open
+        with opener(path, 'rb') as f:
+            return cls.from_json(json.loads(f.read().decode('utf-8')))
+
+
+def build_from_records(semester_records):
+    """semester_records: [(year, semester, students)] كما يجمعها extract_data.main"""
+    store = SnapshotStore()
+    for year, semester, students in sorted(semester_records, key=lambda r: (r[0], r[1])):
+        store.add(year, semester, students)
+    return store
+
+
+def build_from_exports(data_dir=None):
+    """تحليل ملفات الفصول مباشرة وبناء المخزن"""
+    import extract_data
+    data_dir = data_dir or extract_data.DATA_DIR
+    store = SnapshotStore()
+    year_files = extract_data.list_semester_files(data_dir)
+    for year in sorted(year_files):
+        for fname, semester in sorted(year_files[year], key=lambda x: x[1]):
+            store.add(year, semester, extract_data.parse_semester_file(os.path.join(data_dir, fname)))
+    return store
+
+
+# ============================================================
+# المعالجة الرئيسية
+# ============================================================
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='مخزن لقطات الفصول بترميز الفروق')
+    parser.add_argument('--build', metavar='PATH', help='بناء المخزن من ملفات الفصول وحفظه')
+    parser.add_argument('--load', metavar='PATH', help='تحميل مخزن محفوظ')
+    parser.add_argument('--view', nargs=2, type=int, metavar=('YEAR', 'SEMESTER'),
+                        help='إعادة بناء فصل وعرض ملخصه')
+    args = parser.parse_args(argv)
+
+    if args.build:
+        store = build_from_exports()
+        size = store.save(args.build)
+        print(f"تم حفظ {len(store.snapshots)} لقطة في {args.build} ({size:,} بايت)")
+    elif args.load:
+        store = SnapshotStore.load(args.load)
+    else:
+        parser.error('حدد --build أو --load')
+
+    st = store.stats()
+    print(f"  الطلاب: {st['students']:,} | السجلات الكاملة: {st['records_full']:,}")
+    print(f"  أحداث الدخول/الخروج: {st['membership_events']:,} | تغييرات الحقول: {st['field_changes']:,}")
+    if st['duplicates']:
+        print(f"  سجلات مكررة الرقم في ملف الفصل نفسه: {st['duplicates']:,}")
+
+    if args.view:
+        year, semester = args.view
+        records = store.view(year, semester)
+        statuses = {}
+        for r in records:
+            statuses[r['status']] = statuses.get(r['status'], 0) + 1
+        print(f"\n  فصل {semester} سنة {year}: {len(records):,} سجل")
+        for status, n in sorted(statuses.items(), key=lambda x: -x[1]):
+            print(f"    {status}: {n:,}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+مجموعات الطلاب كـ bitsets: قاموس أرقام صحيحة للأرقام الجامعية + عمليات بتية
+
+كل رقم جامعي يُعطى رقمًا صحيحًا متسلسلًا مرة واحدة، ثم تُمثّل مجموعات مثل
+(منتظمو الفصل الأول لسنة، الحاضرون، الخريجون، طلاب برنامج) كـ bitset، فيصبح
+حساب المستجدين والاستبقاء والتخرج بالوقت وغير المكملين عمليات & و| و- وعدّ بتات،
+بزمن وذاكرة لا يعتمدان على طول نص الرقم الجامعي.
+
+الخلفية الافتراضية أعداد Python الصحيحة؛ وتُستخدم pyroaring (Roaring bitmaps)
+تلقائيًا إذا كانت مثبتة.
+"""
+
+try:
+    from pyroaring import BitMap
+except ImportError:  # pyroaring اختياري
+    BitMap = None
+
+
+# ============================================================
+# قاموس الأرقام
+# ============================================================
+class IdDictionary:
+    """رقم جامعي ↔ رقم صحيح متسلسل"""
+
+    def __init__(self):
+        self.index = {}
+        self.keys = []
+
+    def encode(self, sid):
+        i = self.index.get(sid)
+        if i is None:
+            i = len(self.keys)
+            self.index[sid] = i
+            self.keys.append(sid)
+        return i
+
+    def get(self, sid):
+        return self.index.get(sid)
+
+    def decode(self, i):
+        return self.keys[i]
+
+    def __len__(self):
+        return len(self.keys)
+
+
+# ============================================================
+# bitset على أعداد Python الصحيحة
+# ============================================================
+class IntBitset:
+    """مجموعة أرقام صحيحة كبتات عدد صحيح واحد (نفس واجهة BitMap المستخدمة هنا)"""
+
+    __slots__ = ('bits',)
+
+    def __init__(self, bits=0):
+        self.bits = bits
+
+    @classmethod
+    def from_ints(cls, ints):
+        ints = list(ints)
+        if not ints:
+            return cls()
+        # البناء عبر bytearray: OR متكرر على عدد كبير يكلف O(n²)
+        buf = bytearray(max(ints) // 8 + 1)
+        for i in ints:
+            buf[i >> 3] |= 1 << (i & 7)
+        return cls(int.from_bytes(buf, 'little'))
+
+    def __and__(self, other):
+        return IntBitset(self.bits & other.bits)
+
+    def __or__(self, other):
+        return IntBitset(self.bits | other.bits)
+
+    def __sub__(self, other):
+        return IntBitset(self.bits & ~other.bits)
+
+    def __len__(self):
+        return self.bits.bit_count()
+
+    def __bool__(self):
+        return self.bits != 0
+
+    def __contains__(self, i):
+        return (self.bits >> i) & 1 == 1
+
+    def __eq__(self, other):
+        return isinstance(other, IntBitset) and self.bits == other.bits
+
+    def __iter__(self):
+        data = self.bits.to_bytes((self.bits.bit_length() + 7) // 8, 'little')
+        for byte_idx, byte in enumerate(data):
+            while byte:
+                low = byte & -byte
+                yield (byte_idx << 3) + low.bit_length() - 1
+                byte ^= low
+
+
+# ============================================================
+# الواجهة
+# ============================================================
+class StudentSets:
+    """مصنع bitsets مرتبط بقاموس أرقام واحد"""
+
+    def __init__(self, backend=None):
+        if backend is None:
+            backend = 'roaring' if BitMap is not None else 'int'
+        if backend == 'roaring' and BitMap is None:
+            raise ImportError("pyroaring غير مثبتة")
+        self.backend = backend
+        self.ids = IdDictionary()
+
+    def _make(self, ints):
+        if self.backend == 'roaring':
+            return BitMap(ints)
+        return IntBitset.from_ints(ints)
+
+    def empty(self):
+        return self._make(())
+
+    def of(self, sids):
+        """bitset من أرقام جامعية (تُضاف للقاموس عند الحاجة)"""
+        encode = self.ids.encode
+        return self._make(encode(sid) for sid in sids)
+
+    def union(self, sets):
+        result = self.empty()
+        for s in sets:
+            result = result | s
+        return result
+
+    def contains(self, bitset, sid):
+        """هل الرقم الجامعي في المجموعة (bitset قد يكون None)"""
+        i = self.ids.get(sid)
+        return bitset is not None and i is not None and i in bitset
+
+    def student_ids(self, bitset):
+        decode = self.ids.decode
+        return [decode(i) for i in bitset]
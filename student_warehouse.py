@@ -0,0 +1,342 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+مستودع SQLite لسجلات الطلاب الفصلية مع مؤشرات الأداء كـ Views
+
+يحمّل السجلات المستخرجة من ملفات الفصول مرة واحدة في قاعدة محلية مفتاحها
+(الرقم الجامعي، السنة، الفصل) مع فهارس على (السنة، التخصص، الدرجة) و(الرقم الجامعي، السنة)،
+ثم تُحسب المؤشرات الحالية (المنتظمون، المستجدون، الاستبقاء، الخريجون، التخرج بالوقت)
+عبر Views بنفس منهجية extract_data.main، فيصبح أي سؤال جديد استعلامًا بدل إعادة الاستخراج.
+
+مثال:
+    python student_warehouse.py --db students.db --build
+    python student_warehouse.py --db students.db --sql "SELECT COUNT(*) FROM v_sem1_enrolled
+        WHERE year = 47 AND student_id IN (SELECT student_id FROM v_new_students
+        WHERE year = 42 AND program = 'القراءات')"
+"""
+
+import sys
+import os
+import sqlite3
+import argparse
+
+import extract_data
+
+sys.stdout.reconfigure(encoding='utf-8')
+
+# ============================================================
+# الإعدادات
+# ============================================================
+# القاعدة فيها بيانات شخصية للطلاب، فتُحفظ بجانب ملفات التصدير الخام لا في مجلد الموقع المنشور
+DEFAULT_DB = os.path.join("data", "students.db")
+
+
+def _q(value):
+    """نص ثابت داخل SQL (للثوابت المعروفة فقط)"""
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+ENROLLED = _q(extract_data.ENROLLED_STATUS)
+GRADUATED = _q(extract_data.GRADUATED_STATUS)
+
+# ============================================================
+# المخطط
+# ============================================================
+SCHEMA = """
+DROP VIEW IF EXISTS v_program_kpis;
+DROP VIEW IF EXISTS v_new_students;
+DROP VIEW IF EXISTS v_sem1_enrolled;
+DROP VIEW IF EXISTS v_sem1;
+DROP TABLE IF EXISTS student_year;
+DROP TABLE IF EXISTS semester_records;
+DROP TABLE IF EXISTS year_sequence;
+DROP TABLE IF EXISTS cohort_window;
+DROP TABLE IF EXISTS dept_map;
+DROP TABLE IF EXISTS excluded_programs;
+
+-- سجل لكل (طالب، سنة، فصل) كما ورد في ملف الفصل
+-- degree: الدرجة بعد التطبيع (NULL إذا كانت غير معروفة)
+CREATE TABLE semester_records (
+    student_id     TEXT    NOT NULL,
+    year           INTEGER NOT NULL,
+    semester       INTEGER NOT NULL,
+    name           TEXT,
+    program        TEXT,
+    degree         TEXT,
+    degree_raw     TEXT,
+    dept           TEXT,
+    src_dept       TEXT,
+    status         TEXT,
+    gender         TEXT,
+    age            TEXT,
+    nationality    TEXT,
+    study_type     TEXT,
+    admission_date TEXT,
+    expected_grad  TEXT,
+    grad_date      TEXT,
+    gpa            TEXT,
+    PRIMARY KEY (student_id, year, semester)
+);
+CREATE INDEX idx_records_year_program_degree ON semester_records (year, program, degree);
+CREATE INDEX idx_records_student_year ON semester_records (student_id, year);
+
+CREATE TABLE year_sequence (
+    year      INTEGER PRIMARY KEY,
+    position  INTEGER NOT NULL,
+    prev_year INTEGER
+);
+
+-- سنة بداية دفعة التخرج بالوقت لكل (سنة، درجة) حسب get_year_n_before
+CREATE TABLE cohort_window (
+    year       INTEGER NOT NULL,
+    degree     TEXT    NOT NULL,
+    start_year INTEGER,
+    PRIMARY KEY (year, degree)
+);
+
+CREATE TABLE dept_map (program TEXT PRIMARY KEY, dept TEXT NOT NULL);
+CREATE TABLE excluded_programs (program TEXT PRIMARY KEY);
+"""
+
+# سجل السنة عبر كل الفصول كما في all_semesters_students:
+# أول فصل ظهر فيه الطالب، إلا إذا تخرج في أحد الفصول فآخر سجل تخرج
+DERIVED = f"""
+CREATE TABLE student_year AS
+SELECT student_id, year, semester, name, program, degree, dept, status,
+       gender, nationality, study_type, admission_date, expected_grad, grad_date, gpa
+FROM (
+    SELECT r.*, ROW_NUMBER() OVER (
+        PARTITION BY student_id, year
+        ORDER BY (status = {GRADUATED}) DESC,
+                 CASE WHEN status = {GRADUATED} THEN -semester ELSE semester END
+    ) AS rn
+    FROM semester_records r
+)
+WHERE rn = 1;
+CREATE INDEX idx_student_year_key ON student_year (student_id, year);
+CREATE INDEX idx_student_year_group ON student_year (year, program, degree);
+
+CREATE VIEW v_sem1 AS
+SELECT * FROM semester_records WHERE semester = 1;
+
+CREATE VIEW v_sem1_enrolled AS
+SELECT * FROM semester_records WHERE semester = 1 AND status = {ENROLLED};
+
+-- المستجدون: منتظم في فصل1 ولم يظهر في فصل1 للسنة السابقة (بأي حالة)
+CREATE VIEW v_new_students AS
+SELECT e.student_id, e.year, e.program, e.degree
+FROM v_sem1_enrolled e
+JOIN year_sequence ys ON ys.year = e.year
+WHERE ys.prev_year IS NOT NULL
+  AND EXISTS (
+      SELECT 1 FROM semester_records p
+      WHERE p.year = ys.prev_year AND p.semester = 1
+  )
+  AND NOT EXISTS (
+      SELECT 1 FROM semester_records p
+      WHERE p.student_id = e.student_id AND p.year = ys.prev_year AND p.semester = 1
+  );
+
+CREATE VIEW v_program_kpis AS
+WITH keys AS (
+    SELECT program, degree, year FROM v_sem1 WHERE degree IS NOT NULL
+    UNION
+    SELECT program, degree, year FROM student_year
+    WHERE status = {GRADUATED} AND degree IS NOT NULL
+),
+valid AS (
+    SELECT k.program, k.degree, k.year, ys.prev_year, cw.start_year
+    FROM keys k
+    JOIN year_sequence ys ON ys.year = k.year
+    LEFT JOIN cohort_window cw ON cw.year = k.year AND cw.degree = k.degree
+    WHERE k.program NOT IN (SELECT program FROM excluded_programs)
+      AND EXISTS (SELECT 1 FROM semester_records s WHERE s.year = k.year AND s.semester = 1)
+)
+SELECT
+    COALESCE(dm.dept, k.program) AS dept,
+    k.program,
+    k.degree,
+    k.year,
+    (SELECT COUNT(*) FROM v_sem1_enrolled e
+     WHERE e.year = k.year AND e.program = k.program AND e.degree = k.degree) AS students_total,
+    (SELECT COUNT(*) FROM v_sem1_enrolled e
+     WHERE e.year = k.year AND e.program = k.program AND e.degree = k.degree
+       AND e.gender = 'ذكر') AS students_male,
+    (SELECT COUNT(*) FROM v_sem1_enrolled e
+     WHERE e.year = k.year AND e.program = k.program AND e.degree = k.degree
+       AND e.gender = 'أنثى') AS students_female,
+    (SELECT COUNT(*) FROM v_sem1_enrolled e
+     WHERE e.year = k.year AND e.program = k.program AND e.degree = k.degree
+       AND e.nationality = 'سعودي') AS students_saudi,
+    (SELECT COUNT(*) FROM v_sem1_enrolled e
+     WHERE e.year = k.year AND e.program = k.program AND e.degree = k.degree
+       AND e.nationality != 'سعودي' AND e.nationality != '') AS students_international,
+    (SELECT COUNT(*) FROM v_new_students n
+     WHERE n.year = k.year AND n.program = k.program AND n.degree = k.degree) AS students_new,
+    (SELECT COUNT(*) FROM v_new_students n
+     WHERE n.year = k.prev_year AND n.program = k.program AND n.degree = k.degree
+       AND EXISTS (
+           SELECT 1 FROM v_sem1_enrolled e
+           WHERE e.student_id = n.student_id AND e.year = k.year
+             AND e.program = k.program AND e.degree = k.degree
+       )) AS students_retained,
+    (SELECT COUNT(*) FROM student_year g
+     WHERE g.year = k.year AND g.program = k.program AND g.degree = k.degree
+       AND g.status = {GRADUATED}) AS graduates_total,
+    (SELECT COUNT(*) FROM v_new_students n
+     WHERE n.year = k.start_year AND n.program = k.program AND n.degree = k.degree
+       AND EXISTS (
+           SELECT 1 FROM student_year g
+           JOIN year_sequence gy ON gy.year = g.year
+           WHERE g.student_id = n.student_id AND g.status = {GRADUATED}
+             AND gy.position > (SELECT position FROM year_sequence WHERE year = k.start_year)
+             AND gy.position <= (SELECT position FROM year_sequence WHERE year = k.year)
+       )) AS graduates_ontime,
+    (SELECT COUNT(*) FROM v_new_students n
+     WHERE n.year = k.prev_year AND n.program = k.program
+       AND n.degree = k.degree) AS prev_new_count,
+    (SELECT COUNT(*) FROM v_new_students n
+     WHERE n.year = k.start_year AND n.program = k.program
+       AND n.degree = k.degree) AS new_4_ago_count
+FROM valid k
+LEFT JOIN dept_map dm ON dm.program = k.program;
+"""
+
+KPI_COLUMNS = [
+    'dept', 'program', 'degree', 'year',
+    'students_total', 'students_male', 'students_female',
+    'students_saudi', 'students_international',
+    'students_new', 'students_retained',
+    'graduates_total', 'graduates_ontime',
+    'prev_new_count', 'new_4_ago_count',
+]
+
+
+# ============================================================
+# التحميل
+# ============================================================
+def _normalized_degree(raw):
+    """الدرجة بعد التطبيع، أو None إذا كانت غير معروفة (نفس شرط التجميع في main)"""
+    degree = extract_data.DEGREE_MAP.get(raw, raw)
+    if not degree or (degree == raw and degree not in extract_data.DEGREE_MAP.values()):
+        return None
+    return degree
+
+
+def _record_rows(semester_records):
+    for year, semester, students in semester_records:
+        for s in students:
+            program = s['program']
+            yield (
+                s['student_id'], year, semester,
+                s['name'], program,
+                _normalized_degree(s['degree']), s['degree'],
+                extract_data.DEPT_MAP.get(program, program), s.get('dept', ''),
+                s['status'], s['gender'], s['age'], s['nationality'],
+                s['study_type'], s['admission_date'], s['expected_grad'],
+                s['grad_date'], s['gpa'],
+            )
+
+
+def _config_rows():
+    seq = extract_data.YEAR_SEQUENCE
+    years = [(y, i, extract_data.get_previous_year(y)) for i, y in enumerate(seq)]
+    windows = [
+        (y, degree, extract_data.get_year_n_before(y, n))
+        for y in seq
+        for degree, n in extract_data.DEGREE_YEARS.items()
+    ]
+    return years, windows
+
+
+def build_warehouse(db_path, semester_records):
+    """إنشاء القاعدة من جديد وتحميل السجلات؛ semester_records: [(year, semester, students)]"""
+    conn = sqlite3.connect(db_path)
+    try:
+        conn.executescript(SCHEMA)
+        years, windows = _config_rows()
+        with conn:
+            conn.executemany("INSERT INTO year_sequence VALUES (?, ?, ?)", years)
+            conn.executemany("INSERT INTO cohort_window VALUES (?, ?, ?)", windows)
+            conn.executemany("INSERT INTO dept_map VALUES (?, ?)", extract_data.DEPT_MAP.items())
+            conn.executemany(
+                "INSERT INTO excluded_programs VALUES (?)",
+                [(p,) for p in extract_data.EXCLUDED_PROGRAMS]
+            )
+            cur = conn.executemany(
+                f"INSERT OR REPLACE INTO semester_records VALUES ({', '.join('?' * 18)})",
+                _record_rows(semester_records)
+            )
+            n = cur.rowcount
+        conn.executescript(DERIVED)
+        conn.execute("ANALYZE")
+        return n
+    finally:
+        conn.close()
+
+
+def build_from_exports(db_path, data_dir=extract_data.DATA_DIR):
+    """تحليل ملفات الفصول مباشرة وتحميلها في القاعدة"""
+    semester_records = []
+    year_files = extract_data.list_semester_files(data_dir)
+    for year in sorted(year_files):
+        for fname, semester in sorted(year_files[year], key=lambda x: x[1]):
+            students = extract_data.parse_semester_file(os.path.join(data_dir, fname))
+            semester_records.append((year, semester, students))
+    return build_warehouse(db_path, semester_records)
+
+
+# ============================================================
+# الاستعلام
+# ============================================================
+def connect(db_path=DEFAULT_DB):
+    conn = sqlite3.connect(db_path)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+
+def program_kpis(conn, year=None, program=None, degree=None):
+    """صفوف v_program_kpis مع تصفية اختيارية"""
+    sql = "SELECT * FROM v_program_kpis WHERE 1 = 1"
+    params = []
+    for col, val in (('year', year), ('program', program), ('degree', degree)):
+        if val is not None:
+            sql += f" AND {col} = ?"
+            params.append(val)
+    sql += " ORDER BY dept, program, degree, year"
+    return [dict(r) for r in conn.execute(sql, params)]
+
+
+# ============================================================
+# المعالجة الرئيسية
+# ============================================================
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='مستودع SQLite لسجلات الطلاب الفصلية')
+    parser.add_argument('--db', default=DEFAULT_DB)
+    parser.add_argument('--build', action='store_true', help='إعادة بناء القاعدة من ملفات الفصول')
+    parser.add_argument('--sql', help='استعلام مخصص')
+    parser.add_argument('--kpis', action='store_true', help='عرض v_program_kpis')
+    args = parser.parse_args(argv)
+
+    if args.build:
+        n = build_from_exports(args.db)
+        print(f"تم تحميل {n:,} سجل فصلي في {args.db}")
+
+    if args.sql or args.kpis:
+        conn = connect(args.db)
+        try:
+            if args.sql:
+                cur = conn.execute(args.sql)
+                print(' | '.join(d[0] for d in cur.description))
+                for row in cur:
+                    print(' | '.join(str(v) for v in row))
+            if args.kpis:
+                print(' | '.join(KPI_COLUMNS))
+                for row in program_kpis(conn):
+                    print(' | '.join(str(row[c]) for c in KPI_COLUMNS))
+        finally:
+            conn.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+قراءة بيانات التدريس السنوية (teaching/years/*.json) بشكل تدفقي ومتوازٍ
+
+بدل json.load للملف كاملًا ثم المرور على records[].cs[]، يقرأ هذا الملف السجلات
+واحدًا تلو الآخر (عبر ijson إن توفر، وإلا بقراءة مجزأة)، ويعالج السنوات في
+مجموعة عمليات متوازية، ويوفر مكررات على مستوى العضو والمقرر والشعبة لحساب
+الأعباء وعدد الشعب دون تحميل جميع السنوات في الذاكرة دفعة واحدة.
+"""
+
+import sys
+import os
+import json
+import argparse
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    import ijson
+except ImportError:  # ijson اختياري
+    ijson = None
+
+import pack_teaching
+
+sys.stdout.reconfigure(encoding='utf-8')
+
+# ============================================================
+# الإعدادات
+# ============================================================
+YEARS_DIR = pack_teaching.YEARS_DIR
+
+# حجم الجزء المقروء في كل مرة عند عدم توفر ijson
+CHUNK_SIZE = 64 * 1024
+
+SECTIONS_KEY = pack_teaching.SECTIONS_KEY
+
+# حقول السجل التي تُنسخ مع كل شعبة في iter_sections
+RECORD_FIELDS = ('fid', 'y', 's')
+
+
+# ============================================================
+# القراءة التدفقية لملف سنة واحدة
+# ============================================================
+def _iter_records_chunked(f, chunk_size=CHUNK_SIZE):
+    """قراءة عناصر مصفوفة records من ملف JSON مفتوح بأجزاء ثابتة الحجم"""
+    decoder = json.JSONDecoder()
+    buf = ''
+    # البحث عن بداية المصفوفة
+    marker = '"records"'
+    while True:
+        pos = buf.find(marker)
+        if pos != -1:
+            start = buf.find('[', pos + len(marker))
+            if start != -1:
+                buf = buf[start + 1:]
+                break
+        chunk = f.read(chunk_size)
+        if not chunk:
+            return
+        buf += chunk
+
+    while True:
+        buf = buf.lstrip().lstrip(',').lstrip()
+        if buf.startswith(']'):
+            return
+        try:
+            obj, end = decoder.raw_decode(buf)
+        except json.JSONDecodeError:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                raise
+            buf += chunk
+            continue
+        yield obj
+        buf = buf[end:]
+
+
+def iter_records(path):
+    """سجلات ملف سنة واحدة بالترتيب، دون تحميل الملف كاملًا
+
+    الملفات المرمّزة من pack_teaching (أو المضغوطة) تُفك مرة واحدة لأنها صغيرة أصلًا.
+    """
+    if path.endswith(('.gz', '.br')) or _is_packed(path):
+        yield from pack_teaching.load_year(path)['records']
+        return
+
+    if ijson is not None:
+        with open(path, 'rb') as f:
+            # use_float يعيد الأرقام العشرية float كما في json
+            yield from ijson.items(f, 'records.item', use_float=True)
+        return
+
+    with open(path, 'r', encoding='utf-8') as f:
+        yield from _iter_records_chunked(f)
+
+
+def _is_packed(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        head = f.read(64)
+    return f'"format":"{pack_teaching.PACKED_FORMAT}"' in head
+
+
+def iter_sections(path):
+    """كل شعبة في الملف مع fid والسنة والفصل من سجلها"""
+    for rec in iter_records(path):
+        base = {k: rec.get(k) for k in RECORD_FIELDS}
+        for c in rec.get(SECTIONS_KEY, []):
+            section = dict(base)
+            section.update(c)
+            yield section
+
+
+def iter_by_faculty(path):
+    """(fid, [سجلات العضو]) لسنة واحدة — يتجمع في الذاكرة على مستوى السنة فقط"""
+    grouped = defaultdict(list)
+    for rec in iter_records(path):
+        grouped[str(rec.get('fid', '')).strip()].append(rec)
+    yield from grouped.items()
+
+
+def iter_by_course(path):
+    """(رمز المقرر، [شعب المقرر]) لسنة واحدة"""
+    grouped = defaultdict(list)
+    for section in iter_sections(path):
+        grouped[str(section.get('cc', '')).strip()].append(section)
+    yield from grouped.items()
+
+
+# ============================================================
+# ملفات السنوات والمعالجة المتوازية
+# ============================================================
+def year_files(years_dir=YEARS_DIR):
+    """{السنة: المسار} لملفات years/*.json"""
+    files = {}
+    for fname in os.listdir(years_dir):
+        if fname.endswith('.json') and fname[:4].isdigit():
+            files[int(fname[:4])] = os.path.join(years_dir, fname)
+    return dict(sorted(files.items()))
+
+
+def map_years(func, paths, workers=None):
+    """تطبيق func(path) على ملفات السنوات في مجموعة عمليات، بترتيب المسارات
+
+    func يجب أن تكون دالة على مستوى الوحدة (قابلة للـ pickle).
+    """
+    paths = list(paths)
+    if workers == 1 or len(paths) <= 1:
+        return [func(p) for p in paths]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(func, paths))
+
+
+def summarize_year(path):
+    """ملخص عبء التدريس لسنة واحدة: لكل عضو ولكل مقرر"""
+    faculty = defaultdict(lambda: {'sections': 0, 'hours': 0, 'enrolled': 0})
+    courses = defaultdict(lambda: {'name': '', 'sections': 0, 'enrolled': 0})
+    year = None
+    sections_total = 0
+
+    for section in iter_sections(path):
+        year = year or section.get('y')
+        fid = str(section.get('fid', '')).strip()
+        code = str(section.get('cc', '')).strip()
+        enrolled = section.get('e') or 0
+        hours = section.get('h') or 0
+
+        f = faculty[fid]
+        f['sections'] += 1
+        f['hours'] += hours
+        f['enrolled'] += enrolled
+
+        c = courses[code]
+        c['name'] = c['name'] or section.get('cn', '')
+        c['sections'] += 1
+        c['enrolled'] += enrolled
+        sections_total += 1
+
+    return {
+        'year': year,
+        'sections_total': sections_total,
+        'faculty': dict(faculty),
+        'courses': dict(courses),
+    }
+
+
+def summarize_years(years_dir=YEARS_DIR, workers=None):
+    """ملخصات جميع السنوات بالتوازي: {السنة: ملخص}"""
+    files = year_files(years_dir)
+    results = map_years(summarize_year, files.values(), workers)
+    return dict(zip(files.keys(), results))
+
+
+# ============================================================
+# المعالجة الرئيسية
+# ============================================================
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='ملخص أعباء التدريس من ملفات السنوات')
+    parser.add_argument('--years-dir', default=YEARS_DIR)
+    parser.add_argument('--workers', type=int, default=None, help='عدد العمليات (1 = تسلسلي)')
+    args = parser.parse_args(argv)
+
+    print("=" * 70)
+    print(f"قراءة ملفات التدريس من {args.years_dir}"
+          f" ({'ijson' if ijson is not None else 'قراءة مجزأة'})")
+    print("=" * 70)
+
+    for year, summary in summarize_years(args.years_dir, args.workers).items():
+        fac = summary['faculty']
+        hours = sum(f['hours'] for f in fac.values())
+        print(f"\n  سنة {year}: شعب={summary['sections_total']:,} | أعضاء={len(fac):,}"
+              f" | مقررات={len(summary['courses']):,} | ساعات={hours:,}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+حساب عدد الشعب (sections_total / sections_male / sections_female) ومتوسط حجم الشعبة
+لكل برنامج وسنة من ملفات التدريس الفعلي
+
+الربط: رمز المقرر (cc) → البرنامج والدرجة عبر new_all_plans.csv (فهرس مبني مرة واحدة)،
+ثم درجة الشعبة (dg) يجب أن تطابق درجة البرنامج. الشعبة في مقر الطالبات
+(الموقع l يحتوي "طالبات") تُحتسب للإناث، وغيرها للذكور.
+"""
+
+import sys
+import os
+import csv
+from collections import defaultdict
+from functools import partial
+
+import teaching_reader
+
+sys.stdout.reconfigure(encoding='utf-8')
+
+# ============================================================
+# الإعدادات
+# ============================================================
+PLANS_CSV = os.path.join("KPI_TaifShare3h-main", "data", "new_all_plans.csv")
+YEARS_DIR = teaching_reader.YEARS_DIR
+
+# تطبيع الدرجة كما في normalizeDegree في js/app.js
+SECTION_DEGREE_MAP = {
+    'البكالوريوس': 'بكالوريوس',
+    'بكالوريوس': 'بكالوريوس',
+    'بكالوريوس انتساب': 'بكالوريوس',
+    'الماجستير': 'الماجستير',
+    'ماجستير': 'الماجستير',
+    'الدكتوراه': 'دكتوراه',
+    'دكتوراه': 'دكتوراه',
+}
+
+FEMALE_CAMPUS_MARKER = 'طالبات'
+
+
+def normalize_degree(degree):
+    d = str(degree or '').strip()
+    return SECTION_DEGREE_MAP.get(d, d)
+
+
+# ============================================================
+# فهرس المقررات
+# ============================================================
+def load_course_programs(plans_csv=PLANS_CSV):
+    """{رمز المقرر: [(البرنامج، الدرجة)]} من new_all_plans.csv"""
+    course_programs = defaultdict(list)
+    with open(plans_csv, 'r', encoding='utf-8-sig') as f:
+        for row in csv.DictReader(f, delimiter=';'):
+            code = (row.get('Code') or '').strip()
+            major = (row.get('Program') or '').strip()
+            degree = normalize_degree(row.get('Degree'))
+            if not code or not major or not degree:
+                continue
+            if (major, degree) not in course_programs[code]:
+                course_programs[code].append((major, degree))
+    return dict(course_programs)
+
+
+# ============================================================
+# عدّ الشعب لسنة واحدة
+# ============================================================
+def count_year_sections(path, course_programs):
+    """عدّ الشعب لملف سنة واحدة: {(البرنامج، الدرجة): إحصاءات} مع عدد غير المربوطة
+
+    كل عنصر cs في سجل العضو شعبة؛ لا يوجد رقم شعبة في الملفات يسمح بدمج التدريس المشترك.
+    """
+    counts = defaultdict(lambda: {'total': 0, 'male': 0, 'female': 0, 'enrolled': 0})
+    unmapped = 0
+    for section in teaching_reader.iter_sections(path):
+        degree = normalize_degree(section.get('dg'))
+        targets = [
+            (major, deg) for (major, deg) in course_programs.get(str(section.get('cc', '')).strip(), [])
+            if deg == degree
+        ]
+        if not targets:
+            unmapped += 1
+            continue
+        is_female = FEMALE_CAMPUS_MARKER in str(section.get('l') or '')
+        for target in targets:
+            c = counts[target]
+            c['total'] += 1
+            c['female' if is_female else 'male'] += 1
+            c['enrolled'] += section.get('e') or 0
+    return dict(counts), unmapped
+
+
+def compute_sections(years_dir=YEARS_DIR, plans_csv=PLANS_CSV, workers=None):
+    """إحصاءات الشعب لكل (البرنامج، الدرجة، السنة برقمين)
+
+    المقرر المشترك بين أكثر من برنامج تُحتسب شعبته لكل برنامج يدرسه.
+    """
+    course_programs = load_course_programs(plans_csv)
+    files = teaching_reader.year_files(years_dir)
+    results = teaching_reader.map_years(
+        partial(count_year_sections, course_programs=course_programs),
+        files.values(), workers
+    )
+
+    sections = {}
+    unmapped = {}
+    for year, (counts, n_unmapped) in zip(files.keys(), results):
+        short_year = year % 100
+        unmapped[short_year] = n_unmapped
+        for (major, degree), c in counts.items():
+            sections[(major, degree, short_year)] = {
+                'sections_total': c['total'],
+                'sections_male': c['male'],
+                'sections_female': c['female'],
+                'avg_class_size': round(c['enrolled'] / c['total'], 1) if c['total'] else '',
+            }
+    return sections, unmapped
@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+"""
+إعدادات مشتركة للاختبارات: مسار السكربتات، وملفات فصول صناعية صغيرة بصيغة
+تصدير النظام (HTML بامتداد .xls وترميز cp1256)
+"""
+
+import os
+import sys
+import random
+
+import pytest
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SITE_DATA_DIR = os.path.join(REPO_ROOT, 'data')
+sys.path.insert(0, REPO_ROOT)
+
+# ============================================================
+# ملفات الفصول الصناعية
+# ============================================================
+EXPORT_HEADER = (
+    'م', 'الرقم الجامعي', 'الاسم', 'التخصص', 'الحالة', 'الجنس', 'العمر', 'الجنسية',
+    'الدرجة العلمية', 'نوع الدراسة', 'تاريخ القبول', 'تاريخ التخرج المتوقع', 'تاريخ التخرج', 'المعدل',
+)
+# حقول سجل الطالب بترتيب أعمدة التصدير بعد العمود م
+EXPORT_FIELDS = (
+    'student_id', 'name', 'program', 'status', 'gender', 'age', 'nationality',
+    'degree', 'study_type', 'admission_date', 'expected_grad', 'grad_date', 'gpa',
+)
+SYNTHETIC_YEARS = (41, 42, 44, 45, 46, 47)
+# (التخصص، الدرجة، القسم)
+SYNTHETIC_PROGRAMS = (
+    ('الشريعة', 'البكالوريوس', 'الشريعة'),
+    ('الأنظمة', 'البكالوريوس', 'الأنظمة'),
+    ('القراءات', 'البكالوريوس', 'القراءات'),
+    ('الفقه', 'الماجستير', 'الشريعة'),
+)
+FIRST_NAMES = ('محمد', 'أحمد', 'عبدالله', 'فاطمة', 'نورة', 'إبراهيم', 'سارة', 'خالد')
+LAST_NAMES = ('العتيبي', 'الغامدي', 'الزهراني', 'القرشي', 'الحربي', 'الشهري')
+
+
+def _new_student(rng, sid, year):
+    program, degree, dept = rng.choice(SYNTHETIC_PROGRAMS)
+    return {
+        'student_id': str(sid),
+        'name': f"{rng.choice(FIRST_NAMES)} {rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+        'program': program,
+        'status': 'منتظم',
+        'gender': rng.choice(('ذكر', 'أنثى')),
+        'age': str(rng.randint(18, 30)),
+        'nationality': rng.choice(('سعودي', 'سعودي', 'سعودي', 'مصري', 'يمني')),
+        'degree': degree,
+        'study_type': 'انتظام',
+        'admission_date': f"14{year:02d}-01-{rng.randint(10, 28)}",
+        # يبقى فارغًا: ملف HTML يحذف الخلايا الفارغة فيُستنتج الحقل من موضعه
+        'expected_grad': '',
+        'grad_date': '',
+        'gpa': f"{rng.uniform(1.5, 5):.2f}",
+        'dept': dept,
+    }
+
+
+def make_semesters(seed=1, years=SYNTHETIC_YEARS, new_per_year=30):
+    """{(السنة، الفصل): [سجلات الطلاب بشكل ناتج parse_semester_file]} لدفعات متتالية"""
+    rng = random.Random(seed)
+    next_id = 441000000
+    active = []
+    semesters = {}
+    for year in years:
+        for _ in range(new_per_year):
+            next_id += rng.randint(1, 3)
+            active.append(_new_student(rng, next_id, year))
+        sem1, sem2, carried = [], [], []
+        for s in active:
+            sem1.append(dict(s))
+            s2 = dict(s)
+            r = rng.random()
+            if s['admission_date'] < f"14{year - 2:02d}" and r < 0.5:
+                s2['status'] = 'متخرج'
+                s2['grad_date'] = f"14{year:02d}-06-15"
+            elif r > 0.85:
+                s2['status'] = rng.choice(('منسحب', 'مطوي قيده', 'منقطع'))
+            sem2.append(s2)
+            if s2['status'] == 'منتظم':
+                if rng.random() < 0.05:
+                    program, degree, dept = rng.choice(SYNTHETIC_PROGRAMS)
+                    s2 = dict(s2, program=program, degree=degree, dept=dept)
+                carried.append(s2)
+        semesters[(year, 1)] = sem1
+        semesters[(year, 2)] = sem2
+        active = carried
+    return semesters
+
+
+def export_cells(i, s):
+    return [str(i)] + [s[f] for f in EXPORT_FIELDS]
+
+
+def write_html_export(path, students):
+    """ملف فصل بصيغة تصدير النظام: صف القسم ثم صف العناوين ثم الطلاب، لكل قسم"""
+    parts = ['<html><body><table>', '<tr><td>الكلية :</td><td>كلية الشريعة والأنظمة</td></tr>']
+    by_dept = {}
+    for s in students:
+        by_dept.setdefault(s['dept'], []).append(s)
+    i = 0
+    for dept, rows in by_dept.items():
+        parts.append(f'<tr><td>القسم :</td><td>{dept}</td></tr>')
+        parts.append('<tr>' + ''.join(f'<th>{h}</th>' for h in EXPORT_HEADER) + '</tr>')
+        for s in rows:
+            i += 1
+            parts.append('<tr>' + ''.join(f'<td>{c}</td>' for c in export_cells(i, s)) + '</tr>')
+    parts.append('</table></body></html>')
+    with open(path, 'wb') as f:
+        f.write('\n'.join(parts).encode('cp1256'))
+
+
+def write_semester_exports(data_dir, semesters):
+    """كتابة ملفات <سنة><فصل>.xls في data_dir"""
+    os.makedirs(data_dir, exist_ok=True)
+    for (year, semester), students in semesters.items():
+        write_html_export(os.path.join(data_dir, f"{year:02d}{semester}.xls"), students)
+
+
+@pytest.fixture
+def semesters():
+    return make_semesters()
+
+
+@pytest.fixture
+def workspace(tmp_path, monkeypatch, semesters):
+    """مجلد عمل بتخطيط المستودع: data/ لملفات الفصول وKPI_TaifShare3h-main/data للمخرجات"""
+    write_semester_exports(str(tmp_path / 'data'), semesters)
+    (tmp_path / 'KPI_TaifShare3h-main' / 'data').mkdir(parents=True)
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+"""الاستخراج المجزأ ثم الدمج (college_shards) يعطي مؤشرات الاستخراج الكامل نفسها"""
+
+import os
+import csv
+import json
+
+import pytest
+
+import extract_data
+import college_shards
+from conftest import write_semester_exports
+
+# أعمدة تأتي من ملفات التدريس وهيئة التدريس والمعدلات، ولا يحملها ملف الجزء
+NOT_IN_SHARDS = {
+    'sections_total', 'sections_male', 'sections_female', 'avg_class_size',
+    'faculty_total', 'faculty_phd', 'faculty_male', 'faculty_female',
+} | {c for c in extract_data.KPI_CSV_HEADERS if c.startswith('gpa_median_')}
+
+
+def _kpi_rows(path):
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        return [
+            {k: v for k, v in row.items() if k not in NOT_IN_SHARDS}
+            for row in csv.DictReader(f, delimiter=';')
+        ]
+
+
+def _config(workspace, name, data_dir, college=None):
+    path = str(workspace / f'{name}.json')
+    config = {'name': name, 'data_dir': data_dir}
+    if college:
+        config['college'] = college
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(config, f, ensure_ascii=False)
+    return college_shards.load_config(path)
+
+
+@pytest.fixture
+def full_extract(workspace):
+    extract_data.main(publish_outputs=False)
+    return _kpi_rows(extract_data.OUTPUT_CSV)
+
+
+def test_single_shard_matches_extract_data(workspace, full_extract):
+    config = _config(workspace, 'sharia', 'data')
+    shard_path = college_shards.extract_shard(config, 'shards')
+    written = college_shards.merge_shards([shard_path], 'shards')
+
+    university = os.path.join('shards', college_shards.UNIVERSITY_DIR, 'data.csv')
+    assert written[university] == len(full_extract)
+    assert _kpi_rows(university) == full_extract
+    assert _kpi_rows(os.path.join('shards', 'sharia', 'data.csv')) == full_extract
+    assert _kpi_rows(os.path.join('shards', college_shards.COLLEGES_DIR, 'sharia', 'data.csv')) == full_extract
+
+
+def test_split_shards_merge_to_full_extract(workspace, semesters, full_extract):
+    # الأجزاء حسب القسم: الطالب المحوَّل بين برنامجين ينتقل بين جزأين
+    first = {(y, s): [r for r in rows if r['dept'] == 'الشريعة'] for (y, s), rows in semesters.items()}
+    second = {(y, s): [r for r in rows if r['dept'] != 'الشريعة'] for (y, s), rows in semesters.items()}
+    write_semester_exports(str(workspace / 'first'), first)
+    write_semester_exports(str(workspace / 'second'), second)
+
+    paths = [
+        college_shards.extract_shard(_config(workspace, 'first', 'first', 'الكلية أ'), 'shards'),
+        college_shards.extract_shard(_config(workspace, 'second', 'second', 'الكلية ب'), 'shards'),
+    ]
+    college_shards.merge_shards(paths, 'shards')
+
+    assert _kpi_rows(os.path.join('shards', college_shards.UNIVERSITY_DIR, 'data.csv')) == full_extract
+    colleges = [
+        _kpi_rows(os.path.join('shards', college_shards.COLLEGES_DIR, college, 'data.csv'))
+        for college in ('الكلية أ', 'الكلية ب')
+    ]
+    assert all(colleges)
+    assert sorted(r['Major_aName'] for r in colleges[0]) != sorted(r['Major_aName'] for r in colleges[1])
+
+
+def test_shard_requires_name_and_data_dir(tmp_path):
+    path = str(tmp_path / 'bad.json')
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'name': 'x'}, f)
+    with pytest.raises(ValueError):
+        college_shards.load_config(path)
@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+"""طبقة التصحيحات (data/corrections.csv) وسجل تدقيقها والصفوف المتأثرة في data.csv"""
+
+import csv
+import copy
+from collections import defaultdict
+
+import pytest
+
+import extract_data
+
+COLUMNS = ';'.join(extract_data.CORRECTION_COLUMNS)
+
+
+def _write_corrections(path, lines):
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('\n'.join([COLUMNS] + lines) + '\n')
+    return str(path)
+
+
+def _aggregate(semesters):
+    sem1_students = defaultdict(dict)
+    all_semesters_students = defaultdict(dict)
+    for (year, semester), students in sorted(semesters.items()):
+        extract_data.add_semester_records(sem1_students, all_semesters_students, year, semester, students)
+    return extract_data.aggregate_kpis(sem1_students, all_semesters_students, verbose=False)
+
+
+def _overlay(semesters, corrections):
+    audit, affected = [], set()
+    corrected = {
+        key: extract_data.apply_corrections(students, key[0], key[1], corrections, audit, affected)
+        for key, students in semesters.items()
+    }
+    return corrected, audit, affected
+
+
+def test_load_corrections(tmp_path):
+    path = _write_corrections(tmp_path / 'corrections.csv', [
+        '441000010;1446;1;status;منتظم;خطأ إدخال',
+        '441000010;46;1;gpa; 3.10 ;',
+        '441000011;47;2;program;الأنظمة;تحويل',
+    ])
+    corrections = extract_data.load_corrections(path)
+    assert corrections[(46, 1)]['441000010'] == [('status', 'منتظم', 'خطأ إدخال'), ('gpa', '3.10', '')]
+    assert corrections[(47, 2)]['441000011'] == [('program', 'الأنظمة', 'تحويل')]
+    assert extract_data.load_corrections(str(tmp_path / 'missing.csv')) == {}
+
+
+@pytest.mark.parametrize('line', ['441000010;1446;1;student_id;1;', '441000010;السنة;1;gpa;3;'])
+def test_load_corrections_rejects_bad_rows(tmp_path, line):
+    path = _write_corrections(tmp_path / 'corrections.csv', [line])
+    with pytest.raises(ValueError):
+        extract_data.load_corrections(path)
+
+
+def test_overlay_equals_corrected_exports(semesters, tmp_path):
+    year, semester = 45, 1
+    moved, withdrawn, same = semesters[(year, semester)][:3]
+    target = next(p for p in ('الشريعة', 'الأنظمة', 'القراءات') if p != moved['program'])
+    path = _write_corrections(tmp_path / 'corrections.csv', [
+        f"{moved['student_id']};14{year};{semester};program;{target};تحويل",
+        f"{withdrawn['student_id']};{year};{semester};status;منسحب;",
+        f"{same['student_id']};{year};{semester};gender;{same['gender']};",
+        f"999999999;{year};{semester};status;منتظم;",
+        f"{moved['student_id']};43;1;status;منتظم;",
+    ])
+    corrections = extract_data.load_corrections(path)
+    original = copy.deepcopy(semesters)
+    corrected, audit, affected = _overlay(semesters, corrections)
+    extract_data.audit_missing_files(corrections, set(semesters), audit)
+
+    # السجلات الأصلية لا تُعدّل
+    assert semesters == original
+    results = {(row[0], row[3]): row[-1] for row in audit}
+    assert results == {
+        (moved['student_id'], 'program'): 'applied',
+        (withdrawn['student_id'], 'status'): 'applied',
+        (same['student_id'], 'gender'): 'unchanged',
+        ('999999999', 'status'): 'student not found',
+        (moved['student_id'], 'status'): 'file not found',
+    }
+    # الصف القديم والجديد للطالب المحوَّل كلاهما متأثر
+    degree = extract_data.DEGREE_MAP.get(moved['degree'], moved['degree'])
+    assert {(year, moved['program'], degree), (year, target, degree)} <= affected
+
+    # التطبيق على السجلات المحللة يساوي تعديل ملف الفصل نفسه
+    edited = copy.deepcopy(semesters)
+    for s in edited[(year, semester)]:
+        if s['student_id'] == moved['student_id']:
+            s['program'] = target
+        if s['student_id'] == withdrawn['student_id']:
+            s['status'] = 'منسحب'
+    assert _aggregate(corrected) == _aggregate(edited)
+
+
+def test_affected_rows_cover_every_changed_row(semesters):
+    baseline = _aggregate(semesters)
+    changed_total = 0
+    for year, semester in ((44, 1), (42, 2), (46, 1)):
+        for student in semesters[(year, semester)][:6:2]:
+            corrections = defaultdict(lambda: defaultdict(list))
+            new_status = 'منسحب' if student['status'] == extract_data.ENROLLED_STATUS else 'متخرج'
+            corrections[(year, semester)][student['student_id']].append(('status', new_status, ''))
+            corrected, _, affected = _overlay(semesters, corrections)
+            after = _aggregate(corrected)
+
+            changed = {
+                (d['semester'], d['prog'], d['degree'])
+                for key, d in after.items() if baseline.get(key) != d
+            } | {
+                (d['semester'], d['prog'], d['degree'])
+                for key, d in baseline.items() if key not in after
+            }
+            flagged = set(extract_data.affected_kpi_rows(affected, {**baseline, **after}))
+            assert changed <= flagged, (year, semester, student['student_id'])
+            changed_total += len(changed)
+    assert changed_total
+
+
+def test_main_writes_audit(workspace, semesters):
+    sid = semesters[(47, 1)][0]['student_id']
+    _write_corrections(workspace / 'data' / 'corrections.csv', [f"{sid};1447;1;status;منسحب;"])
+    extract_data.main(publish_outputs=False)
+    with open(extract_data.CORRECTIONS_AUDIT, 'r', encoding='utf-8', newline='') as f:
+        rows = list(csv.reader(f, delimiter=';'))
+    assert rows[0] == extract_data.AUDIT_COLUMNS
+    assert rows[1][0] == sid and rows[1][-1] == 'applied'
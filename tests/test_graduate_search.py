@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+"""فهرس بحث الخريجين (graduate_search) يعيد نتائج المسح الكامل نفسها"""
+
+import os
+import random
+
+import pytest
+
+import graduate_search
+from graduate_search import GraduateIndex, DOC_FIELDS, doc_key, normalize
+from conftest import SITE_DATA_DIR
+
+UNLIMITED = 10 ** 9
+
+
+@pytest.fixture(scope='module')
+def graduates():
+    return graduate_search.read_graduates_csv(os.path.join(SITE_DATA_DIR, 'graduates_detail.csv'))
+
+
+@pytest.fixture(scope='module')
+def index_path(graduates, tmp_path_factory):
+    path = str(tmp_path_factory.mktemp('search') / 'graduates_search.idx')
+    graduate_search.write_index(graduates, path)
+    return path
+
+
+@pytest.fixture(scope='module')
+def docs(graduates):
+    """(النص المطبَّع، السجل) لكل خريج بترتيب الملف"""
+    out = []
+    for g in graduates:
+        values = [str(g.get(f, '') or '') for f in DOC_FIELDS]
+        out.append((doc_key(values), dict(zip(DOC_FIELDS, values))))
+    return out
+
+
+def _brute_force(docs, query, limit):
+    tokens = [t for t in normalize(query).split(' ') if t]
+    if not tokens:
+        return []
+    results = []
+    for key, doc in docs:
+        if all(t in key for t in tokens):
+            results.append(doc)
+            if len(results) >= limit:
+                break
+    return results
+
+
+def _queries(graduates, n=60, seed=5):
+    rng = random.Random(seed)
+    queries = ['', '   ', 'زززززز', 'محمد', 'عبدالله', 'ال', 'ع', 'ابراهيم', 'إبراهيم', 'مُحَمَّد']
+    for g in rng.sample(graduates, n):
+        words = g['name'].split()
+        word = rng.choice(words)
+        start = rng.randrange(len(word))
+        queries += [
+            g['student_id'],
+            g['student_id'][2:7],
+            ' '.join(rng.sample(words, min(2, len(words)))),
+            word[start:start + rng.randint(1, 4)],
+            f"{word} {g['student_id'][-3:]}",
+        ]
+    return queries
+
+
+def test_index_matches_brute_force(graduates, docs, index_path):
+    with GraduateIndex.load(index_path) as index:
+        assert len(index) == len(graduates)
+        for query in _queries(graduates):
+            assert index.search(query, limit=UNLIMITED) == _brute_force(docs, query, UNLIMITED), query
+            assert index.search(query) == _brute_force(docs, query, graduate_search.DEFAULT_LIMIT), query
+
+
+def test_index_from_bytes_matches_mmap(graduates, index_path):
+    with open(index_path, 'rb') as f:
+        in_memory = GraduateIndex(f.read())
+    with GraduateIndex.load(index_path) as mapped:
+        for query in ('محمد', 'الغامدي', '44'):
+            assert in_memory.search(query, limit=UNLIMITED) == mapped.search(query, limit=UNLIMITED)
+
+
+def test_index_is_smaller_than_csv(index_path):
+    assert os.path.getsize(index_path) < os.path.getsize(os.path.join(SITE_DATA_DIR, 'graduates_detail.csv'))
+
+
+def test_rejects_other_format():
+    with pytest.raises(ValueError):
+        GraduateIndex(b'KPIGSX1\n' + bytes(16))
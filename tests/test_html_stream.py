@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+"""القراءة التدريجية لملفات HTML (mmap) تطابق التحميل الكامل في BeautifulSoup"""
+
+import pytest
+
+import extract_data
+from conftest import make_semesters, write_html_export
+
+NESTED_HTML = (
+    '<html><body><table>'
+    '<tr><td>a</td><td>b<table><tr><td>x</td></tr><tr><td>y</td></tr></table>c</td><td>d</td></tr>'
+    '<tr><th> e </th></tr>'
+    '</table><table><tr><td>second</td></tr></table></body></html>'
+)
+# فصل ثانٍ فيه متخرجون بتاريخ تخرج ومنسحبون
+STUDENTS = make_semesters(seed=3)[(47, 2)]
+
+
+def _write(path, text):
+    with open(path, 'wb') as f:
+        f.write(text.encode(extract_data.HTML_ENCODING))
+    return str(path)
+
+
+@pytest.fixture
+def export_path(tmp_path):
+    path = str(tmp_path / '472.xls')
+    write_html_export(path, STUDENTS)
+    return path
+
+
+@pytest.mark.parametrize('chunk_size', [1, 13, 4096, extract_data.STREAM_CHUNK])
+def test_rows_match_soup(export_path, chunk_size):
+    # الأجزاء الصغيرة تقطع الوسوم والحروف متعددة البايتات في منتصفها
+    soup = list(extract_data._html_rows_soup(export_path))
+    assert list(extract_data._html_rows_stream(export_path, chunk_size)) == soup
+
+
+def test_parse_html_xls_both_paths(export_path):
+    students = extract_data.parse_html_xls(export_path, stream=False)
+    assert sorted(students, key=lambda s: s['student_id']) == sorted(STUDENTS, key=lambda s: s['student_id'])
+    assert extract_data.parse_html_xls(export_path, stream=True) == students
+
+
+@pytest.mark.parametrize('chunk_size', [1, 5, 4096])
+def test_nested_tables_skipped(tmp_path, chunk_size):
+    path = _write(tmp_path / 'nested.xls', NESTED_HTML)
+    expected = [['a', 'bc', 'd'], ['e']]
+    assert list(extract_data._html_rows_soup(path)) == expected
+    assert list(extract_data._html_rows_stream(path, chunk_size)) == expected
+
+
+def test_unclosed_table(tmp_path):
+    path = _write(tmp_path / 'cut.xls', '<table><tr><td>1</td><td>2</td></tr><tr><td>3')
+    assert list(extract_data._html_rows_stream(path, 4)) == list(extract_data._html_rows_soup(path))
+
+
+def test_empty_file(tmp_path):
+    path = _write(tmp_path / 'empty.xls', '')
+    assert list(extract_data._html_rows_stream(path)) == []
+    assert list(extract_data._html_rows_soup(path)) == []
@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+"""ترميز ملفات التدريس السنوية (pack_teaching) وفكه يعيد المحتوى الأصلي"""
+
+import os
+import json
+import gzip
+
+import pytest
+
+import pack_teaching
+from conftest import SITE_DATA_DIR
+
+YEARS_DIR = os.path.join(SITE_DATA_DIR, 'teaching', 'years')
+YEAR_FILES = sorted(os.listdir(YEARS_DIR))
+
+
+def _load(name):
+    with open(os.path.join(YEARS_DIR, name), 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+@pytest.mark.parametrize('layout', pack_teaching.LAYOUTS)
+@pytest.mark.parametrize('name', YEAR_FILES)
+def test_round_trip(name, layout):
+    payload = _load(name)
+    packed = pack_teaching.encode_year(payload, layout=layout)
+    # المرور بـ JSON كما يُكتب الملف فعلًا
+    decoded = pack_teaching.decode_year(json.loads(pack_teaching.dumps(packed)))
+    assert decoded == payload
+
+
+def test_packed_is_smaller():
+    payload = _load(YEAR_FILES[-1])
+    original = len(pack_teaching.dumps(payload).encode('utf-8'))
+    packed = len(pack_teaching.dumps(pack_teaching.encode_year(payload)).encode('utf-8'))
+    assert packed < original
+
+
+def test_unknown_layout():
+    with pytest.raises(ValueError):
+        pack_teaching.encode_year({'records': []}, layout='cells')
+
+
+def test_load_year_compressed(tmp_path):
+    payload = _load(YEAR_FILES[0])
+    path = str(tmp_path / YEAR_FILES[0])
+    sizes = pack_teaching.write_variants(path, pack_teaching.dumps(pack_teaching.encode_year(payload)).encode('utf-8'))
+    assert sizes['gz'] < sizes['raw']
+    assert pack_teaching.load_year(path) == payload
+    assert pack_teaching.load_year(path + '.gz') == payload
+    # الملف الأصلي غير المرمّز يُقرأ كما هو
+    original = str(tmp_path / 'original.json.gz')
+    with gzip.open(original, 'wb') as f:
+        f.write(pack_teaching.dumps(payload).encode('utf-8'))
+    assert pack_teaching.load_year(original) == payload
+
+
+def test_faculty_index_round_trip():
+    with open(os.path.join(SITE_DATA_DIR, 'teaching', 'meta.json'), 'r', encoding='utf-8') as f:
+        index = json.load(f)['faculty_index']
+    packed = pack_teaching.encode_faculty_index(index)
+    assert pack_teaching.decode_faculty_index(json.loads(pack_teaching.dumps(packed))) == index
@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+"""ملفات الفصول بصيغ CSV وXLSX تُحلَّل إلى سجلات تصدير HTML/XLS نفسها"""
+
+import csv
+
+import pytest
+
+import extract_data
+from conftest import EXPORT_HEADER, export_cells, make_semesters, write_html_export
+
+openpyxl = pytest.importorskip('openpyxl')
+
+
+@pytest.fixture
+def students():
+    students = make_semesters(seed=4)[(46, 2)]
+    # معدلات تختلف كتابتها بين الخلية الرقمية والنص
+    students[0]['gpa'] = '3.00'
+    students[1]['gpa'] = '2.60'
+    return students
+
+
+def _sheet_rows(students):
+    """صفوف الورقة كما في تصدير النظام: الكلية، ثم لكل قسم صف القسم والعناوين والطلاب"""
+    rows = [['الكلية :', 'كلية الشريعة والأنظمة']]
+    by_dept = {}
+    for s in students:
+        by_dept.setdefault(s['dept'], []).append(s)
+    i = 0
+    for dept, group in by_dept.items():
+        rows.append(['القسم :', dept])
+        rows.append(list(EXPORT_HEADER))
+        for s in group:
+            i += 1
+            rows.append(export_cells(i, s))
+    return rows
+
+
+def _numeric(row):
+    """الخلايا الرقمية (م، الرقم الجامعي، العمر، المعدل) كأرقام كما يحفظها Excel"""
+    if not row[0].isdigit():
+        return row
+    row = list(row)
+    for c in (0, 1, 6):
+        row[c] = int(row[c])
+    row[13] = float(row[13])
+    return row
+
+
+def _by_id(students):
+    return sorted(students, key=lambda s: s['student_id'])
+
+
+@pytest.fixture
+def reference(tmp_path, students):
+    path = str(tmp_path / '462.xls')
+    write_html_export(path, students)
+    return _by_id(extract_data.parse_semester_file(path))
+
+
+@pytest.mark.parametrize('encoding, delimiter', [('utf-8-sig', ';'), ('cp1256', ','), ('utf-8', '\t')])
+def test_csv_matches_html(tmp_path, students, reference, encoding, delimiter):
+    path = str(tmp_path / '462.csv')
+    with open(path, 'w', encoding=encoding, newline='') as f:
+        csv.writer(f, delimiter=delimiter).writerows(_sheet_rows(students))
+    assert _by_id(extract_data.parse_semester_file(path)) == reference
+
+
+def test_xlsx_matches_html(tmp_path, students, reference):
+    path = str(tmp_path / '462.xlsx')
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    for row in _sheet_rows(students):
+        ws.append(_numeric(row))
+    wb.save(path)
+    parsed = _by_id(extract_data.parse_semester_file(path))
+    assert parsed == reference
+    gpas = {s['student_id']: s['gpa'] for s in parsed}
+    assert gpas[students[0]['student_id']] == '3.00'
+    assert gpas[students[1]['student_id']] == '2.60'
+
+
+def test_real_xls_keeps_numeric_gpa_as_is(students):
+    # xlrd يعيد الخلايا الرقمية float؛ مسار XLS الحقيقي يحفظ str(value) كما كان قبل دعم XLSX
+    rows = [[float(v) if isinstance(v, int) else v for v in _numeric(row)] for row in _sheet_rows(students)]
+    parsed = {s['student_id']: s for s in extract_data.parse_sheet_rows(rows)}
+    first, second = parsed[students[0]['student_id']], parsed[students[1]['student_id']]
+    assert (first['gpa'], second['gpa']) == ('3', '2.6')
+    assert first['age'] == students[0]['age']
+
+
+def test_fastest_format_preferred(tmp_path):
+    for name in ('461.xls', '461.xlsx', '461.csv', '462.xls', '462.xlsx', '471.xls', 'notes.csv', '4711.xls'):
+        (tmp_path / name).write_bytes(b'')
+    assert dict(extract_data.list_semester_files(str(tmp_path))) == {
+        46: [('461.csv', 1), ('462.xlsx', 2)],
+        47: [('471.xls', 1)],
+    }
@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+"""مخزن اللقطات (snapshot_store) يعيد كل فصل كما حُلّل، بعد الحفظ والتحميل"""
+
+import pytest
+
+import snapshot_store
+from snapshot_store import SnapshotStore
+
+
+def _records(students):
+    # view يعيد السجلات دون ترتيب الملف، فتُقارن كمجموعة متعددة
+    return sorted(tuple(sorted(s.items())) for s in students)
+
+
+def _assert_views(store, semesters):
+    for (year, semester), students in semesters.items():
+        assert _records(store.view(year, semester)) == _records(students)
+
+
+@pytest.fixture
+def semester_records(semesters):
+    return [(year, semester, students) for (year, semester), students in semesters.items()]
+
+
+@pytest.mark.parametrize('name', ['snapshots.json', 'snapshots.json.gz'])
+def test_round_trip(tmp_path, semesters, semester_records, name):
+    store = snapshot_store.build_from_records(semester_records)
+    _assert_views(store, semesters)
+
+    path = str(tmp_path / name)
+    store.save(path)
+    loaded = SnapshotStore.load(path)
+    _assert_views(loaded, semesters)
+    assert loaded.stats() == store.stats()
+
+
+def test_stored_size_follows_changes(semesters, semester_records):
+    st = snapshot_store.build_from_records(semester_records).stats()
+    assert st['records_full'] == sum(len(s) for s in semesters.values())
+    assert st['students'] < st['records_full']
+    assert st['duplicates'] == 0
+
+
+def test_duplicate_ids_in_one_file(tmp_path):
+    base = {f: '' for f in snapshot_store.FIELDS}
+    first = dict(base, student_id='1', status='منتظم', program='الشريعة')
+    repeat = dict(base, student_id='1', status='منسحب', program='الأنظمة')
+    other = dict(base, student_id='2', status='منتظم', program='القراءات')
+    semesters = {
+        (46, 1): [first, other, repeat],
+        (46, 2): [dict(first, status='متخرج'), dict(repeat), dict(repeat)],
+    }
+    store = snapshot_store.build_from_records(
+        [(y, s, students) for (y, s), students in semesters.items()]
+    )
+    _assert_views(store, semesters)
+    assert store.stats()['duplicates'] == 3
+
+    path = str(tmp_path / 'snapshots.json.gz')
+    store.save(path)
+    _assert_views(SnapshotStore.load(path), semesters)
+
+
+def test_rejects_out_of_order_snapshot():
+    store = SnapshotStore()
+    store.add(46, 2, [])
+    with pytest.raises(ValueError):
+        store.add(46, 1, [])
+
+
+def test_rejects_other_version():
+    data = SnapshotStore().to_json()
+    data['version'] = snapshot_store.STORE_VERSION - 1
+    with pytest.raises(ValueError):
+        SnapshotStore.from_json(data)
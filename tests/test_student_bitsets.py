@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+"""مجموعات الطلاب كـ bitsets (student_bitsets) تعطي نتائج مجموعات Python نفسها"""
+
+import random
+from collections import defaultdict
+
+import pytest
+
+import extract_data
+import student_bitsets
+from student_bitsets import IntBitset, StudentSets
+
+BACKENDS = ['int'] + (['roaring'] if student_bitsets.BitMap is not None else [])
+
+
+def _random_ints(rng, n, high):
+    return {rng.randrange(high) for _ in range(n)}
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_int_bitset_matches_set(seed):
+    rng = random.Random(seed)
+    a = _random_ints(rng, rng.randrange(0, 300), 2000)
+    b = _random_ints(rng, rng.randrange(0, 300), 2000)
+    ba, bb = IntBitset.from_ints(a), IntBitset.from_ints(b)
+
+    assert list(ba) == sorted(a)
+    assert len(ba) == len(a) and bool(ba) == bool(a)
+    assert list(ba & bb) == sorted(a & b)
+    assert list(ba | bb) == sorted(a | b)
+    assert list(ba - bb) == sorted(a - b)
+    assert all((i in ba) == (i in a) for i in range(2100))
+    assert ba == IntBitset.from_ints(sorted(a, reverse=True))
+
+
+@pytest.mark.parametrize('backend', BACKENDS)
+def test_student_sets(backend):
+    sets = StudentSets(backend)
+    first = sets.of(['441000003', '441000001', '441000007'])
+    second = sets.of(['441000007', '441000009'])
+    assert sets.student_ids(first & second) == ['441000007']
+    assert sorted(sets.student_ids(sets.union([first, second]))) == [
+        '441000001', '441000003', '441000007', '441000009'
+    ]
+    assert sets.contains(first, '441000001')
+    assert not sets.contains(first, '441000009')
+    assert not sets.contains(first, 'غير موجود')
+    assert not sets.contains(None, '441000001')
+    assert not sets.empty()
+
+
+class _PythonSets:
+    """نفس واجهة StudentSets على مجموعات Python لأرقام الطلاب مباشرة"""
+
+    def __init__(self, backend=None):
+        pass
+
+    def empty(self):
+        return set()
+
+    def of(self, sids):
+        return set(sids)
+
+    def union(self, sets):
+        return set().union(*sets)
+
+
+def test_aggregate_kpis_match_python_sets(semesters, monkeypatch):
+    sem1_students = defaultdict(dict)
+    all_semesters_students = defaultdict(dict)
+    for (year, semester), students in sorted(semesters.items()):
+        extract_data.add_semester_records(sem1_students, all_semesters_students, year, semester, students)
+
+    with_bitsets = extract_data.aggregate_kpis(sem1_students, all_semesters_students, verbose=False)
+    monkeypatch.setattr(extract_data, 'StudentSets', _PythonSets)
+    with_sets = extract_data.aggregate_kpis(sem1_students, all_semesters_students, verbose=False)
+
+    assert with_bitsets == with_sets
+    assert any(row['students_retained'] for row in with_sets.values())
+    assert any(row['graduates_ontime'] for row in with_sets.values())
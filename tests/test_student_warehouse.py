@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+"""مؤشرات v_program_kpis في مستودع SQLite تطابق data.csv الناتج من extract_data"""
+
+import csv
+
+import extract_data
+import student_warehouse
+
+CSV_KEYS = ('Dept_aName', 'Major_aName', 'Degree_aName', 'Semester')
+
+
+def test_views_match_data_csv(workspace):
+    db_path = str(workspace / 'data' / 'students.db')
+    extract_data.main(publish_outputs=False, sqlite_path=db_path)
+
+    with open(extract_data.OUTPUT_CSV, 'r', encoding='utf-8', newline='') as f:
+        expected = {
+            tuple(row[k] for k in CSV_KEYS): [row[c] for c in student_warehouse.KPI_COLUMNS[4:]]
+            for row in csv.DictReader(f, delimiter=';')
+        }
+    assert expected
+
+    conn = student_warehouse.connect(db_path)
+    try:
+        actual = {
+            (r['dept'], r['program'], r['degree'], str(r['year'])):
+                [str(r[c]) for c in student_warehouse.KPI_COLUMNS[4:]]
+            for r in student_warehouse.program_kpis(conn)
+        }
+        filtered = student_warehouse.program_kpis(conn, year=47, program='الشريعة')
+    finally:
+        conn.close()
+
+    assert actual == expected
+    assert filtered and all(r['year'] == 47 and r['program'] == 'الشريعة' for r in filtered)
+
+
+def test_semester_records_loaded(workspace, semesters):
+    db_path = str(workspace / 'data' / 'students.db')
+    n = student_warehouse.build_from_exports(db_path)
+    assert n == sum(len(students) for students in semesters.values())
+
+    conn = student_warehouse.connect(db_path)
+    try:
+        rows = conn.execute(
+            "SELECT year, semester, COUNT(*) AS n FROM semester_records GROUP BY year, semester"
+        ).fetchall()
+    finally:
+        conn.close()
+    assert {(r['year'], r['semester']): r['n'] for r in rows} == {
+        key: len(students) for key, students in semesters.items()
+    }
@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+"""القراءة التدفقية لملفات التدريس (teaching_reader) تطابق json.load للملف كاملًا"""
+
+import os
+import io
+import json
+
+import pytest
+
+import pack_teaching
+import teaching_reader
+from conftest import SITE_DATA_DIR
+
+YEARS_DIR = os.path.join(SITE_DATA_DIR, 'teaching', 'years')
+YEAR_FILES = sorted(teaching_reader.year_files(YEARS_DIR).values())
+
+
+def _records(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)['records']
+
+
+@pytest.mark.parametrize('path', YEAR_FILES, ids=os.path.basename)
+def test_iter_records_matches_json_load(path):
+    assert list(teaching_reader.iter_records(path)) == _records(path)
+
+
+@pytest.mark.parametrize('chunk_size', [1, 7, 1000])
+def test_chunked_reader_across_boundaries(chunk_size):
+    # أجزاء صغيرة تقطع السجلات والنصوص العربية في منتصفها
+    payload = {'year': 1447, 'records': _records(YEAR_FILES[-1])[:40]}
+    f = io.StringIO(json.dumps(payload, ensure_ascii=False, indent=1))
+    assert list(teaching_reader._iter_records_chunked(f, chunk_size)) == payload['records']
+
+
+def test_chunked_reader_empty_records():
+    f = io.StringIO('{"year": 1447, "records": [ ]}')
+    assert list(teaching_reader._iter_records_chunked(f, 4)) == []
+
+
+def test_packed_and_compressed_files(tmp_path):
+    path = YEAR_FILES[0]
+    records = _records(path)
+    packed_path = str(tmp_path / os.path.basename(path))
+    data = pack_teaching.dumps(pack_teaching.encode_year({'year': 1439, 'records': records}))
+    pack_teaching.write_variants(packed_path, data.encode('utf-8'))
+    assert list(teaching_reader.iter_records(packed_path)) == records
+    assert list(teaching_reader.iter_records(packed_path + '.gz')) == records
+
+
+def test_iter_sections_carries_record_fields():
+    path = YEAR_FILES[0]
+    expected = [
+        dict({k: rec.get(k) for k in teaching_reader.RECORD_FIELDS}, **c)
+        for rec in _records(path) for c in rec.get(teaching_reader.SECTIONS_KEY, [])
+    ]
+    assert list(teaching_reader.iter_sections(path)) == expected
+
+
+def test_parallel_summaries_match_sequential():
+    sequential = teaching_reader.summarize_years(YEARS_DIR, workers=1)
+    parallel = teaching_reader.summarize_years(YEARS_DIR, workers=2)
+    assert parallel == sequential
+    for year, path in teaching_reader.year_files(YEARS_DIR).items():
+        n = sum(len(rec.get('cs', [])) for rec in _records(path))
+        assert sequential[year]['sections_total'] == n
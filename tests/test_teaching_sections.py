@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+"""عدّ الشعب من ملفات التدريس (teaching_sections)"""
+
+import os
+import json
+
+import teaching_reader
+import teaching_sections
+from conftest import SITE_DATA_DIR
+
+YEARS_DIR = os.path.join(SITE_DATA_DIR, 'teaching', 'years')
+PLANS_CSV = os.path.join(SITE_DATA_DIR, 'new_all_plans.csv')
+
+
+def _section(cc, dg, l, e):
+    return {'cn': 'مقرر', 'cc': cc, 'm': 'حضوري', 'e': e, 'h': 3, 'dg': dg,
+            'st': 'إنتظام', 'a': 'نظري', 'l': l}
+
+
+def _write_year(path, records):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'year': 1447, 'records': records}, f, ensure_ascii=False)
+
+
+def test_every_section_entry_counts(tmp_path):
+    # عضوان يدرّسان المقرر نفسه بالقيم نفسها: شعبتان لا شعبة واحدة
+    same = _section('2001105-2', 'البكالوريوس', 'حوية', 30)
+    records = [
+        {'fid': '1', 'y': 1447, 's': 1, 'cs': [same, _section('2001105-2', 'البكالوريوس', 'حوية - طالبات', 20)]},
+        {'fid': '2', 'y': 1447, 's': 1, 'cs': [dict(same)]},
+        {'fid': '3', 'y': 1447, 's': 2, 'cs': [
+            _section('2001105-2', 'الماجستير', 'حوية', 5),     # درجة لا تطابق البرنامج
+            _section('9999999-9', 'البكالوريوس', 'حوية', 10),  # مقرر خارج الخطط
+        ]},
+    ]
+    path = str(tmp_path / '1447.json')
+    _write_year(path, records)
+    course_programs = {'2001105-2': [('الأنظمة', 'بكالوريوس'), ('الشريعة', 'بكالوريوس')]}
+
+    counts, unmapped = teaching_sections.count_year_sections(path, course_programs)
+    assert unmapped == 2
+    # المقرر المشترك يُحتسب لكل برنامج يدرسه
+    for target in course_programs['2001105-2']:
+        assert counts[target] == {'total': 3, 'male': 2, 'female': 1, 'enrolled': 80}
+
+
+def test_compute_sections_on_repo_data():
+    course_programs = teaching_sections.load_course_programs(PLANS_CSV)
+    sections, unmapped = teaching_sections.compute_sections(YEARS_DIR, PLANS_CSV, workers=1)
+    assert sections
+
+    for year, path in teaching_reader.year_files(YEARS_DIR).items():
+        short_year = year % 100
+        expected = {}
+        n_unmapped = 0
+        for section in teaching_reader.iter_sections(path):
+            degree = teaching_sections.normalize_degree(section.get('dg'))
+            targets = [t for t in course_programs.get(str(section.get('cc', '')).strip(), [])
+                       if t[1] == degree]
+            n_unmapped += not targets
+            for target in targets:
+                expected[target] = expected.get(target, 0) + 1
+        assert unmapped[short_year] == n_unmapped
+        for (major, degree), n in expected.items():
+            row = sections[(major, degree, short_year)]
+            assert row['sections_total'] == n
+            assert row['sections_male'] + row['sections_female'] == n